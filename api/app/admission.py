@@ -0,0 +1,207 @@
+"""Memory admission control for jobs.
+
+Every job gets a peak-memory estimate from its mesh size and solver path. The API rejects
+jobs above ``JOB_MAX_MEMORY_MB`` outright. Each worker has a budget,
+``WORKER_MEMORY_BUDGET_MB`` or else 90% of its cgroup memory limit. A job above that
+budget is refused with a recorded error instead of being OOM-killed without one. A job
+that fits the budget but not the memory free right now is deferred and retried later.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_MESH = (64, 32)
+DEFAULT_MAX_DOFS = 200_000
+# Interpreter plus numpy/scipy/scikit-fem/meshio once imported
+BASE_MB = 80.0
+# Peak RSS growth of one P2-P1 FEM solve (assembly + SuperLU factorization) measured on
+# tensor meshes; it grows like N**1.22 in the DOF count N because of LU fill-in:
+#   64x32 (18k DOFs) 108 MB, 128x64 (73k) 588 MB, 256x128 (293k) 3210 MB
+_FEM_COEFF_MB = 6.9e-4
+_FEM_EXPONENT = 1.22
+# Keep estimates on the safe side of the measurements
+SAFETY = 1.25
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """A job's estimated memory does not fit the worker's budget."""
+
+
+def fem_dofs(nx: int, ny: int) -> int:
+    """DOFs of the P2-P1 Taylor-Hood system on an ``nx`` x ``ny`` point tensor mesh."""
+    vertices = nx * ny
+    # Horizontal, vertical and diagonal edges of the split quads
+    edges = (nx - 1) * ny + nx * (ny - 1) + (nx - 1) * (ny - 1)
+    return 2 * (vertices + edges) + vertices
+
+
+def analytic_dofs(nx: int, ny: int) -> int:
+    """Grid values (u, v, p) of the analytic Poiseuille solution."""
+    return 3 * nx * ny
+
+
+def fem_memory_mb(dofs: int) -> float:
+    """Estimated peak memory in MiB of a P2-P1 solve with ``dofs`` unknowns."""
+    return SAFETY * (BASE_MB + _FEM_COEFF_MB * dofs**_FEM_EXPONENT)
+
+
+def estimate_memory_mb(solver: str, nx: int, ny: int) -> float:
+    """Estimated peak memory in MiB of one solve, process baseline included."""
+    if solver in ("fem", "fem_gn", "fem_transient"):
+        # The viscosity iteration frees each factorization before the next one, and time
+        # stepping holds one flow factorization plus a much smaller P1 transport one
+        return fem_memory_mb(fem_dofs(nx, ny))
+    elif solver == "mac":
+        # Dense eigenvectors across the shorter direction, two tridiagonal factorizations
+        # (~5 cell-sized arrays each) and ~20 cell-sized work arrays
+        solve_mb = 8 * (2 * min(nx, ny) ** 2 + 30 * nx * ny) / (1024.0 * 1024.0)
+    elif solver == "analytic":
+        # A handful of float64 grids (meshgrid, u, v, p, temporaries)
+        solve_mb = 12 * 8 * nx * ny / (1024.0 * 1024.0)
+    else:
+        raise ValueError(f"Unknown solver {solver!r}")
+    return SAFETY * (BASE_MB + solve_mb)
+
+
+def job_mesh(spec_data: dict) -> tuple[int, int]:
+    mesh = spec_data.get("mesh") or {}
+    return int(mesh.get("nx", DEFAULT_MESH[0])), int(mesh.get("ny", DEFAULT_MESH[1]))
+
+
+def job_solver(spec_data: dict) -> str:
+    """Solver a rectangular-channel job runs on: "mac" unless FEM is asked for.
+
+    Transient jobs always use the time-stepping FEM driver, non-Newtonian fluids the
+    generalized-Newtonian one and adaptive meshes the adaptive one.
+    """
+    if spec_data.get("transient"):
+        return "fem_transient"
+    if (spec_data.get("material") or {}).get("rheology", "newtonian") != "newtonian":
+        return "fem_gn"
+    if (spec_data.get("mesh") or {}).get("adaptive"):
+        return "fem_adaptive"
+    return "fem" if spec_data.get("solver") == "fem" else "mac"
+
+
+def mac_dofs(nx: int, ny: int) -> int:
+    """Unknown u faces, interior v faces and cell pressures of an ``nx`` x ``ny`` cell grid."""
+    return nx * ny + nx * (ny - 1) + nx * ny
+
+
+def estimate_job(spec_data: dict) -> dict[str, Any]:
+    """Estimated DOFs and peak memory of a job.
+
+    Jobs are sized for their primary solver even though they may end up on the analytic
+    fallback.
+    """
+    nx, ny = job_mesh(spec_data)
+    solver = job_solver(spec_data)
+    if solver == "fem_adaptive":
+        # Sized for the DOF budget the refinement may grow to
+        dofs = int((spec_data.get("mesh") or {}).get("max_dofs", DEFAULT_MAX_DOFS))
+        return {"solver": solver, "dofs": dofs, "memory_mb": fem_memory_mb(dofs)}
+    return {
+        "solver": solver,
+        "nx": nx,
+        "ny": ny,
+        "dofs": fem_dofs(nx, ny) if solver.startswith("fem") else mac_dofs(nx, ny),
+        "memory_mb": estimate_memory_mb(solver, nx, ny),
+    }
+
+
+def _describe(est: dict[str, Any]) -> str:
+    if "nx" not in est:
+        return f"an estimated {est['memory_mb']:.0f} MB ({est['solver']}, up to {est['dofs']} DOFs)"
+    return (
+        f"an estimated {est['memory_mb']:.0f} MB ({est['solver']}, "
+        f"{est['nx']}x{est['ny']} mesh, {est['dofs']} DOFs)"
+    )
+
+
+def api_limit_mb() -> float:
+    """Largest job the API accepts; 0 disables the check."""
+    return float(os.getenv("JOB_MAX_MEMORY_MB", "8192"))
+
+
+def api_rejection(spec_data: dict) -> Optional[str]:
+    """Error message when the job is too large to accept at all, else None."""
+    limit = api_limit_mb()
+    if limit <= 0:
+        return None
+    est = estimate_job(spec_data)
+    if est["memory_mb"] <= limit:
+        return None
+    return f"Job needs {_describe(est)}, above the limit of {limit:.0f} MB; use a coarser mesh"
+
+
+def _read_int(path: str) -> Optional[int]:
+    try:
+        raw = Path(path).read_text().strip()
+    except OSError:
+        return None
+    # cgroup v2 reports "max" when unlimited; v1 reports a huge sentinel instead
+    if not raw.isdigit() or int(raw) >= 1 << 60:
+        return None
+    return int(raw)
+
+
+def cgroup_limit_mb() -> Optional[float]:
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read_int(path)
+        if limit is not None:
+            return limit / (1024.0 * 1024.0)
+    return None
+
+
+def available_memory_mb() -> Optional[float]:
+    """Memory this container can still allocate: cgroup headroom, else MemAvailable."""
+    limit = cgroup_limit_mb()
+    if limit is not None:
+        for path in (
+            "/sys/fs/cgroup/memory.current",
+            "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+        ):
+            used = _read_int(path)
+            if used is not None:
+                return limit - used / (1024.0 * 1024.0)
+    try:
+        for line in Path("/proc/meminfo").read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def worker_budget_mb() -> Optional[float]:
+    raw = os.getenv("WORKER_MEMORY_BUDGET_MB")
+    if raw:
+        return float(raw) if float(raw) > 0 else None
+    limit = cgroup_limit_mb()
+    return 0.9 * limit if limit is not None else None
+
+
+def check_worker_budget(spec_data: dict) -> None:
+    """Raise ``MemoryBudgetExceeded`` when the job can never fit this worker."""
+    budget = worker_budget_mb()
+    if budget is None:
+        return
+    est = estimate_job(spec_data)
+    if est["memory_mb"] > budget:
+        raise MemoryBudgetExceeded(
+            f"Job needs {_describe(est)}, above this worker's memory budget of {budget:.0f} MB"
+        )
+
+
+def should_defer(spec_data: dict) -> bool:
+    """True when the job fits the budget but not the memory available right now."""
+    budget = worker_budget_mb()
+    est = estimate_job(spec_data)["memory_mb"]
+    if budget is not None and est > budget:
+        # Never fits: run it so the task refuses it with a recorded error
+        return False
+    available = available_memory_mb()
+    return available is not None and est > available
@@ -0,0 +1,280 @@
+"""Geometry normalization for imported drawings.
+
+Turns a soup of line segments (DXF LINEs and open polylines, one per channel centerline
+piece) into a compact channel graph: endpoints closer than a tolerance are snapped onto
+shared nodes through a uniform-grid spatial hash, segments ending on another segment's
+interior split it into a T-junction (edges are hashed into the cells along their path),
+and chains of collinear segments of equal width are merged into single edges.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+
+
+@dataclass
+class Segment:
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    width: float
+    layer: str = "0"
+
+
+@dataclass
+class ChannelGraph:
+    nodes: list[dict[str, Any]] = field(default_factory=list)
+    edges: list[dict[str, Any]] = field(default_factory=list)
+    stats: dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"nodes": self.nodes, "edges": self.edges, "stats": self.stats}
+
+
+def _cell(x: float, y: float, size: float) -> tuple[int, int]:
+    return (math.floor(x / size), math.floor(y / size))
+
+
+class _PointGrid:
+    """Spatial hash of node positions; lookups only visit the 3x3 neighbouring cells."""
+
+    def __init__(self, tol: float) -> None:
+        self.tol = tol
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        self.xy: list[tuple[float, float]] = []
+
+    def snap(self, x: float, y: float) -> int:
+        cx, cy = _cell(x, y, self.tol)
+        tol2 = self.tol * self.tol
+        for i in (cx - 1, cx, cx + 1):
+            for j in (cy - 1, cy, cy + 1):
+                for nid in self.cells.get((i, j), ()):
+                    nx, ny = self.xy[nid]
+                    if (nx - x) ** 2 + (ny - y) ** 2 <= tol2:
+                        return nid
+        nid = len(self.xy)
+        self.xy.append((x, y))
+        self.cells.setdefault((cx, cy), []).append(nid)
+        return nid
+
+
+def _segment_cells(
+    a: tuple[float, float], b: tuple[float, float], size: float
+) -> Iterator[tuple[int, int]]:
+    """Grid cells the segment from ``a`` to ``b`` passes through, in order.
+
+    Amanatides-Woo traversal: one step per cell boundary crossed, so a segment costs its
+    length in cells rather than the area of its bounding box.
+    """
+    (ax, ay), (bx, by) = a, b
+    i, j = _cell(ax, ay, size)
+    i_end, j_end = _cell(bx, by, size)
+    di, dj = (1 if bx > ax else -1), (1 if by > ay else -1)
+    dx, dy = abs(bx - ax), abs(by - ay)
+    # Segment parameter at the next vertical/horizontal cell boundary, and per cell
+    tx = ((i + (di > 0)) * size - ax) / (bx - ax) if dx else math.inf
+    ty = ((j + (dj > 0)) * size - ay) / (by - ay) if dy else math.inf
+    step_x = size / dx if dx else math.inf
+    step_y = size / dy if dy else math.inf
+    ni, nj = abs(i_end - i), abs(j_end - j)
+    yield i, j
+    # Step counts are fixed, so rounding at cell corners cannot overshoot the end cell
+    while ni or nj:
+        if nj == 0 or (ni and tx < ty):
+            i, tx, ni = i + di, tx + step_x, ni - 1
+        else:
+            j, ty, nj = j + dj, ty + step_y, nj - 1
+        yield i, j
+
+
+def default_tolerance(segments: list[Segment]) -> float:
+    """1e-6 of the drawing's bounding-box diagonal."""
+    if not segments:
+        return 1e-9
+    xs = [s.x1 for s in segments] + [s.x2 for s in segments]
+    ys = [s.y1 for s in segments] + [s.y2 for s in segments]
+    diag = math.hypot(max(xs) - min(xs), max(ys) - min(ys))
+    return max(diag * 1e-6, 1e-12)
+
+
+def _split_t_junctions(
+    xy: list[tuple[float, float]], edges: list[list], tol: float
+) -> list[list]:
+    """Split edges at nodes lying on their interior (within ``tol``)."""
+    if not edges:
+        return edges
+    lengths = sorted(math.dist(xy[e[0]], xy[e[1]]) for e in edges)
+    size = max(lengths[len(lengths) // 2], tol)
+    grid: dict[tuple[int, int], list[int]] = {}
+    for eid, (a, b, _w, _layer) in enumerate(edges):
+        for key in _segment_cells(xy[a], xy[b], size):
+            grid.setdefault(key, []).append(eid)
+
+    cuts: dict[int, list[tuple[float, int]]] = {}
+    for nid, (px, py) in enumerate(xy):
+        # A node within tol (<= size) of an edge is at most one cell away from it
+        cx, cy = _cell(px, py, size)
+        near = {
+            eid
+            for i in (cx - 1, cx, cx + 1)
+            for j in (cy - 1, cy, cy + 1)
+            for eid in grid.get((i, j), ())
+        }
+        for eid in near:
+            a, b = edges[eid][0], edges[eid][1]
+            if nid in (a, b):
+                continue
+            (ax, ay), (bx, by) = xy[a], xy[b]
+            dx, dy = bx - ax, by - ay
+            len2 = dx * dx + dy * dy
+            if len2 == 0.0:
+                continue
+            t = ((px - ax) * dx + (py - ay) * dy) / len2
+            if t <= 0.0 or t >= 1.0:
+                continue
+            if math.hypot(ax + t * dx - px, ay + t * dy - py) <= tol:
+                cuts.setdefault(eid, []).append((t, nid))
+
+    if not cuts:
+        return edges
+    out: list[list] = []
+    for eid, (a, b, w, layer) in enumerate(edges):
+        if eid not in cuts:
+            out.append([a, b, w, layer])
+            continue
+        chain = [a] + [nid for _t, nid in sorted(set(cuts[eid]))] + [b]
+        for u, v in zip(chain, chain[1:]):
+            if u != v:
+                out.append([u, v, w, layer])
+    return out
+
+
+def _collinear(
+    p: tuple[float, float], q: tuple[float, float], r: tuple[float, float], sin_tol: float
+) -> bool:
+    ux, uy = q[0] - p[0], q[1] - p[1]
+    vx, vy = r[0] - q[0], r[1] - q[1]
+    nu, nv = math.hypot(ux, uy), math.hypot(vx, vy)
+    if nu == 0.0 or nv == 0.0:
+        return True
+    cross = (ux * vy - uy * vx) / (nu * nv)
+    dot = ux * vx + uy * vy
+    return abs(cross) <= sin_tol and dot > 0.0
+
+
+def build_channel_graph(
+    segments: Iterable[Segment],
+    tol: Optional[float] = None,
+    angle_tol_deg: float = 0.5,
+) -> ChannelGraph:
+    """Snap, split and merge ``segments`` into a channel graph.
+
+    Nodes carry ``kind`` ``"end"`` (degree 1), ``"bend"`` (degree 2) or ``"junction"``
+    (degree 3 or more). Edges keep the width and layer of the segments they replace;
+    segments of different width or layer are never merged.
+    """
+    segs = list(segments)
+    if tol is None:
+        tol = default_tolerance(segs)
+    grid = _PointGrid(tol)
+    edges: list[list] = []
+    seen: dict[tuple[int, int, str], int] = {}
+    for s in segs:
+        a = grid.snap(s.x1, s.y1)
+        b = grid.snap(s.x2, s.y2)
+        if a == b:
+            continue
+        key = (min(a, b), max(a, b), s.layer)
+        if key in seen:
+            # Duplicate segment: keep the wider one
+            e = edges[seen[key]]
+            e[2] = max(e[2], s.width)
+            continue
+        seen[key] = len(edges)
+        edges.append([a, b, float(s.width), s.layer])
+    xy = grid.xy
+    edges = _split_t_junctions(xy, edges, tol)
+
+    # Merge chains through degree-2 nodes whose two edges are collinear and alike
+    alive: dict[int, list] = dict(enumerate(edges))
+    adj: dict[int, set[int]] = {}
+    for eid, (a, b, _w, _layer) in alive.items():
+        adj.setdefault(a, set()).add(eid)
+        adj.setdefault(b, set()).add(eid)
+    sin_tol = math.sin(math.radians(angle_tol_deg))
+    for n in list(adj):
+        inc = adj.get(n)
+        if not inc or len(inc) != 2:
+            continue
+        i1, i2 = tuple(inc)
+        e1, e2 = alive[i1], alive[i2]
+        if e1[2] != e2[2] or e1[3] != e2[3]:
+            continue
+        p = e1[0] if e1[1] == n else e1[1]
+        r = e2[0] if e2[1] == n else e2[1]
+        if p == r or not _collinear(xy[p], xy[n], xy[r], sin_tol):
+            continue
+        alive[i1] = [p, r, e1[2], e1[3]]
+        del alive[i2]
+        adj[r].discard(i2)
+        adj[r].add(i1)
+        del adj[n]
+
+    node_ids = {n: i for i, n in enumerate(sorted(adj))}
+    nodes = []
+    for n, i in node_ids.items():
+        degree = len(adj[n])
+        kind = "end" if degree == 1 else "bend" if degree == 2 else "junction"
+        nodes.append({"id": i, "x": xy[n][0], "y": xy[n][1], "degree": degree, "kind": kind})
+    out_edges = []
+    for i, (a, b, w, layer) in enumerate(alive[k] for k in sorted(alive)):
+        out_edges.append(
+            {
+                "id": i,
+                "source": node_ids[a],
+                "target": node_ids[b],
+                "width": w,
+                "length": math.dist(xy[a], xy[b]),
+                "layer": layer,
+            }
+        )
+    stats = {
+        "segments_in": len(segs),
+        "nodes": len(nodes),
+        "edges": len(out_edges),
+        "junctions": sum(1 for n in nodes if n["kind"] == "junction"),
+        "tolerance": tol,
+    }
+    return ChannelGraph(nodes=nodes, edges=out_edges, stats=stats)
+
+
+def graph_to_shapes(graph: ChannelGraph, layer_types: dict[str, str]) -> list[dict[str, Any]]:
+    """One rotated rect per graph edge, centred on the edge's centreline."""
+    shapes: list[dict[str, Any]] = []
+    nodes = {n["id"]: n for n in graph.nodes}
+    for e in graph.edges:
+        a, b = nodes[e["source"]], nodes[e["target"]]
+        length, width = e["length"], e["width"]
+        cx, cy = (a["x"] + b["x"]) / 2.0, (a["y"] + b["y"]) / 2.0
+        angle = math.degrees(math.atan2(b["y"] - a["y"], b["x"] - a["x"]))
+        # A rect rotated by 180 degrees is the same rect; keep angles in (-90, 90]
+        if angle > 90.0:
+            angle -= 180.0
+        elif angle <= -90.0:
+            angle += 180.0
+        shapes.append(
+            {
+                "id": None,
+                "type": layer_types.get(e["layer"], "rect"),
+                "x": cx - length / 2.0,
+                "y": cy - width / 2.0,
+                "width": length,
+                "height": width,
+                "rotation": angle,
+                "layer": e["layer"],
+            }
+        )
+    return shapes
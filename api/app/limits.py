@@ -0,0 +1,97 @@
+"""Per-client rate limits for the job API.
+
+Each client has a token bucket per limit: ``submit`` for jobs created (a sweep takes one
+token per variant) and ``status`` for status polls. A bucket holds up to ``*_BURST``
+tokens and refills at ``*_RATE_PER_S``; a rate of 0 disables the limit. A request costing
+more than the burst can never be granted (``take`` returns infinity). Buckets live in
+the API process, so rejected status polls never reach Redis; with several API processes
+each enforces the limits on its own share of the traffic. Submissions are charged only
+once the queue checks passed, so requests turned away for backpressure cost no tokens.
+
+Backpressure on the queue itself (``QUEUE_MAX_DEPTH`` waiting jobs, ``PROJECT_MAX_INFLIGHT``
+unfinished jobs per project) is checked by the routers, which own the queue.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Environment variables and defaults of each limit: (rate per second, burst)
+LIMITS = {
+    "submit": (("SUBMIT_RATE_PER_S", "2"), ("SUBMIT_BURST", "20")),
+    "status": (("STATUS_RATE_PER_S", "10"), ("STATUS_BURST", "50")),
+}
+# Least recently used buckets are dropped beyond this many clients; a dropped bucket
+# comes back full, which only forgives a client idle long enough to be evicted
+MAX_CLIENTS = 10_000
+
+
+class TokenBucket:
+    """``burst`` tokens refilled continuously at ``rate`` per second."""
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, cost: float, now: float) -> float:
+        """Take ``cost`` tokens: 0.0 when granted, else the seconds until they are there.
+
+        Nothing is taken unless granted; a cost above the burst waits forever (infinity).
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if cost > self.burst:
+            return math.inf
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+_BUCKETS: OrderedDict[tuple[str, str], TokenBucket] = OrderedDict()
+_LOCK = threading.Lock()
+
+
+def limit_settings(limit: str) -> tuple[float, float]:
+    """(rate per second, burst) of a limit from the environment."""
+    (rate_var, rate_default), (burst_var, burst_default) = LIMITS[limit]
+    rate = float(os.getenv(rate_var, rate_default))
+    burst = max(float(os.getenv(burst_var, burst_default)), 1.0)
+    return rate, burst
+
+
+def take(limit: str, client: str, cost: float = 1.0) -> float:
+    """Charge ``client`` ``cost`` tokens of ``limit``; 0.0 when allowed, else the wait in s."""
+    rate, burst = limit_settings(limit)
+    if rate <= 0:
+        return 0.0
+    now = time.monotonic()
+    key = (limit, client)
+    with _LOCK:
+        bucket = _BUCKETS.get(key)
+        if bucket is None:
+            bucket = _BUCKETS[key] = TokenBucket(rate, burst, now)
+            while len(_BUCKETS) > MAX_CLIENTS:
+                _BUCKETS.popitem(last=False)
+        else:
+            _BUCKETS.move_to_end(key)
+            # Settings are read on every call, so changes apply to existing buckets
+            bucket.rate, bucket.burst = rate, burst
+        return bucket.take(cost, now)
+
+
+def retry_after(seconds: float) -> str:
+    """``Retry-After`` header value: whole seconds, at least 1."""
+    return str(max(1, math.ceil(seconds)))
+
+
+def reset() -> None:
+    """Forget all buckets."""
+    with _LOCK:
+        _BUCKETS.clear()
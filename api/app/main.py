@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import health, imports, jobs, projects, sweeps
+from .routers import archives, health, imports, jobs, metrics, projects, studies, sweeps
 
 
 def create_app() -> FastAPI:
@@ -13,13 +13,18 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Read by the UI: project list paging, versions and rate limit back-off
+        expose_headers=["X-Total-Count", "ETag", "Retry-After"],
     )
 
     app.include_router(health.router)
+    app.include_router(metrics.router)
     app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
     app.include_router(imports.router, prefix="/api/v1", tags=["import"])
     app.include_router(projects.router, prefix="/api/v1", tags=["projects"])
+    app.include_router(archives.router, prefix="/api/v1", tags=["projects"])
     app.include_router(sweeps.router, prefix="/api/v1", tags=["sweeps"])
+    app.include_router(studies.router, prefix="/api/v1", tags=["studies"])
 
     return app
 
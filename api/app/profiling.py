@@ -0,0 +1,85 @@
+"""Opt-in profiling of a single job run.
+
+The job runs under ``cProfile`` (exact call counts, dumped as ``.pstats``) while a
+background thread samples the job thread's Python stack at a fixed interval. The samples
+are written in the collapsed-stack format (``frame;frame;frame count``, root first, frames
+labelled ``function (file:line)`` like py-spy) that flamegraph.pl and speedscope read.
+Sampled timings include cProfile's own overhead, so compare shapes, not absolute times.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+
+def _interval_s() -> float:
+    return max(float(os.getenv("JOB_PROFILE_INTERVAL_MS", "5")), 0.5) / 1000.0
+
+
+class _StackSampler(threading.Thread):
+    """Counts the stacks of one thread below a base frame."""
+
+    def __init__(self, thread_id: int, base_frame, interval: float) -> None:
+        super().__init__(name="job-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.base_frame = base_frame
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.base_frame:
+                code = frame.f_code
+                labels.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def _write_profile(prof, sampler: _StackSampler, out_dir: Path, prefix: str) -> list[str]:
+    names = []
+    pstats_path = out_dir / f"{prefix}-profile.pstats"
+    prof.dump_stats(str(pstats_path))
+    names.append(pstats_path.name)
+    collapsed_path = out_dir / f"{prefix}-profile.collapsed.txt"
+    with collapsed_path.open("w") as f:
+        for stack, count in sampler.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    names.append(collapsed_path.name)
+    return names
+
+
+def profile_call(
+    fn: Callable[..., Any], *args: Any, out_dir: Path, prefix: str, **kwargs: Any
+) -> tuple[Any, list[str]]:
+    """Run ``fn`` under the profilers; returns its result and the artifact names written.
+
+    The profile is written even when ``fn`` raises, so failing jobs can be inspected too.
+    """
+    import cProfile
+
+    prof = cProfile.Profile()
+    sampler = _StackSampler(threading.get_ident(), sys._getframe(), _interval_s())
+    sampler.start()
+    prof.enable()
+    try:
+        ret = fn(*args, **kwargs)
+    finally:
+        prof.disable()
+        sampler.stop()
+        names = _write_profile(prof, sampler, out_dir, prefix)
+    return ret, names
@@ -0,0 +1,332 @@
+"""POD reduced-order models trained from sweep snapshots.
+
+The offline stage takes the full-field solutions of a finished sweep (all on the same
+mesh topology) and builds, per field, a POD basis from the SVD of the mean-centred
+snapshot matrix. The basis is truncated once the discarded part of the snapshots drops
+below the requested relative L2 tolerance. A new parameter point is answered by
+interpolating the POD coefficients with a thin-plate-spline RBF (plus a linear polynomial)
+over the min-max normalized parameters, so the solver code needs no changes.
+
+Every prediction comes with an error indicator. Leave-one-out errors are measured at each
+training point, inverse-distance weighted at the query and damped towards the truncation
+error as the query approaches a snapshot. Points outside the training box, or with a
+parameter the sweep held fixed set to another value, get ``inf``.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from .admission import job_mesh, job_solver
+
+FIELDS = ("u", "p")
+# Spec entries a sweep may vary; density and diffusivity do not enter the Stokes solve
+PARAMETERS = ("geometry.width", "geometry.height", "material.viscosity", "inlet.value")
+
+
+def rom_parameters(spec_data: dict) -> dict[str, float]:
+    """The Stokes-relevant scalar parameters of a job spec."""
+    geom = spec_data.get("geometry") or {}
+    material = spec_data.get("material") or {}
+    u_avg = 1e-3  # same default as the job runner
+    for b in spec_data.get("boundaries") or []:
+        if b.get("type") == "inlet" and b.get("value") is not None:
+            u_avg = float(b["value"])
+            break
+    return {
+        "geometry.width": float(geom.get("width", 0.0)),
+        "geometry.height": float(geom.get("height", 0.0)),
+        "material.viscosity": float(material.get("viscosity", 1e-3)),
+        "inlet.value": u_avg,
+    }
+
+
+def rom_signature(spec_data: dict) -> dict[str, Any]:
+    """What must match between snapshots and queries besides the parameters."""
+    nx, ny = job_mesh(spec_data)
+    return {"nx": nx, "ny": ny, "solver": job_solver(spec_data)}
+
+
+def _unsupported(spec_data: dict) -> Optional[str]:
+    if spec_data.get("geometry_json"):
+        return "custom geometries are not supported"
+    params = rom_parameters(spec_data)
+    if params["geometry.width"] <= 0 or params["geometry.height"] <= 0:
+        return "geometry needs a positive width and height"
+    return None
+
+
+@dataclass
+class ReducedModel:
+    signature: dict[str, Any]
+    varying: list[str]
+    fixed: dict[str, float]
+    lo: Any  # (d,) parameter box of the snapshots
+    hi: Any
+    x_train: Any  # (m, d) normalized snapshot parameters
+    ref_points: Any  # (N, 2) points scaled to the unit square
+    cell_type: str
+    cells: Any
+    shapes: dict[str, tuple[int, ...]]  # per-node shape of each field
+    means: dict[str, Any]
+    bases: dict[str, Any]  # (n, r) orthonormal columns
+    coeffs: dict[str, Any]  # (m, r) snapshot coefficients
+    truncation: float
+    loo: Any  # (m,) leave-one-out relative errors
+    spacing: float
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "snapshots": int(self.x_train.shape[0]),
+            "parameters": {
+                name: [float(lo), float(hi)] for name, lo, hi in zip(self.varying, self.lo, self.hi)
+            },
+            "fixed": dict(self.fixed),
+            "mesh": {"nx": self.signature["nx"], "ny": self.signature["ny"]},
+            "solver": self.signature["solver"],
+            "ranks": {f: int(self.bases[f].shape[1]) for f in FIELDS},
+            "truncation_error": float(self.truncation),
+            "loo_error_max": float(self.loo.max()),
+        }
+
+    def _normalize(self, params: dict[str, float]):
+        import numpy as np
+
+        raw = np.array([params[name] for name in self.varying])
+        return (raw - self.lo) / (self.hi - self.lo)
+
+    def rejection(self, spec_data: dict) -> Optional[str]:
+        """Why the model cannot answer this spec at all, else None."""
+        reason = _unsupported(spec_data)
+        if reason:
+            return reason
+        if rom_signature(spec_data) != self.signature:
+            return "mesh or solver differs from the sweep"
+        params = rom_parameters(spec_data)
+        for name, value in self.fixed.items():
+            if not math.isclose(params[name], value, rel_tol=1e-9):
+                return f"{name} was fixed at {value:g} in the sweep"
+        return None
+
+    def error_indicator(self, spec_data: dict) -> float:
+        import numpy as np
+
+        if self.rejection(spec_data):
+            return math.inf
+        x = self._normalize(rom_parameters(spec_data))
+        if (x < -1e-9).any() or (x > 1 + 1e-9).any():
+            return math.inf  # extrapolation
+        d = np.linalg.norm(self.x_train - x, axis=1)
+        if d.min() == 0.0:
+            return float(self.truncation)
+        w = 1.0 / d**2
+        loo = float((w * self.loo).sum() / w.sum())
+        return float(self.truncation + loo * min(1.0, d.min() / self.spacing))
+
+    def predict(self, spec_data: dict):
+        """Reconstructed ``meshio.Mesh`` and point data for a spec the model accepts."""
+        import meshio
+        import numpy as np
+
+        params = rom_parameters(spec_data)
+        x = self._normalize(params)[None, :]
+        point_data = {}
+        for f in FIELDS:
+            a = _interpolator(self.x_train, self.coeffs[f])(x)[0]
+            values = self.means[f] + self.bases[f] @ a
+            point_data[f] = values.reshape((-1, *self.shapes[f]))
+        scale = np.array([params["geometry.width"], params["geometry.height"]])
+        xy = self.ref_points * scale
+        points = np.column_stack([xy, np.zeros(len(xy))])
+        m = meshio.Mesh(points=points, cells=[(self.cell_type, self.cells)], point_data=point_data)
+        return m, point_data
+
+    def save(self, path: Path) -> None:
+        import numpy as np
+
+        meta = {
+            "signature": self.signature,
+            "varying": self.varying,
+            "fixed": self.fixed,
+            "cell_type": self.cell_type,
+            "shapes": {f: list(s) for f, s in self.shapes.items()},
+            "truncation": self.truncation,
+            "spacing": self.spacing,
+        }
+        arrays = {"lo": self.lo, "hi": self.hi, "x_train": self.x_train}
+        arrays.update(ref_points=self.ref_points, cells=self.cells, loo=self.loo)
+        for f in FIELDS:
+            arrays[f"mean_{f}"] = self.means[f]
+            arrays[f"basis_{f}"] = self.bases[f]
+            arrays[f"coeffs_{f}"] = self.coeffs[f]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp file, so concurrent trainings of one sweep cannot tear each other's
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "ReducedModel":
+        import numpy as np
+
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            return cls(
+                signature=meta["signature"],
+                varying=meta["varying"],
+                fixed=meta["fixed"],
+                lo=z["lo"],
+                hi=z["hi"],
+                x_train=z["x_train"],
+                ref_points=z["ref_points"],
+                cell_type=meta["cell_type"],
+                cells=z["cells"],
+                shapes={f: tuple(s) for f, s in meta["shapes"].items()},
+                means={f: z[f"mean_{f}"] for f in FIELDS},
+                bases={f: z[f"basis_{f}"] for f in FIELDS},
+                coeffs={f: z[f"coeffs_{f}"] for f in FIELDS},
+                truncation=float(meta["truncation"]),
+                loo=z["loo"],
+                spacing=float(meta["spacing"]),
+            )
+
+
+def _interpolator(x, values):
+    from scipy.interpolate import RBFInterpolator
+
+    return RBFInterpolator(x, values, kernel="thin_plate_spline", degree=1)
+
+
+def build_rom(snapshots: list[tuple[dict, Any]], tolerance: float = 1e-4) -> ReducedModel:
+    """Fit a model to ``(spec_data, meshio.Mesh)`` pairs of one sweep.
+
+    ``tolerance`` bounds the relative L2 error of the POD truncation on the snapshots.
+    Raises ``ValueError`` when the snapshots cannot support a model.
+    """
+    import numpy as np
+
+    if not snapshots:
+        raise ValueError("No finished snapshots with field output")
+    for spec, _m in snapshots:
+        reason = _unsupported(spec)
+        if reason:
+            raise ValueError(f"Snapshot not usable: {reason}")
+    signature = rom_signature(snapshots[0][0])
+    if any(rom_signature(spec) != signature for spec, _m in snapshots):
+        raise ValueError("Snapshots differ in mesh or solver")
+    params = [rom_parameters(spec) for spec, _m in snapshots]
+    raw = np.array([[p[name] for name in PARAMETERS] for p in params])
+    spread = raw.max(axis=0) - raw.min(axis=0)
+    vary = spread > 1e-12 * np.abs(raw).max(axis=0)
+    varying = [name for name, v in zip(PARAMETERS, vary) if v]
+    if not varying:
+        raise ValueError("The sweep does not vary any Stokes parameter")
+    m = len(snapshots)
+    if m < len(varying) + 2:
+        raise ValueError(
+            f"{len(varying)} varying parameters need at least {len(varying) + 2} snapshots"
+        )
+    fixed = {name: float(raw[0, i]) for i, name in enumerate(PARAMETERS) if not vary[i]}
+    lo, hi = raw[:, vary].min(axis=0), raw[:, vary].max(axis=0)
+    x_train = (raw[:, vary] - lo) / (hi - lo)
+
+    first = snapshots[0][1]
+    n_points = len(first.points)
+    if any(len(mesh.points) != n_points for _s, mesh in snapshots):
+        raise ValueError("Snapshots have different meshes")
+    p0 = params[0]
+    ref_points = first.points[:, :2] / np.array([p0["geometry.width"], p0["geometry.height"]])
+    cell_block = first.cells[0]
+
+    shapes: dict[str, tuple[int, ...]] = {}
+    means, bases, coeffs, residuals, norms = {}, {}, {}, {}, {}
+    truncation = 0.0
+    for f in FIELDS:
+        shapes[f] = tuple(np.asarray(first.point_data[f]).shape[1:])
+        S = np.column_stack(
+            [np.asarray(mesh.point_data[f], dtype=float).ravel() for _s, mesh in snapshots]
+        )
+        mean = S.mean(axis=1)
+        C = S - mean[:, None]
+        U, sv, _vt = np.linalg.svd(C, full_matrices=False)
+        energy = float((S**2).sum()) or 1.0
+        # tail[r] is the energy left out when keeping r modes
+        tail = np.concatenate([np.cumsum((sv**2)[::-1])[::-1], [0.0]])
+        r = max(1, int(np.argmax(tail / energy <= tolerance**2)))
+        r = min(r, sv.size)
+        basis = U[:, :r]
+        a = basis.T @ C
+        means[f], bases[f], coeffs[f] = mean, basis, a.T
+        residuals[f] = np.linalg.norm(C - basis @ a, axis=0)
+        norms[f] = np.maximum(np.linalg.norm(S, axis=0), 1e-300)
+        truncation = max(truncation, math.sqrt(tail[r] / energy))
+
+    dist = np.linalg.norm(x_train[:, None, :] - x_train[None, :, :], axis=2)
+    np.fill_diagonal(dist, np.inf)
+    if dist.min() <= 0.0:
+        raise ValueError("Snapshots repeat parameter points")
+    spacing = float(np.median(dist.min(axis=1)))
+    loo = np.zeros(m)
+    try:
+        for i in range(m):
+            keep = np.arange(m) != i
+            for f in FIELDS:
+                pred = _interpolator(x_train[keep], coeffs[f][keep])(x_train[i : i + 1])[0]
+                err = math.hypot(float(np.linalg.norm(pred - coeffs[f][i])), residuals[f][i])
+                loo[i] = max(loo[i], err / norms[f][i])
+    except np.linalg.LinAlgError as e:
+        raise ValueError(f"Snapshot parameters are degenerate for interpolation: {e}") from e
+
+    return ReducedModel(
+        signature=signature,
+        varying=varying,
+        fixed=fixed,
+        lo=lo,
+        hi=hi,
+        x_train=x_train,
+        ref_points=ref_points,
+        cell_type=cell_block.type,
+        cells=cell_block.data,
+        shapes=shapes,
+        means=means,
+        bases=bases,
+        coeffs=coeffs,
+        truncation=truncation,
+        loo=loo,
+        spacing=spacing,
+    )
+
+
+_LOADED: dict[str, tuple[float, ReducedModel]] = {}
+
+
+def load_rom(path: Path) -> Optional[ReducedModel]:
+    """Load a stored model, reusing the parsed copy while the file is unchanged."""
+    from . import telemetry
+
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    cached = _LOADED.get(str(path))
+    if cached is not None and cached[0] == mtime:
+        telemetry.record_cache("rom", True)
+        return cached[1]
+    telemetry.record_cache("rom", False)
+    model = ReducedModel.load(path)
+    _LOADED[str(path)] = (mtime, model)
+    return model
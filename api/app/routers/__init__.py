@@ -1,13 +1,19 @@
+from . import archives as archives
 from . import health as health
 from . import imports as imports
 from . import jobs as jobs  # Ensure attribute exists for RQ import_attribute
+from . import metrics as metrics
 from . import projects as projects
+from . import studies as studies
 from . import sweeps as sweeps
 
 __all__ = [
+    "archives",
     "jobs",
     "health",
     "imports",
+    "metrics",
     "projects",
+    "studies",
     "sweeps",
 ]
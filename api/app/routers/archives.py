@@ -0,0 +1,287 @@
+"""Project archives (``.mfproj.zip``).
+
+Layout, always written in this order so identical projects give identical bytes::
+
+    project.json                     name and data of the project
+    jobs/<job_id>/<artifact name>    artifacts of every job linked to the project
+    manifest.json                    schema version, provenance and sha256 of each entry
+
+Provenance is limited to the application and API versions; host details (interpreter,
+OS) would make the same project archive differently on different servers. Archives are
+produced and consumed as streams; nothing is buffered beyond one chunk.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from ..runner import _artifacts_dir
+from .projects import Project, _insert_project, _link_jobs, _project_job_ids, _projects_dir
+
+router = APIRouter()
+
+ARCHIVE_SCHEMA_VERSION = 1
+_CHUNK = 1 << 20
+# Fixed timestamp and permissions keep archives byte-identical across exports
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable sink that hands zip output back in chunks."""
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:  # type: ignore[override]
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out = bytes(self._buf)
+        self._buf.clear()
+        return out
+
+
+def _zip_info(name: str, size: int = 0) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=_ZIP_EPOCH)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 3
+    info.external_attr = 0o644 << 16
+    info.file_size = size
+    return info
+
+
+def _provenance() -> dict:
+    try:
+        from importlib.metadata import version
+
+        app_version = version("microfluidic-api")
+    except Exception:
+        app_version = "0.0.1"
+    return {"app_version": app_version, "api_version": "v1"}
+
+
+def _job_artifacts(job_ids: list[str]) -> list[tuple[str, Path]]:
+    """(job_id, path) for all artifacts of the given jobs, in archive order."""
+    wanted = set(job_ids)
+    base = _artifacts_dir()
+    found: list[tuple[str, Path]] = []
+    # One directory scan instead of one per job; job ids are uuids
+    for name in os.listdir(base):
+        jid = name[:36]
+        if jid in wanted and name[36:37] == "-" and (base / name).is_file():
+            found.append((jid, base / name))
+    found.sort(key=lambda item: (item[0], item[1].name))
+    return found
+
+
+def _iter_archive(pid: str, name: str, data: dict) -> Iterator[bytes]:
+    sink = _ZipSink()
+    entries: list[dict] = []
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        project = json.dumps(
+            {"id": pid, "name": name, "data": data}, indent=2, sort_keys=True
+        ).encode()
+        zf.writestr(_zip_info("project.json", len(project)), project)
+        entries.append(
+            {
+                "path": "project.json",
+                "size": len(project),
+                "sha256": hashlib.sha256(project).hexdigest(),
+            }
+        )
+        yield sink.drain()
+        for jid, path in _job_artifacts(_project_job_ids(pid)):
+            arcname = f"jobs/{jid}/{path.name}"
+            digest = hashlib.sha256()
+            size = 0
+            info = _zip_info(arcname, path.stat().st_size)
+            with path.open("rb") as src, zf.open(info, "w") as dst:
+                while True:
+                    chunk = src.read(_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    size += len(chunk)
+                    dst.write(chunk)
+                    out = sink.drain()
+                    if out:
+                        yield out
+            entries.append({"path": arcname, "size": size, "sha256": digest.hexdigest()})
+            yield sink.drain()
+        manifest = {
+            "format": "mfproj",
+            "schema_version": ARCHIVE_SCHEMA_VERSION,
+            "project_id": pid,
+            "provenance": _provenance(),
+            "entries": entries,
+        }
+        payload = json.dumps(manifest, indent=2, sort_keys=True).encode()
+        zf.writestr(_zip_info("manifest.json", len(payload)), payload)
+    yield sink.drain()
+
+
+@router.get("/projects/{pid}/export")
+def export_project(pid: str):
+    """Stream the project and its job artifacts as a deterministic ``.mfproj.zip``."""
+    path = _projects_dir() / f"{pid}.json"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Project not found")
+    obj = json.loads(path.read_text())
+    name = str(obj.get("name", pid))
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name) or pid
+    return StreamingResponse(
+        _iter_archive(pid, name, obj.get("data", {})),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{safe}.mfproj.zip"'},
+    )
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_entry(zf: zipfile.ZipFile, arcname: str, target: Path, sha256: str) -> None:
+    """Copy one archive member to ``target`` through a temp file, verifying its hash."""
+    fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as dst, zf.open(arcname) as src:
+            while True:
+                chunk = src.read(_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+        if digest.hexdigest() != sha256:
+            raise HTTPException(status_code=400, detail=f"Checksum mismatch for {arcname}")
+        os.replace(tmp, target)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _split_job_entry(arcname: str) -> Optional[tuple[str, str]]:
+    parts = arcname.split("/")
+    if len(parts) != 3 or parts[0] != "jobs":
+        return None
+    jid, name = parts[1], parts[2]
+    # Artifact names must belong to their job and stay inside the artifacts directory
+    if not name.startswith(f"{jid}-") or name in {".", ".."} or "\\" in name:
+        return None
+    return jid, name
+
+
+def _imported_project_id(raw) -> Optional[str]:
+    """The archived project id if it is a uuid; anything else could escape the store."""
+    try:
+        return str(uuid.UUID(str(raw)))
+    except ValueError:
+        return None
+
+
+@router.post("/projects/import")
+def import_project(file: UploadFile = File(...)):
+    """Import a ``.mfproj.zip``; artifacts already present with the same hash are skipped.
+
+    Existing artifacts are never overwritten: a job with any artifact whose name is taken
+    by different content is imported under a fresh job id (listed in ``remapped``). The
+    project keeps its archived id unless that id is taken or not a uuid, in which case a
+    new one is assigned.
+    """
+    try:
+        zf = zipfile.ZipFile(file.file)
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=400, detail=f"Not a project archive: {e}")
+    with zf:
+        try:
+            manifest = json.loads(zf.read("manifest.json"))
+            project = json.loads(zf.read("project.json"))
+        except KeyError as e:
+            raise HTTPException(status_code=400, detail=f"Archive is missing {e}")
+        if manifest.get("format") != "mfproj":
+            raise HTTPException(status_code=400, detail="Not a project archive")
+        if int(manifest.get("schema_version", 0)) > ARCHIVE_SCHEMA_VERSION:
+            raise HTTPException(status_code=400, detail="Archive schema version is too new")
+
+        base = _artifacts_dir()
+        # (job id, artifact name, member, sha256, already present), then the jobs whose
+        # artifact names are taken by other content
+        plan: list[tuple[str, str, str, str, bool]] = []
+        conflicts: set[str] = set()
+        for entry in manifest.get("entries", []):
+            arcname = str(entry.get("path", ""))
+            split = _split_job_entry(arcname)
+            if split is None:
+                continue
+            jid, name = split
+            target = base / name
+            sha256 = str(entry.get("sha256", ""))
+            present = False
+            if target.exists():
+                present = (
+                    target.stat().st_size == int(entry.get("size", -1))
+                    and _file_sha256(target) == sha256
+                )
+                if not present:
+                    conflicts.add(jid)
+            plan.append((jid, name, arcname, sha256, present))
+
+        remapped = {jid: str(uuid.uuid4()) for jid in sorted(conflicts)}
+        imported = skipped = 0
+        job_ids: set[str] = set()
+        for jid, name, arcname, sha256, present in plan:
+            new_jid = remapped.get(jid, jid)
+            job_ids.add(new_jid)
+            if present and new_jid == jid:
+                skipped += 1
+                continue
+            target = base / f"{new_jid}{name[len(jid):]}"
+            try:
+                _extract_entry(zf, arcname, target, sha256)
+            except KeyError:
+                raise HTTPException(status_code=400, detail=f"Archive is missing {arcname}")
+            imported += 1
+
+    pid = _imported_project_id(project.get("id"))
+    if pid is None or (_projects_dir() / f"{pid}.json").exists():
+        pid = str(uuid.uuid4())
+    name = str(project.get("name", pid))
+    data = project.get("data") or {}
+    now = _insert_project(pid, name, data)
+    _link_jobs(pid, sorted(job_ids))
+    return {
+        "project": Project(id=pid, name=name, data=data, version=1, updated_at=now),
+        "imported": imported,
+        "skipped": skipped,
+        "remapped": remapped,
+    }
@@ -1,17 +1,228 @@
 from __future__ import annotations
 
-from typing import Any
+import io
+import os
+from typing import Any, BinaryIO
 
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from pydantic import BaseModel
 
+from ..geometry import Segment, build_channel_graph, graph_to_shapes
+
 router = APIRouter()
 
+# Parses run in worker threads; bound how many large drawings are parsed at once
+_DXF_LIMITER = None
+
+
+def _dxf_max_bytes() -> int:
+    return int(os.getenv("DXF_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def _dxf_max_entities() -> int:
+    return int(os.getenv("DXF_MAX_ENTITIES", "500000"))
+
+
+def _dxf_limiter():
+    global _DXF_LIMITER
+    if _DXF_LIMITER is None:
+        import anyio
+
+        _DXF_LIMITER = anyio.CapacityLimiter(int(os.getenv("DXF_PARSE_CONCURRENCY", "2")))
+    return _DXF_LIMITER
+
 
 class DXFImportResponse(BaseModel):
     shapes: list[dict[str, Any]]
     warnings: list[str] = []
     layers: list[str] = []
+    # Channel graph built from LINEs and open polylines when normalization is enabled
+    graph: dict[str, Any] | None = None
+
+
+def _upload_size(stream: BinaryIO) -> int:
+    pos = stream.tell()
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(pos)
+    return size
+
+
+def _is_binary_dxf(stream: BinaryIO) -> bool:
+    stream.seek(0)
+    binary = stream.read(22).startswith(b"AutoCAD Binary DXF")
+    stream.seek(0)
+    return binary
+
+
+def _count_dxf_entities(stream: BinaryIO, limit: int) -> int:
+    """Count the entities of an ASCII DXF without parsing it, stopping once past ``limit``.
+
+    Group codes and values alternate line by line; every ``0`` record inside the ENTITIES
+    and BLOCKS sections is an entity ezdxf would build. Binary drawings are not scanned
+    (0 is returned); they are bounded by ``DXF_MAX_BYTES`` alone.
+    """
+    if _is_binary_dxf(stream):
+        return 0
+    lines = iter(stream)
+    count = 0
+    counting = after_section = False
+    for code in lines:
+        code, value = code.strip(), next(lines, b"").strip()
+        if code == b"0":
+            if value == b"ENDSEC":
+                counting = False
+            elif counting:
+                count += 1
+                if count > limit:
+                    break
+        elif code == b"2" and after_section:
+            counting = value in (b"ENTITIES", b"BLOCKS")
+        after_section = code == b"0" and value == b"SECTION"
+    stream.seek(0)
+    return count
+
+
+def _read_dxf(stream: BinaryIO):
+    """Load a DXF document directly from a binary upload stream."""
+    import ezdxf  # type: ignore
+    from ezdxf import recover  # type: ignore
+    from ezdxf.filemanagement import dxf_stream_info  # type: ignore
+
+    if _is_binary_dxf(stream):
+        doc, _ = recover.read(stream)
+        return doc
+    probe = io.TextIOWrapper(stream, encoding="utf-8", errors="ignore")
+    try:
+        encoding = dxf_stream_info(probe).encoding
+    finally:
+        probe.detach()
+    stream.seek(0)
+    text = io.TextIOWrapper(stream, encoding=encoding, errors="surrogateescape")
+    try:
+        return ezdxf.read(text)
+    finally:
+        text.detach()
+
+
+def _parse_dxf(
+    stream: BinaryIO,
+    default_width: float,
+    scale: float,
+    lw_map: dict[str, float],
+    lt_map: dict[str, str],
+    warnings: list[str],
+    normalize: bool = True,
+    snap_tolerance: float | None = None,
+) -> DXFImportResponse:
+    """Read the drawing and convert its entities in one pass over the modelspace.
+
+    With ``normalize`` the centreline entities (LINEs, open LWPOLYLINEs) are collected as
+    segments and reduced to a channel graph whose edges become the returned channel shapes;
+    closed polylines are kept as region bounding boxes either way. ASCII drawings with
+    more than ``DXF_MAX_ENTITIES`` entities are refused before ezdxf parses them.
+    """
+    max_entities = _dxf_max_entities()
+    if _count_dxf_entities(stream, max_entities) > max_entities:
+        raise HTTPException(status_code=413, detail=f"DXF has more than {max_entities} entities")
+    try:
+        doc = _read_dxf(stream)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to read DXF: {e}")
+
+    msp = doc.modelspace()
+    shapes: list[dict[str, Any]] = []
+    layers_set: set[str] = set()
+    skipped: dict[str, int] = {}
+    segments: list[Segment] = []
+
+    for count, ent in enumerate(msp):
+        if count >= max_entities:
+            raise HTTPException(
+                status_code=413, detail=f"DXF has more than {max_entities} entities"
+            )
+        kind = ent.dxftype()
+        if kind == "LINE":
+            # Lines → channels with default width
+            try:
+                layer = str(ent.dxf.layer)
+                layers_set.add(layer)
+                x1, y1, x2, y2 = (
+                    float(ent.dxf.start.x),
+                    float(ent.dxf.start.y),
+                    float(ent.dxf.end.x),
+                    float(ent.dxf.end.y),
+                )
+                w = float(lw_map.get(layer, default_width))
+                if normalize:
+                    segments.append(
+                        Segment(x1 * scale, y1 * scale, x2 * scale, y2 * scale, w, layer)
+                    )
+                    continue
+                x = min(x1, x2) * scale
+                y = min(y1, y2) * scale
+                length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5 * scale
+                stype = lt_map.get(layer, "rect")
+                shapes.append(
+                    {
+                        "id": None,
+                        "type": stype,
+                        "x": x,
+                        "y": y,
+                        "width": max(length, w),
+                        "height": w,
+                        "layer": layer,
+                    }
+                )
+            except Exception as ex:
+                warnings.append(f"Skipping LINE: {ex}")
+        elif kind == "LWPOLYLINE":
+            # LWPOLYLINE as bounding boxes
+            try:
+                layer = str(ent.dxf.layer)
+                layers_set.add(layer)
+                points = [(float(p[0]) * scale, float(p[1]) * scale) for p in ent.get_points()]
+                if normalize and not ent.closed and len(points) >= 2:
+                    w = float(ent.dxf.const_width or 0.0) * scale
+                    w = w or float(lw_map.get(layer, default_width))
+                    for (ax, ay), (bx, by) in zip(points, points[1:]):
+                        segments.append(Segment(ax, ay, bx, by, w, layer))
+                    continue
+                xs = [p[0] for p in points]
+                ys = [p[1] for p in points]
+                if xs and ys:
+                    x, y, w, h = min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+                    stype = lt_map.get(layer, "rect")
+                    shapes.append(
+                        {
+                            "id": None,
+                            "type": stype,
+                            "x": x,
+                            "y": y,
+                            "width": w or default_width,
+                            "height": h or default_width,
+                            "layer": layer,
+                        }
+                    )
+            except Exception as ex:
+                warnings.append(f"Skipping LWPOLYLINE: {ex}")
+        else:
+            # TODO: Handle CIRCLE/ARC if needed
+            skipped[kind] = skipped.get(kind, 0) + 1
+
+    for kind in sorted(skipped):
+        warnings.append(f"Ignored {skipped[kind]} unsupported {kind} entities")
+
+    graph = None
+    if normalize:
+        tol = snap_tolerance * scale if snap_tolerance else None
+        channel_graph = build_channel_graph(segments, tol=tol)
+        shapes = graph_to_shapes(channel_graph, lt_map) + shapes
+        graph = channel_graph.as_dict()
+
+    return DXFImportResponse(
+        shapes=shapes, warnings=warnings, layers=sorted(layers_set), graph=graph
+    )
 
 
 @router.post("/import/dxf", response_model=DXFImportResponse)
@@ -21,35 +232,24 @@ async def import_dxf(
     scale: float = Form(1.0),
     layer_widths: str | None = Form(None),  # JSON mapping: {"LAYER_NAME": width}
     layer_types: str | None = Form(None),  # JSON mapping: {"LAYER_NAME": "inlet"|"outlet"|"rect"}
+    normalize: bool = Form(True),
+    snap_tolerance: float | None = Form(None),  # drawing units; default 1e-6 of the extent
 ):
     try:
-        import ezdxf  # type: ignore
+        import ezdxf  # type: ignore  # noqa: F401
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DXF support unavailable: {e}")
 
     if not file.filename or not file.filename.lower().endswith(".dxf"):
         raise HTTPException(status_code=400, detail="Please upload a .dxf file")
 
-    data = await file.read()
-    try:
-        import os as _os
-        import tempfile
-
-        with tempfile.NamedTemporaryFile(suffix=".dxf", delete=False) as tmp:
-            tmp.write(data)
-            tmp_path = tmp.name
-        doc = ezdxf.readfile(tmp_path)
-        try:
-            _os.unlink(tmp_path)
-        except Exception:
-            pass
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to read DXF: {e}")
+    size = file.size if file.size is not None else _upload_size(file.file)
+    if size > _dxf_max_bytes():
+        raise HTTPException(
+            status_code=413, detail=f"DXF upload exceeds {_dxf_max_bytes()} bytes"
+        )
 
-    msp = doc.modelspace()
-    shapes: list[dict[str, Any]] = []
     warnings: list[str] = []
-    layers_set: set[str] = set()
     lw_map: dict[str, float] = {}
     lt_map: dict[str, str] = {}
     import json as _json
@@ -65,61 +265,18 @@ async def import_dxf(
     except Exception as ex:
         warnings.append(f"Invalid layer_types: {ex}")
 
-    # Lines → channels with default width
-    for ent in msp.query("LINE"):
-        try:
-            layer = str(ent.dxf.layer)
-            layers_set.add(layer)
-            x1, y1, x2, y2 = (
-                float(ent.dxf.start.x),
-                float(ent.dxf.start.y),
-                float(ent.dxf.end.x),
-                float(ent.dxf.end.y),
-            )
-            w = float(lw_map.get(layer, default_width))
-            x = min(x1, x2) * scale
-            y = min(y1, y2) * scale
-            length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5 * scale
-            stype = lt_map.get(layer, "rect")
-            shapes.append(
-                {
-                    "id": None,
-                    "type": stype,
-                    "x": x,
-                    "y": y,
-                    "width": max(length, w),
-                    "height": w,
-                    "layer": layer,
-                }
-            )
-        except Exception as ex:
-            warnings.append(f"Skipping LINE: {ex}")
-
-    # LWPOLYLINE as bounding boxes
-    for ent in msp.query("LWPOLYLINE"):
-        try:
-            layer = str(ent.dxf.layer)
-            layers_set.add(layer)
-            points = [(float(p[0]) * scale, float(p[1]) * scale) for p in ent.get_points()]
-            xs = [p[0] for p in points]
-            ys = [p[1] for p in points]
-            if xs and ys:
-                x, y, w, h = min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
-                stype = lt_map.get(layer, "rect")
-                shapes.append(
-                    {
-                        "id": None,
-                        "type": stype,
-                        "x": x,
-                        "y": y,
-                        "width": w or default_width,
-                        "height": h or default_width,
-                        "layer": layer,
-                    }
-                )
-        except Exception as ex:
-            warnings.append(f"Skipping LWPOLYLINE: {ex}")
-
-    # TODO: Handle CIRCLE/ARC if needed
+    # Parse off the event loop, straight from the spooled upload (no extra copy on disk)
+    import anyio
 
-    return DXFImportResponse(shapes=shapes, warnings=warnings, layers=sorted(layers_set))
+    return await anyio.to_thread.run_sync(
+        _parse_dxf,
+        file.file,
+        default_width,
+        scale,
+        lw_map,
+        lt_map,
+        warnings,
+        normalize,
+        snap_tolerance,
+        limiter=_dxf_limiter(),
+    )
@@ -1,379 +1,292 @@
+import json
+import logging
+import math
 import os
-import time
+import random
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from redis import Redis
-from rq import Queue
-
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+
+from .. import limits
+from ..admission import api_rejection
+from ..runner import (
+    CANCEL_KEY,
+    CANCEL_TTL,
+    _answer_from_rom,
+    _artifacts_dir,
+    _run_job,
+    _write_error_artifact,
+)
 from ..schemas import JobSpec, JobStatus
+from .projects import _link_jobs
+
+if TYPE_CHECKING:
+    from redis import Redis
+    from rq import Queue, Retry
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # In-memory results for inline (no-queue) mode
 _MEM_RESULTS: dict[str, dict] = {}
 _MEM_ERRORS: dict[str, str] = {}
+# Connection used instead of REDIS_URL when set; the load-test harness injects an
+# in-process Redis here
+_REDIS_OVERRIDE: Optional["Redis"] = None
+# Client shared by all requests once Redis answered; its pool reuses connections
+_REDIS_CONN: Optional["Redis"] = None
+# Redis set of a project's jobs that may not have finished yet
+INFLIGHT_KEY = "microfluidic:inflight:{}"
+INFLIGHT_TTL = 24 * 3600
+# Return value of a job answered from a reduced-order model, which never reaches the queue
+ROM_ANSWER_KEY = "microfluidic:rom-answer:{}"
+ROM_ANSWER_TTL = 24 * 3600
+
+
+def _iter_result_body(path: Path, artifacts: list[str], chunk_size: int = 1 << 16):
+    """Stream ``{"ok", "artifacts", "result"}`` with the result copied from the store."""
+    head = {"ok": True, "artifacts": artifacts}
+    yield json.dumps(head)[:-1].encode() + b', "result": '
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    yield b"}"
+
+
+def _result_response(ret: dict, fields: Optional[str]):
+    """Serve a job result from the artifact store, optionally restricted to some keys."""
+    name = ret.get("result_artifact")
+    if not name:
+        # Jobs enqueued before results moved to the artifact store carry the full payload
+        return ret
+    path = _artifacts_dir() / str(name)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Result missing")
+    artifacts = list(ret.get("artifacts") or [])
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        full = json.loads(path.read_text())
+        selected = {k: full[k] for k in wanted if k in full}
+        return {"ok": True, "artifacts": artifacts, "result": selected}
+    return StreamingResponse(_iter_result_body(path, artifacts), media_type="application/json")
 
 
-def _write_error_artifact(job_id: str, message: str) -> None:
-    try:
-        base = _artifacts_dir()
-        (base / f"{job_id}-error.txt").write_text(message)
-    except Exception:
-        pass
+def _get_queue() -> Optional["Queue"]:
+    global _REDIS_CONN
+    if os.getenv("INLINE_JOB_EXEC", "").strip().lower() in {"1", "true", "yes"}:
+        return None
+    # Imported on first use: the client libraries are a good part of the API start-up time
+    from redis import Redis
+    from rq import Queue
+
+    if _REDIS_OVERRIDE is not None:
+        return Queue("jobs", connection=_REDIS_OVERRIDE)
+    if _REDIS_CONN is None:
+        url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        try:
+            conn = Redis.from_url(url, health_check_interval=30)
+            # ping to check availability; later requests reuse the client without one
+            conn.ping()
+            _REDIS_CONN = conn
+        except Exception:
+            return None
+    return Queue("jobs", connection=_REDIS_CONN)
+
+
+def _client_key(request: Request, client_id: Optional[str]) -> str:
+    """Who a rate limit applies to: ``X-Client-Id`` if sent, else the peer address."""
+    if client_id and client_id.strip():
+        return f"id:{client_id.strip()}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _throttle(limit: str, client: str, cost: float = 1.0) -> None:
+    """Raise 429 with ``Retry-After`` when ``client`` is over its ``limit`` rate.
+
+    Requests costing more than the burst could never pass and get 413. Call this after
+    any other check that may reject the request, so rejected requests cost no tokens.
+    """
+    wait = limits.take(limit, client, cost)
+    if math.isinf(wait):
+        _rate, burst = limits.limit_settings(limit)
+        raise HTTPException(
+            status_code=413, detail=f"{cost:g} jobs exceed the {limit} burst limit of {burst:g}"
+        )
+    if wait > 0:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded ({limit}); retry in {wait:.1f} s",
+            headers={"Retry-After": limits.retry_after(wait)},
+        )
+
+
+def _project_inflight(q: "Queue", project_id: str) -> int:
+    """Unfinished jobs of a project; finished ones are dropped from its set on the way."""
+    from rq.job import Job
+
+    key = INFLIGHT_KEY.format(project_id)
+    ids = [m.decode() for m in q.connection.smembers(key)]
+    if not ids:
+        return 0
+    done = [
+        jid
+        for jid, job in zip(ids, Job.fetch_many(ids, connection=q.connection))
+        if job is None
+        or job.get_status(refresh=False) in {"finished", "failed", "canceled", "stopped"}
+    ]
+    if done:
+        q.connection.srem(key, *done)
+    return len(ids) - len(done)
+
+
+def _check_backpressure(q: "Queue", project_id: Optional[str], new_jobs: int) -> None:
+    """Raise 429 when ``new_jobs`` more would overfill the queue or the project's share.
+
+    Limits are ``QUEUE_MAX_DEPTH`` jobs waiting in the queue and ``PROJECT_MAX_INFLIGHT``
+    unfinished jobs per project (0 disables either); the ``Retry-After`` hint is
+    ``BACKPRESSURE_RETRY_AFTER`` seconds. Batches larger than a limit can never fit and
+    get 413 instead.
+    """
+    checks = [("QUEUE_MAX_DEPTH", "1000", "queue", lambda: q.count)]
+    if project_id:
+        checks.append(
+            ("PROJECT_MAX_INFLIGHT", "200", "project", lambda: _project_inflight(q, project_id))
+        )
+    for var, default, what, current in checks:
+        limit = int(os.getenv(var, default))
+        if limit <= 0:
+            continue
+        if new_jobs > limit:
+            raise HTTPException(
+                status_code=413, detail=f"{new_jobs} jobs exceed the {what} limit of {limit}"
+            )
+        count = current()
+        if count + new_jobs > limit:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Too many jobs in the {what} ({count} of {limit}); retry later",
+                headers={"Retry-After": os.getenv("BACKPRESSURE_RETRY_AFTER", "30")},
+            )
 
 
-def _artifacts_dir() -> Path:
-    d = Path(os.getenv("ARTIFACTS_DIR", "data/artifacts"))
-    d.mkdir(parents=True, exist_ok=True)
-    return d
+def _track_inflight(q: "Queue", project_id: Optional[str], job_ids: list[str]) -> None:
+    if not project_id or not job_ids:
+        return
+    key = INFLIGHT_KEY.format(project_id)
+    pipe = q.connection.pipeline()
+    pipe.sadd(key, *job_ids)
+    pipe.expire(key, INFLIGHT_TTL)
+    pipe.execute()
 
 
-def _write_artifacts(job_id: str, result: dict) -> list[str]:
-    base = _artifacts_dir()
-    files: list[str] = []
-    # JSON
-    json_path = base / f"{job_id}-result.json"
-    import json
-
-    json_path.write_text(json.dumps(result, indent=2))
-    files.append(json_path.name)
-    # CSV summary
-    csv_path = base / f"{job_id}-summary.csv"
-    csv = [
-        "key,value",
-        f"name,{result.get('name', '')}",
-        f"mesh_cells,{result.get('mesh_cells', 0)}",
-        f"fields,{';'.join(result.get('fields', []))}",
-    ]
-    csv_path.write_text("\n".join(csv) + "\n")
-    files.append(csv_path.name)
-    # Minimal VTK legacy placeholder
-    vtk_path = base / f"{job_id}-fields.vtk"
-    vtk_content = """# vtk DataFile Version 3.0
-Microfluidic Result
-ASCII
-DATASET POLYDATA
-POINTS 0 float
-POLYGONS 0 0
-"""
-    vtk_path.write_text(vtk_content)
-    files.append(vtk_path.name)
-    return files
-
-
-def _flux_from_analytic(sol, side: str) -> float:
-    # For rectangle, flux at inlet/outlet: integrate u_x over y
-    from numpy import trapz
-
-    u_mid = sol.u[:, sol.u.shape[1] // 2]
-    return float(trapz(u_mid, sol.y))
-
-
-def _flux_from_meshio(
-    m,
-    pdata,
-    side: str,
-    length: float,
-    ny_hint: int = 20,
-) -> float:
-    import numpy as _np
-
-    pts = m.points
-    x = pts[:, 0]
-    y = pts[:, 1]
-    u = pdata.get("u")
-    if u is None:
-        return 0.0
-    ux = u[:, 0]
-    target_x = 0.0 if side == "inlet" else length
-    k = max(10, ny_hint)
-    idx = _np.argsort(_np.abs(x - target_x))[:k]
-    y_sel = y[idx]
-    ux_sel = ux[idx]
-    order = _np.argsort(y_sel)
-    y_sorted = y_sel[order]
-    ux_sorted = ux_sel[order]
-    from numpy import trapz
-
-    return float(trapz(ux_sorted, y_sorted))
-
-
-def _midline_l2_error_from_mesh(
-    m,
-    pdata,
-    h: float,
-    length: float,
-    u_avg: float,
-    ny_hint: int = 20,
-) -> float:
-    import numpy as _np
-
-    pts = m.points
-    x = pts[:, 0]
-    y = pts[:, 1]
-    u = pdata.get("u")
-    if u is None:
-        return float("nan")
-    ux = u[:, 0]
-    # Select nodes nearest to midline x=l/2
-    k = max(10, ny_hint)
-    idx = _np.argsort(_np.abs(x - length / 2.0))[:k]
-    y_mid = y[idx]
-    u_mid = ux[idx]
-    order = _np.argsort(y_mid)
-    y_mid = y_mid[order]
-    u_mid = u_mid[order]
-    # Reference profile
-    u_ref = 6.0 * u_avg * (y_mid / h) * (1.0 - y_mid / h)
-    from numpy import trapz
-
-    denom = trapz(u_ref**2, y_mid)
-    if denom == 0:
-        return 0.0
-    err = _np.sqrt(trapz((u_mid - u_ref) ** 2, y_mid) / denom)
-    return float(err)
-
-
-def _get_queue() -> Optional[Queue]:
-    if os.getenv("INLINE_JOB_EXEC", "").strip().lower() in {"1", "true", "yes"}:
-        return None
-    url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-    try:
-        conn = Redis.from_url(url)
-        # ping to check availability
-        conn.ping()
-        return Queue("jobs", connection=conn)
-    except Exception:
+def _retry_policy() -> Optional["Retry"]:
+    """Retries of a new job after transient failures; None when ``JOB_RETRIES`` is 0.
+
+    Up to ``JOB_RETRIES`` (3) reruns, the k-th after ``JOB_RETRY_BASE_SECONDS`` (30) times
+    2**k capped at ``JOB_RETRY_MAX_SECONDS`` (600), each spread by a random fraction up to
+    ``JOB_RETRY_JITTER`` (0.25) so that the jobs of a sweep lost with one node do not all
+    come back at once. Transient runs resume from their last checkpoint.
+    """
+    retries = int(os.getenv("JOB_RETRIES", "3"))
+    if retries <= 0:
         return None
+    from rq import Retry
+
+    base = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+    cap = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+    jitter = min(max(float(os.getenv("JOB_RETRY_JITTER", "0.25")), 0.0), 1.0)
+    intervals = [
+        max(round(min(base * 2**k, cap) * (1.0 + jitter * random.uniform(-1.0, 1.0))), 0)
+        for k in range(retries)
+    ]
+    return Retry(max=retries, interval=intervals)
 
 
-def _dummy_solver(spec_data: dict, job_id: str) -> dict:
-    # Store errors to RQ job.meta and artifact so they can be surfaced via API
-    def _record_error(msg: str) -> None:
-        try:
-            from rq import get_current_job  # type: ignore
+def _cancel_jobs(q: "Queue", job_ids: list[str]) -> dict[str, str]:
+    """Cancel jobs in bulk: one fetch and one pipeline however many jobs there are.
 
-            j = get_current_job()
-            if j is not None:
-                j.meta = j.meta or {}
-                j.meta["error_message"] = msg
-                j.save_meta()
-        except Exception:
-            pass
-        try:
-            _write_error_artifact(job_id, msg)
-        except Exception:
-            pass
-
-    # If geometry_json describes a single rectangular channel, use analytical Poiseuille solution
-    try:
-        gjson = spec_data.get("geometry_json")
-        # If geometry_json is missing, synthesize a simple rectangle from scalar geometry (meters)
-        if not gjson:
-            geom = spec_data.get("geometry") or {}
-            try:
-                gw = float(geom.get("width", 0.0))
-                gh = float(geom.get("height", 0.0))
-                if gw > 0.0 and gh > 0.0:
-                    gjson = {
-                        "unit": "m",
-                        "shapes": [
-                            {
-                                "id": "rect1",
-                                "type": "rect",
-                                "x": 0.0,
-                                "y": 0.0,
-                                "width": gw,
-                                "height": gh,
-                            }
-                        ],
-                    }
-            except Exception:
-                gjson = None
-        material = spec_data.get("material", {})
-        mu = float(material.get("viscosity", 1e-3))
-        if gjson and isinstance(gjson, dict):
-            # Determine geometry unit scale (default meters)
-            unit = str(gjson.get("unit", "m")).lower()
-            scale = 1.0
-            try:
-                if "unit_scale" in gjson:
-                    scale = float(gjson.get("unit_scale") or 1.0)
-                else:
-                    scale = {"m": 1.0, "mm": 1e-3, "um": 1e-6, "µm": 1e-6}.get(unit, 1.0)
-            except Exception:
-                scale = 1.0
-            shapes = gjson.get("shapes", [])
-            if isinstance(shapes, list) and len(shapes) >= 1:
-                rects = [s for s in shapes if s.get("type") == "rect"]
-                if len(rects) >= 1:
-                    r = rects[0]
-                    # Scale geometry to meters
-                    h = float(r.get("height", 1.0)) * scale
-                    length = float(r.get("width", 1.0)) * scale
-                    # inlet mean velocity heuristic
-                    u_avg = 1e-3
-                    for b in spec_data.get("boundaries", []):
-                        if b.get("type") == "inlet" and b.get("value") is not None:
-                            u_avg = float(b.get("value"))
-                            break
-                    # Try FEM solver first; on failure, fallback to analytic
-                    try:
-                        from solver.stokes_fem import solve_rect_stokes_fem
-
-                        nx_used, ny_used = 64, 32
-                        res = solve_rect_stokes_fem(
-                            h=h,
-                            l=length,
-                            mu=mu,
-                            u_avg=u_avg,
-                            nx=nx_used,
-                            ny=ny_used,
-                            with_metrics=True,
-                        )
-                        # Support both (m, pdata) and (m, pdata, metrics)
-                        if isinstance(res, tuple) and len(res) == 3:
-                            m, pdata, metrics = res
-                        else:
-                            m, pdata = res  # type: ignore
-                            metrics = {}
-                        # export VTU
-                        base = _artifacts_dir()
-                        vtu_path = base / f"{job_id}-stokes.vtu"
-                        import meshio as _meshio
-
-                        _meshio.write(vtu_path.as_posix(), m)
-                        # estimate L2 error and mass balance
-                        try:
-                            err = _midline_l2_error_from_mesh(
-                                m, pdata, h=h, length=length, u_avg=u_avg, ny_hint=ny_used
-                            )
-                        except Exception:
-                            err = None
-                        # Prefer FEM-integrated fluxes if provided; else sample near boundaries
-                        try:
-                            q_in = (
-                                float(metrics.get("flux_in"))
-                                if metrics and metrics.get("flux_in") is not None
-                                else _flux_from_meshio(m, pdata, "inlet", length, ny_hint=ny_used)
-                            )
-                            q_out = (
-                                float(metrics.get("flux_out"))
-                                if metrics and metrics.get("flux_out") is not None
-                                else _flux_from_meshio(m, pdata, "outlet", length, ny_hint=ny_used)
-                            )
-                            mb = abs(q_in - q_out) / max(abs(q_in), 1e-12)
-                        except Exception:
-                            q_in = q_out = mb = float("nan")
-                        result = {
-                            "name": spec_data.get("name", "job"),
-                            "mesh_cells": int(len(m.points)),
-                            "fields": ["u", "v", "p"],
-                            "l2_error": err,
-                            "flux_in": q_in,
-                            "flux_out": q_out,
-                            "mass_balance_rel_error": mb,
-                            "geometry": {"h_m": h, "l_m": length, "unit": unit, "scale": scale},
-                        }
-                        artifacts = _write_artifacts(job_id, result)
-                        artifacts.append(vtu_path.name)
-                        # save geometry JSON as artifact if present
-                        try:
-                            import json as _json
-
-                            (base / f"{job_id}-geometry.json").write_text(
-                                _json.dumps(gjson, indent=2)
-                            )
-                            artifacts.append(f"{job_id}-geometry.json")
-                        except Exception:
-                            pass
-                        return {"ok": True, "result": result, "artifacts": artifacts}
-                    except Exception as e:
-                        _record_error(str(e))
-                        from solver.stokes_rect import (
-                            poiseuille_l2_error,
-                            solve_stokes_poiseuille_rect,
-                        )
-
-                        sol = solve_stokes_poiseuille_rect(
-                            h=h, l=length, mu=mu, u_avg=u_avg, nx=64, ny=32
-                        )
-                        err = poiseuille_l2_error(sol)
-                        base = _artifacts_dir()
-                        csv_path = base / f"{job_id}-u_mid.csv"
-                        mid = sol.u[:, sol.u.shape[1] // 2]
-                        with open(csv_path, "w") as f:
-                            f.write("y,u\n")
-                            for yi, ui in zip(sol.y, mid):
-                                f.write(f"{yi},{ui}\n")
-                        import json as _json
-
-                        q_in = _flux_from_analytic(sol, "inlet")
-                        q_out = _flux_from_analytic(sol, "outlet")
-                        mb = abs(q_in - q_out) / max(abs(q_in), 1e-12)
-                        summary = {
-                            "h": sol.h,
-                            "l": sol.l,
-                            "u_avg": sol.u_avg,
-                            "l2_error": err,
-                            "flux_in": q_in,
-                            "flux_out": q_out,
-                            "mass_balance_rel_error": mb,
-                        }
-                        (base / f"{job_id}-summary.json").write_text(_json.dumps(summary, indent=2))
-                        result = {
-                            "name": spec_data.get("name", "job"),
-                            "mesh_cells": int(sol.u.size),
-                            "fields": ["u", "v", "p"],
-                            "l2_error": err,
-                            "flux_in": q_in,
-                            "flux_out": q_out,
-                            "mass_balance_rel_error": mb,
-                            "geometry": {"h_m": h, "l_m": length, "unit": unit, "scale": scale},
-                        }
-                        artifacts = _write_artifacts(job_id, result)
-                        # save geometry
-                        try:
-                            (base / f"{job_id}-geometry.json").write_text(
-                                _json.dumps(gjson, indent=2)
-                            )
-                            artifacts.append(f"{job_id}-geometry.json")
-                        except Exception:
-                            pass
-                        artifacts.extend([csv_path.name, f"{job_id}-summary.json"])
-                        return {"ok": True, "result": result, "artifacts": artifacts}
-    except Exception as e:
-        _record_error(str(e))
-        # Re-raise so the job is marked failed in queue mode; inline mode caller will catch
-        raise
-    # Fallback dummy work
-    steps = 5
-    name = spec_data.get("name", "job")
-    result = {"name": name, "mesh_cells": 10000, "fields": ["u", "v", "p"]}
-    for _ in range(steps):
-        time.sleep(0.2)
-    artifacts = _write_artifacts(job_id, result)
-    return {"ok": True, "result": result, "artifacts": artifacts}
-
-
-def runjob(spec_data: dict, job_id: str) -> dict:
-    """Public wrapper for RQ import; delegates to _dummy_solver (no underscores for RQ)."""
-    return _dummy_solver(spec_data, job_id)
+    Waiting jobs (queued, deferred by admission or scheduled) are removed from the queue
+    and become ``canceled``; running jobs are flagged, stop at their next solver checkpoint
+    and then report ``canceled`` too. Other jobs are left alone. Returns the outcome per
+    job id: ``canceled``, ``canceling``, or ``unknown``/the status of jobs left alone.
+    """
+    from rq.job import Job
+
+    outcome: dict[str, str] = {}
+    pipe = q.connection.pipeline()
+    for job_id, job in zip(job_ids, Job.fetch_many(job_ids, connection=q.connection)):
+        status = (job.get_status(refresh=False) or "unknown") if job is not None else "unknown"
+        if status in {"queued", "deferred", "scheduled"}:
+            job.cancel(pipeline=pipe)
+            outcome[job_id] = "canceled"
+        elif status == "started":
+            pipe.set(CANCEL_KEY.format(job_id), 1, ex=CANCEL_TTL)
+            outcome[job_id] = "canceling"
+        else:
+            outcome[job_id] = "already canceled" if status == "canceled" else status
+    pipe.execute()
+    return outcome
+
+
+def _was_canceled(q: "Queue", job_id: str) -> bool:
+    return bool(q.connection.exists(CANCEL_KEY.format(job_id)))
+
+
+def _rom_answer(q: "Queue", job_id: str) -> Optional[dict]:
+    """Return value of a job answered from a reduced-order model, if it was one."""
+    raw = q.connection.get(ROM_ANSWER_KEY.format(job_id))
+    return json.loads(raw) if raw else None
 
 
 @router.post("/jobs", response_model=JobStatus)
-def create_job(spec: JobSpec):
+def create_job(
+    spec: JobSpec,
+    request: Request,
+    x_profile_job: Optional[str] = Header(None),
+    x_client_id: Optional[str] = Header(None),
+):
+    if x_profile_job and x_profile_job.strip().lower() in {"1", "true", "yes"}:
+        spec.profile = True
+    if spec.transient and spec.material.rheology != "newtonian":
+        raise HTTPException(status_code=422, detail="Transient runs support Newtonian fluids only")
+    rejection = api_rejection(spec.model_dump())
+    if rejection:
+        raise HTTPException(status_code=413, detail=rejection)
     q = _get_queue()
+    if q is not None:
+        _check_backpressure(q, spec.project_id, 1)
+    # Scripts sharing a project share its submission budget
+    client = f"project:{spec.project_id}" if spec.project_id else None
+    _throttle("submit", client or _client_key(request, x_client_id))
     job_id = str(uuid4())
+    if spec.project_id:
+        _link_jobs(spec.project_id, [job_id])
+    if spec.rom:
+        # Answered by the API process itself, without a worker round trip
+        try:
+            res = _answer_from_rom(spec.model_dump(), job_id)
+        except Exception:
+            logger.exception("Reduced-order answer for job %s failed; solving in full", job_id)
+            res = None
+        if res is not None:
+            # The result itself is in the artifact store; Redis lets every API process
+            # find the job
+            if q is None:
+                _MEM_RESULTS[job_id] = res
+            else:
+                q.connection.set(ROM_ANSWER_KEY.format(job_id), json.dumps(res), ex=ROM_ANSWER_TTL)
+            return JobStatus(id=job_id, status="finished", progress=1.0)
     if q is None:
         # Fallback: run inline (dev only)
         try:
-            res = _dummy_solver(spec.model_dump(), job_id)  # blocking
-            _MEM_RESULTS[job_id] = res.get("result", {})
+            res = _run_job(spec.model_dump(), job_id)  # blocking
+            _MEM_RESULTS[job_id] = res
             return JobStatus(id=job_id, status="finished", progress=1.0)
         except Exception as e:
             msg = str(e)
@@ -387,27 +300,36 @@ def create_job(spec: JobSpec):
         job_id,
         job_id=job_id,
         job_timeout=600,
+        retry=_retry_policy(),
     )
+    _track_inflight(q, spec.project_id, [job.id])
     return JobStatus(id=job.id, status=job.get_status() or "queued", progress=0.0)
 
 
 @router.get("/jobs/{job_id}", response_model=JobStatus)
-def get_job(job_id: str):
+def get_job(job_id: str, request: Request, x_client_id: Optional[str] = Header(None)):
+    _throttle("status", _client_key(request, x_client_id))
+    if job_id in _MEM_RESULTS:
+        return JobStatus(id=job_id, status="finished", progress=1.0)
     q = _get_queue()
     if q is None:
-        # Inline mode: finished if result exists; failed if error recorded
-        if job_id in _MEM_RESULTS:
-            return JobStatus(id=job_id, status="finished", progress=1.0)
+        # Inline mode: failed if error recorded
         if job_id in _MEM_ERRORS:
             return JobStatus(id=job_id, status="failed", progress=1.0, error=_MEM_ERRORS[job_id])
         raise HTTPException(status_code=404, detail="Job not found")
+    if _rom_answer(q, job_id) is not None:
+        return JobStatus(id=job_id, status="finished", progress=1.0)
     job = q.fetch_job(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     status = job.get_status() or "unknown"
-    progress = 1.0 if status in {"finished", "failed"} else 0.0
+    if status == "failed" and _was_canceled(q, job_id):
+        # Stopped at a solver checkpoint after POST /jobs/{id}/cancel
+        status = "canceled"
+    progress = 1.0 if status in {"finished", "failed", "canceled"} else 0.0
     error = None
-    if status == "failed":
+    # Scheduled jobs report the failure they are being retried after, if any
+    if status in {"failed", "canceled", "scheduled"}:
         try:
             # Prefer explicit meta message
             error = job.meta.get("error_message") if hasattr(job, "meta") else None
@@ -431,26 +353,66 @@ def get_job(job_id: str):
                     error = p.read_text().strip().splitlines()[-1]
             except Exception:
                 pass
-    return JobStatus(id=job_id, status=status, progress=progress, error=error)
+    retries_left = job.retries_left if status in {"queued", "started", "scheduled"} else None
+    return JobStatus(
+        id=job_id, status=status, progress=progress, error=error, retries_left=retries_left
+    )
+
+
+@router.post("/jobs/{job_id}/resume", response_model=JobStatus)
+def resume_job(job_id: str):
+    """Requeue a failed job; transient runs continue from their last checkpoint."""
+    q = _get_queue()
+    if q is None:
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    job = q.fetch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = job.get_status()
+    if status != "failed":
+        raise HTTPException(status_code=409, detail=f"Job status is {status}")
+    # A cancelled run that is resumed must not stop again at its first checkpoint
+    q.connection.delete(CANCEL_KEY.format(job_id))
+    job.requeue()
+    return JobStatus(id=job_id, status=job.get_status() or "queued", progress=0.0)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatus)
+def cancel_job(job_id: str):
+    """Cancel a waiting job, or stop a running one at its next solver checkpoint."""
+    q = _get_queue()
+    if q is None:
+        # Inline jobs have finished by the time their id is known
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    status = _cancel_jobs(q, [job_id])[job_id]
+    if status == "unknown":
+        raise HTTPException(status_code=404, detail="Job not found")
+    if status not in {"canceled", "canceling"}:
+        raise HTTPException(status_code=409, detail=f"Job status is {status}")
+    return JobStatus(id=job_id, status=status, progress=1.0 if status == "canceled" else 0.0)
 
 
 @router.get("/jobs/{job_id}/result")
-def get_job_result(job_id: str):
+def get_job_result(job_id: str, fields: Optional[str] = None):
+    """Return the stored result; ``fields`` is a comma-separated list of result keys."""
+    if job_id in _MEM_RESULTS:
+        # Inline jobs never reach the queue
+        return _result_response(_MEM_RESULTS[job_id], fields)
     q = _get_queue()
     if q is None:
-        result = _MEM_RESULTS.get(job_id)
-        if result is None:
-            raise HTTPException(status_code=404, detail="Result not found")
-        return {"result": result}
+        raise HTTPException(status_code=404, detail="Result not found")
+    rom_answer = _rom_answer(q, job_id)
+    if rom_answer is not None:
+        return _result_response(rom_answer, fields)
     job = q.fetch_job(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
     status = job.get_status() or "unknown"
     if status != "finished":
         raise HTTPException(status_code=409, detail=f"Job status is {status}")
-    if job.result is None:
+    if not isinstance(job.result, dict):
         raise HTTPException(status_code=404, detail="Result missing")
-    return job.result
+    return _result_response(job.result, fields)
 
 
 @router.get("/jobs/{job_id}/artifacts")
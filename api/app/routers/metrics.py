@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException, Response
+
+from .. import telemetry
+
+router = APIRouter()
+
+
+@router.get("/metrics", tags=["health"])
+def metrics():
+    try:
+        body, content_type = telemetry.render()
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=f"Metrics unavailable: {e}")
+    return Response(content=body, media_type=content_type)
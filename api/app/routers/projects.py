@@ -2,9 +2,14 @@ from __future__ import annotations
 
 import json
 import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from pydantic import BaseModel, Field
 
 router = APIRouter()
@@ -17,10 +22,133 @@ def _projects_dir() -> Path:
     return d
 
 
+# Project payloads stay in <id>.json blobs; the SQLite index holds the metadata used for
+# listing and the version counter used for optimistic concurrency.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS projects_updated_at ON projects (updated_at);
+CREATE INDEX IF NOT EXISTS projects_name ON projects (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS project_jobs (
+    project_id TEXT NOT NULL,
+    job_id TEXT NOT NULL,
+    PRIMARY KEY (project_id, job_id)
+);
+"""
+
+
+def _backfill_index(conn: sqlite3.Connection, base: Path) -> None:
+    """Index project files written before the index existed (one-time migration)."""
+    for p in base.glob("*.json"):
+        try:
+            obj = json.loads(p.read_text())
+            mtime = p.stat().st_mtime
+        except Exception:
+            continue
+        conn.execute(
+            "INSERT OR IGNORE INTO projects (id, name, created_at, updated_at, version) "
+            "VALUES (?, ?, ?, ?, 1)",
+            (p.stem, str(obj.get("name", p.stem)), mtime, mtime),
+        )
+
+
+@contextmanager
+def _index() -> Iterator[sqlite3.Connection]:
+    base = _projects_dir()
+    path = base / "index.sqlite3"
+    fresh = not path.exists()
+    # Autocommit mode; writers open explicit BEGIN IMMEDIATE transactions
+    conn = sqlite3.connect(path.as_posix(), timeout=30.0, isolation_level=None)
+    try:
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if fresh:
+            conn.execute("BEGIN IMMEDIATE")
+            _backfill_index(conn, base)
+            conn.execute("COMMIT")
+        yield conn
+    finally:
+        conn.close()
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """Write via a temp file in the same directory and rename it over the target."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _link_jobs(pid: str, job_ids: list[str]) -> None:
+    """Record that jobs were run for a project so archives can include their artifacts."""
+    if not job_ids:
+        return
+    with _index() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT OR IGNORE INTO project_jobs (project_id, job_id) VALUES (?, ?)",
+            [(pid, jid) for jid in job_ids],
+        )
+        conn.execute("COMMIT")
+
+
+def _project_job_ids(pid: str) -> list[str]:
+    with _index() as conn:
+        rows = conn.execute(
+            "SELECT job_id FROM project_jobs WHERE project_id = ? ORDER BY job_id", (pid,)
+        ).fetchall()
+    return [r["job_id"] for r in rows]
+
+
+def _insert_project(pid: str, name: str, data: dict) -> float:
+    """Write a new project file and index row; returns the creation timestamp."""
+    path = _projects_dir() / f"{pid}.json"
+    now = time.time()
+    with _index() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _atomic_write(path, json.dumps({"name": name, "data": data}, indent=2))
+            conn.execute(
+                "INSERT INTO projects (id, name, created_at, updated_at, version) "
+                "VALUES (?, ?, ?, ?, 1)",
+                (pid, name, now, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return now
+
+
 class Project(BaseModel):
     id: str
     name: str
     data: dict = Field(default_factory=dict)
+    version: int = 1
+    updated_at: Optional[float] = None
+
+
+class ProjectMeta(BaseModel):
+    id: str
+    name: str
+    created_at: float
+    updated_at: float
+    version: int
 
 
 class ProjectCreate(BaseModel):
@@ -28,56 +156,143 @@ class ProjectCreate(BaseModel):
     data: dict
 
 
-@router.get("/projects")
-def list_projects() -> list[Project]:
-    base = _projects_dir()
-    items: list[Project] = []
-    for p in base.glob("*.json"):
-        try:
-            obj = json.loads(p.read_text())
-            items.append(Project(id=p.stem, name=obj.get("name", p.stem), data=obj.get("data", {})))
-        except Exception:
-            continue
-    return items
+class ProjectUpdate(ProjectCreate):
+    # Expected current version; the update is rejected with 409 if it no longer matches
+    version: Optional[int] = None
+
+
+_SORT_COLUMNS = {"updated_at": "updated_at", "created_at": "created_at", "name": "name"}
+
+
+@router.get("/projects", response_model=list[ProjectMeta])
+def list_projects(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    q: Optional[str] = Query(None, description="Case-insensitive substring of the name"),
+    sort: str = Query("updated_at", pattern="^(updated_at|created_at|name)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+) -> list[ProjectMeta]:
+    """List project metadata (without ``data``); the total match count is in X-Total-Count."""
+    where = ""
+    params: list = []
+    if q:
+        where = "WHERE name LIKE ? ESCAPE '\\'"
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    column = _SORT_COLUMNS[sort]
+    direction = "ASC" if order == "asc" else "DESC"
+    with _index() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM projects {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT id, name, created_at, updated_at, version FROM projects {where} "
+            f"ORDER BY {column} {direction}, id LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+    response.headers["X-Total-Count"] = str(total)
+    return [ProjectMeta(**dict(r)) for r in rows]
 
 
 @router.post("/projects", response_model=Project)
 def create_project(payload: ProjectCreate) -> Project:
-    base = _projects_dir()
     import uuid
 
     pid = str(uuid.uuid4())
-    content = {"name": payload.name, "data": payload.data}
-    (base / f"{pid}.json").write_text(json.dumps(content, indent=2))
-    return Project(id=pid, name=payload.name, data=payload.data)
+    now = _insert_project(pid, payload.name, payload.data)
+    return Project(id=pid, name=payload.name, data=payload.data, version=1, updated_at=now)
 
 
 @router.get("/projects/{pid}", response_model=Project)
-def get_project(pid: str):
+def get_project(pid: str, response: Response):
     base = _projects_dir()
     path = base / f"{pid}.json"
     if not path.exists():
         raise HTTPException(status_code=404, detail="Project not found")
     obj = json.loads(path.read_text())
-    return Project(id=pid, name=obj.get("name", pid), data=obj.get("data", {}))
+    with _index() as conn:
+        row = conn.execute(
+            "SELECT version, updated_at FROM projects WHERE id = ?", (pid,)
+        ).fetchone()
+    version = int(row["version"]) if row else 1
+    response.headers["ETag"] = f'"{version}"'
+    return Project(
+        id=pid,
+        name=obj.get("name", pid),
+        data=obj.get("data", {}),
+        version=version,
+        updated_at=row["updated_at"] if row else None,
+    )
+
+
+def _expected_version(payload: ProjectUpdate, if_match: Optional[str]) -> Optional[int]:
+    if payload.version is not None:
+        return payload.version
+    if if_match:
+        try:
+            return int(if_match.strip().strip('"'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="If-Match must be a project version")
+    return None
 
 
 @router.put("/projects/{pid}", response_model=Project)
-def update_project(pid: str, payload: ProjectCreate):
+def update_project(
+    pid: str,
+    payload: ProjectUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+):
+    """Replace a project; pass ``version`` (or If-Match) to guard against lost updates."""
     base = _projects_dir()
     path = base / f"{pid}.json"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Project not found")
+    expected = _expected_version(payload, if_match)
     content = {"name": payload.name, "data": payload.data}
-    path.write_text(json.dumps(content, indent=2))
-    return Project(id=pid, name=payload.name, data=payload.data)
+    now = time.time()
+    with _index() as conn:
+        # Take the write lock before checking so concurrent editors serialize here
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not path.exists():
+                raise HTTPException(status_code=404, detail="Project not found")
+            row = conn.execute("SELECT version FROM projects WHERE id = ?", (pid,)).fetchone()
+            current = int(row["version"]) if row else 1
+            if expected is not None and expected != current:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Project was modified (version {current}, expected {expected})",
+                )
+            _atomic_write(path, json.dumps(content, indent=2))
+            conn.execute(
+                "INSERT INTO projects (id, name, created_at, updated_at, version) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET "
+                "name = excluded.name, updated_at = excluded.updated_at, "
+                "version = excluded.version",
+                (pid, payload.name, now, now, current + 1),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    response.headers["ETag"] = f'"{current + 1}"'
+    return Project(
+        id=pid, name=payload.name, data=payload.data, version=current + 1, updated_at=now
+    )
 
 
 @router.delete("/projects/{pid}")
 def delete_project(pid: str):
     base = _projects_dir()
     path = base / f"{pid}.json"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Project not found")
-    path.unlink()
+    with _index() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not path.exists():
+                raise HTTPException(status_code=404, detail="Project not found")
+            conn.execute("DELETE FROM projects WHERE id = ?", (pid,))
+            conn.execute("DELETE FROM project_jobs WHERE project_id = ?", (pid,))
+            path.unlink()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
     return {"ok": True}
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field, ValidationError
+
+from .. import studies
+from ..admission import api_rejection
+from ..schemas import JobSpec
+from .jobs import _get_queue
+
+router = APIRouter()
+
+
+class StudyParameter(BaseModel):
+    # Dotted path into the job spec, e.g. "material.viscosity" or "boundaries.0.value"
+    path: str
+    low: float
+    high: float
+    # Grid levels along this parameter (grid design only)
+    levels: int = Field(5, ge=1)
+    # Sample geometrically between low and high
+    log: bool = False
+
+
+class StudyObjective(BaseModel):
+    # Scalar result key, e.g. "flux_out" or "l2_error"
+    key: str
+    goal: Literal["minimize", "maximize"] = "minimize"
+    # Calibrate instead: minimize the squared relative mismatch to this value
+    target: Optional[float] = None
+
+
+class StudyCreate(BaseModel):
+    name: str
+    base: dict
+    parameters: list[StudyParameter] = Field(min_length=1)
+    design: Literal["grid", "lhs", "nelder_mead"] = "grid"
+    # Latin-hypercube sample count and seed
+    samples: int = Field(20, ge=1)
+    seed: int = 0
+    # Most study jobs queued or running at once
+    concurrency: int = Field(8, ge=1)
+    objective: Optional[StudyObjective] = None
+    # Evaluation budget of the optimizer
+    max_evaluations: int = Field(60, ge=4)
+
+
+def _validate(payload: StudyCreate) -> None:
+    """Reject studies whose points would not be valid, admissible jobs."""
+    if payload.design == "nelder_mead" and payload.objective is None:
+        raise HTTPException(status_code=422, detail="nelder_mead needs an objective")
+    for p in payload.parameters:
+        if p.high < p.low or (p.log and p.low <= 0):
+            raise HTTPException(status_code=422, detail=f"Invalid range for {p.path}")
+    state = payload.model_dump()
+    size, limit = studies.design_size(state), studies.max_points()
+    if size > limit:
+        detail = f"Study has {size} points; at most {limit} are allowed"
+        raise HTTPException(status_code=413, detail=detail)
+    # The corners bound every design point; the memory estimate grows with the mesh
+    for u in (0.0, 1.0):
+        try:
+            spec, _values = studies.point_spec(state, [u] * len(payload.parameters))
+            JobSpec(**spec)
+        except (KeyError, IndexError, ValueError, TypeError, ValidationError) as e:
+            raise HTTPException(status_code=422, detail=f"Invalid study point: {e}")
+        rejection = api_rejection(spec)
+        if rejection:
+            raise HTTPException(status_code=413, detail=rejection)
+
+
+@router.post("/studies")
+def create_study(payload: StudyCreate):
+    """Start a grid, Latin-hypercube or Nelder-Mead study in one submission."""
+    _validate(payload)
+    q = _get_queue()
+    if q is None:
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    state = studies.new_study(payload.model_dump())
+    studies.save(q.connection, state)
+    state = studies.advance(q.connection, state["id"])
+    return studies.summary(state)
+
+
+@router.get("/studies/{sid}")
+def get_study(sid: str):
+    q = _get_queue()
+    if q is None:
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    # Polling also advances the study, in case a job callback was lost
+    state = studies.advance(q.connection, sid)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Study not found")
+    return studies.summary(state)
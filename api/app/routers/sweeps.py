@@ -1,11 +1,23 @@
 from __future__ import annotations
 
+from typing import Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-
-from .jobs import _get_queue
+from fastapi import APIRouter, Header, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from ..admission import api_rejection
+from ..runner import _artifacts_dir, _rom_path
+from .jobs import (
+    _cancel_jobs,
+    _check_backpressure,
+    _client_key,
+    _get_queue,
+    _retry_policy,
+    _throttle,
+    _track_inflight,
+)
+from .projects import _link_jobs
 
 router = APIRouter()
 
@@ -22,27 +34,56 @@ class SweepStatus(BaseModel):
     done: bool
 
 
+class RomCreate(BaseModel):
+    # Relative L2 error the POD truncation may introduce on the snapshots
+    tolerance: float = Field(1e-4, gt=0, lt=1)
+
+
 SWEEPS: dict[str, list[str]] = {}
 
 
 @router.post("/sweeps")
-def create_sweep(payload: SweepCreate):
+def create_sweep(
+    payload: SweepCreate, request: Request, x_client_id: Optional[str] = Header(None)
+):
+    for i, v in enumerate(payload.variants):
+        rejection = api_rejection({**payload.base, **v})
+        if rejection:
+            raise HTTPException(status_code=413, detail=f"Variant {i}: {rejection}")
+    project_id = payload.base.get("project_id")
+    project_id = str(project_id) if project_id else None
     q = _get_queue()
     if q is None:
         raise HTTPException(status_code=503, detail="Queue unavailable")
+    _check_backpressure(q, project_id, len(payload.variants))
+    client = f"project:{project_id}" if project_id else _client_key(request, x_client_id)
+    _throttle("submit", client, cost=len(payload.variants))
     batch_id = str(uuid4())
     job_ids: list[str] = []
     for v in payload.variants:
         spec = {**payload.base, **v}
-        # Use public workers.tasks path to avoid import attribute resolution issues
-        job = q.enqueue("workers.tasks.runjob", spec, str(uuid4()), job_timeout=600)
+        # Use public workers.tasks path to avoid import attribute resolution issues; the
+        # queue id doubles as the artifact prefix, as for single jobs
+        jid = str(uuid4())
+        job = q.enqueue(
+            "workers.tasks.runjob",
+            spec,
+            jid,
+            job_id=jid,
+            job_timeout=600,
+            retry=_retry_policy(),
+        )
         job_ids.append(job.id)
     SWEEPS[batch_id] = job_ids
+    if project_id:
+        _link_jobs(project_id, job_ids)
+        _track_inflight(q, project_id, job_ids)
     return {"id": batch_id, "jobs": job_ids}
 
 
 @router.get("/sweeps/{sid}", response_model=SweepStatus)
-def get_sweep(sid: str):
+def get_sweep(sid: str, request: Request, x_client_id: Optional[str] = Header(None)):
+    _throttle("status", _client_key(request, x_client_id))
     q = _get_queue()
     if q is None:
         raise HTTPException(status_code=503, detail="Queue unavailable")
@@ -58,11 +99,30 @@ def get_sweep(sid: str):
             continue
         status = job.get_status() or "unknown"
         jobs.append({"id": jid, "status": status})
-        if status not in {"finished", "failed"}:
+        if status not in {"finished", "failed", "canceled"}:
             done = False
     return {"id": sid, "jobs": jobs, "done": done}
 
 
+@router.post("/sweeps/{sid}/cancel")
+def cancel_sweep(sid: str):
+    """Drop the sweep's waiting jobs and stop its running ones at their next checkpoint."""
+    q = _get_queue()
+    if q is None:
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    ids = SWEEPS.get(sid)
+    if ids is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    outcome = _cancel_jobs(q, ids)
+    statuses = list(outcome.values())
+    return {
+        "id": sid,
+        "canceled": statuses.count("canceled"),
+        "canceling": statuses.count("canceling"),
+        "jobs": [{"id": jid, "status": status} for jid, status in outcome.items()],
+    }
+
+
 @router.get("/sweeps/{sid}/csv")
 def get_sweep_csv(sid: str):
     import csv
@@ -82,6 +142,53 @@ def get_sweep_csv(sid: str):
     for jid in ids:
         job = q.fetch_job(jid)
         if job and job.result and isinstance(job.result, dict):
-            res = job.result.get("result", {})
+            # Finished jobs keep a scalar summary; older payloads carried the full result
+            res = job.result.get("summary") or job.result.get("result", {})
             w.writerow([jid, res.get("mesh_cells", ""), ";".join(res.get("fields", []))])
     return PlainTextResponse(out.getvalue(), media_type="text/csv")
+
+
+@router.post("/sweeps/{sid}/rom")
+def create_sweep_rom(sid: str, payload: Optional[RomCreate] = None):
+    """Train a reduced-order model from the sweep's finished snapshots.
+
+    Jobs that name the sweep in ``rom`` are then answered from the model whenever its
+    error indicator is within their ``rom_tolerance``.
+    """
+    import meshio
+
+    from ..rom import build_rom
+
+    q = _get_queue()
+    if q is None:
+        raise HTTPException(status_code=503, detail="Queue unavailable")
+    ids = SWEEPS.get(sid)
+    path = _rom_path(sid)
+    if ids is None or path is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    snapshots = []
+    base = _artifacts_dir()
+    for jid in ids:
+        job = q.fetch_job(jid)
+        vtu = base / f"{jid}-stokes.vtu"
+        # Analytic fallbacks write no field output and are left out
+        if job is None or job.get_status() != "finished" or not vtu.exists():
+            continue
+        snapshots.append((job.args[0], meshio.read(vtu)))
+    try:
+        model = build_rom(snapshots, tolerance=(payload or RomCreate()).tolerance)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    model.save(path)
+    return {"id": sid, **model.summary()}
+
+
+@router.get("/sweeps/{sid}/rom")
+def get_sweep_rom(sid: str):
+    from ..rom import load_rom
+
+    path = _rom_path(sid)
+    model = load_rom(path) if path is not None else None
+    if model is None:
+        raise HTTPException(status_code=404, detail="Reduced-order model not found")
+    return {"id": sid, **model.summary()}
@@ -0,0 +1,877 @@
+"""Job execution: everything a worker runs, without the web framework.
+
+``_run_job`` solves one job spec and writes its artifacts; RQ workers reach it through
+``workers.tasks.runjob`` and the API calls it directly in inline mode. Nothing here
+imports FastAPI, Redis or the solvers at module level, so workers start quickly and the
+numerical stack is only loaded by the job that needs it.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from . import telemetry
+from .admission import fem_dofs, job_mesh, job_solver
+
+# Fraction of the queue's job timeout after which transient runs checkpoint and stop
+CHECKPOINT_AT = 0.9
+# Redis key whose presence asks a running job to stop at its next solver checkpoint
+CANCEL_KEY = "microfluidic:cancel:{}"
+CANCEL_TTL = 24 * 3600
+# Solver paths whose results the Newtonian steady Poiseuille solution does not stand in
+# for: when they fail, the job fails with the solver error instead of falling back
+NO_ANALYTIC_FALLBACK = {"fem_gn", "fem_transient", "fem_adaptive"}
+
+logger = logging.getLogger(__name__)
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Whether rerunning a job that raised ``exc`` may succeed.
+
+    Lost resources are transient: out of memory, I/O and connection errors, and a
+    transient run that stopped at its checkpoint (a ``TimeoutError``), which the rerun
+    resumes. Anything else (an invalid spec or geometry, a singular or diverging system,
+    refusal by admission control, cancellation) fails the same way every time.
+    """
+    if isinstance(exc, (MemoryError, OSError)):
+        return True
+    try:
+        from redis.exceptions import ConnectionError as RedisConnectionError
+        from redis.exceptions import TimeoutError as RedisTimeoutError
+    except ImportError:
+        return False
+    return isinstance(exc, (RedisConnectionError, RedisTimeoutError))
+
+
+def _write_error_artifact(job_id: str, message: str) -> None:
+    try:
+        base = _artifacts_dir()
+        (base / f"{job_id}-error.txt").write_text(message)
+    except Exception:
+        pass
+
+
+def _artifacts_dir() -> Path:
+    d = Path(os.getenv("ARTIFACTS_DIR", "data/artifacts"))
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def _write_artifacts(job_id: str, result: dict) -> list[str]:
+    base = _artifacts_dir()
+    files: list[str] = []
+    # JSON
+    json_path = base / f"{job_id}-result.json"
+    json_path.write_text(json.dumps(result, indent=2))
+    files.append(json_path.name)
+    # CSV summary
+    csv_path = base / f"{job_id}-summary.csv"
+    csv = [
+        "key,value",
+        f"name,{result.get('name', '')}",
+        f"mesh_cells,{result.get('mesh_cells', 0)}",
+        f"fields,{';'.join(result.get('fields', []))}",
+    ]
+    csv_path.write_text("\n".join(csv) + "\n")
+    files.append(csv_path.name)
+    # Minimal VTK legacy placeholder
+    vtk_path = base / f"{job_id}-fields.vtk"
+    vtk_content = """# vtk DataFile Version 3.0
+Microfluidic Result
+ASCII
+DATASET POLYDATA
+POINTS 0 float
+POLYGONS 0 0
+"""
+    vtk_path.write_text(vtk_content)
+    files.append(vtk_path.name)
+    return files
+
+
+def _summarize_result(result: dict) -> dict:
+    """Keep only scalar entries (plus the field list) of a result for the queue payload."""
+    summary: dict = {}
+    for key, value in result.items():
+        if value is None or isinstance(value, (str, int, float, bool)):
+            summary[key] = value
+    fields = result.get("fields")
+    if isinstance(fields, list):
+        summary["fields"] = [str(f) for f in fields]
+    return summary
+
+
+def _job_return(job_id: str, result: dict, artifacts: list[str]) -> dict:
+    """Build the task return value stored by RQ.
+
+    The full result already lives in the ``<job_id>-result.json`` artifact written by
+    ``_write_artifacts``; Redis only keeps a small summary and a pointer to that file.
+    """
+    return {
+        "ok": True,
+        "summary": _summarize_result(result),
+        "result_artifact": f"{job_id}-result.json",
+        "artifacts": artifacts,
+    }
+
+
+def _job_timer(cancelled=None):
+    """Phase timer for one job run; ``JOB_TIMINGS=0`` turns instrumentation off.
+
+    ``cancelled`` is polled by the timer so the solvers can stop a cancelled run.
+    """
+    from solver.instrument import NullTimer, PhaseTimer
+
+    if os.getenv("JOB_TIMINGS", "1").strip().lower() in {"0", "false", "no"}:
+        return NullTimer(cancelled)
+    return PhaseTimer(cancelled)
+
+
+def _cancel_check(job_id: str):
+    """Whether the queued job being run has been cancelled, as a callable; None inline."""
+    try:
+        from rq import get_current_job  # type: ignore
+
+        job = get_current_job()
+    except Exception:
+        return None
+    if job is None:
+        return None
+    conn, key = job.connection, CANCEL_KEY.format(job_id)
+    return lambda: bool(conn.exists(key))
+
+
+def _write_timings(job_id: str, timer) -> list[str]:
+    """Write the final timing report (artifact writing included) next to the result."""
+    report = timer.report()
+    if not report:
+        return []
+    try:
+        path = _artifacts_dir() / f"{job_id}-timings.json"
+        path.write_text(json.dumps(report, indent=2))
+        return [path.name]
+    except Exception:
+        return []
+
+
+def _finish_job(
+    job_id: str, result: dict, artifacts: list[str], timer, path: str, t0: float
+) -> dict:
+    """Write the timing report, record job telemetry and build the task return value."""
+    artifacts.extend(_write_timings(job_id, timer))
+    telemetry.observe_job(path, time.perf_counter() - t0)
+    telemetry.record_artifacts(_artifacts_dir(), artifacts)
+    return _job_return(job_id, result, artifacts)
+
+
+def _rom_path(sweep_id: str) -> Optional[Path]:
+    """Where the reduced-order model of a sweep is stored; None for unsafe ids."""
+    if not sweep_id or Path(sweep_id).name != sweep_id or sweep_id.startswith("."):
+        return None
+    return _artifacts_dir() / "roms" / f"{sweep_id}.npz"
+
+
+def _answer_from_rom(spec_data: dict, job_id: str) -> Optional[dict]:
+    """Answer a job from its sweep's reduced-order model when the error indicator allows.
+
+    Returns the task return value, or None when the job needs a full solve.
+    """
+    path = _rom_path(str(spec_data.get("rom") or ""))
+    if path is None:
+        return None
+    from .rom import load_rom
+
+    model = load_rom(path)
+    if model is None:
+        return None
+    timer = _job_timer()
+    t0 = time.perf_counter()
+    indicator = model.error_indicator(spec_data)
+    if indicator > float(spec_data.get("rom_tolerance") or 0.0):
+        return None
+    from solver.mesh import write_output
+
+    from .rom import rom_parameters
+
+    params = rom_parameters(spec_data)
+    h, length = params["geometry.height"], params["geometry.width"]
+    nx_used, ny_used = job_mesh(spec_data)
+    with timer.phase("solve"):
+        m, pdata = model.predict(spec_data)
+    vtu_path = _artifacts_dir() / f"{job_id}-stokes.vtu"
+    precision = spec_data.get("output_precision") or "float64"
+    with timer.phase("export"):
+        saved = write_output(vtu_path, m, precision)
+    with timer.phase("metrics"):
+        err = _midline_l2_error_from_mesh(
+            m, pdata, h=h, length=length, u_avg=params["inlet.value"], ny_hint=ny_used
+        )
+        q_in = _flux_from_meshio(m, pdata, "inlet", length, ny_hint=ny_used)
+        q_out = _flux_from_meshio(m, pdata, "outlet", length, ny_hint=ny_used)
+    result = {
+        "name": spec_data.get("name", "job"),
+        "mesh_cells": int(len(m.points)),
+        "fields": ["u", "v", "p"],
+        "l2_error": err,
+        "flux_in": q_in,
+        "flux_out": q_out,
+        "mass_balance_rel_error": abs(q_in - q_out) / max(abs(q_in), 1e-12),
+        "geometry": {"h_m": h, "l_m": length, "unit": "m", "scale": 1.0},
+        "solver": "rom",
+        "rom": spec_data.get("rom"),
+        "rom_error_indicator": indicator,
+        **_output_report(vtu_path, precision, saved),
+    }
+    result["timings"] = timer.report()
+    with timer.phase("artifacts"):
+        artifacts = _write_artifacts(job_id, result)
+        artifacts.append(vtu_path.name)
+    return _finish_job(job_id, result, artifacts, timer, "rom", t0)
+
+
+def _warm_start_pressure(spec_data: dict, nx: int, ny: int):
+    """Cell pressures of the MAC job named in ``warm_start``, if it matches this grid."""
+    prev = str(spec_data.get("warm_start") or "")
+    if not prev or Path(prev).name != prev:
+        return None
+    path = _artifacts_dir() / f"{prev}-stokes.vtu"
+    try:
+        import meshio as _meshio
+
+        p = _meshio.read(path.as_posix()).point_data.get("p")
+        if p is None or p.size != nx * ny:
+            return None
+        return p.astype(float).reshape(ny, nx)
+    except Exception:
+        return None
+
+
+def _rheology(spec_data: dict) -> Optional[dict]:
+    """Keyword arguments of the generalized-Newtonian solver, None for Newtonian fluids."""
+    material = spec_data.get("material") or {}
+    model = material.get("rheology", "newtonian")
+    if model == "newtonian":
+        return None
+    return {
+        "model": model,
+        "flow_index": float(material.get("flow_index", 1.0)),
+        "mu_inf": float(material.get("viscosity_inf", 0.0)),
+        "relaxation_time": float(material.get("relaxation_time", 0.0)),
+        "anderson_depth": int(spec_data.get("anderson_depth", 3)),
+    }
+
+
+def _transient(spec_data: dict, job_id: str, started: float) -> Optional[dict]:
+    """Keyword arguments of the time-stepping solver, None for steady jobs.
+
+    Snapshots and checkpoints go to the artifact store under the job id, so a requeued job
+    resumes from its checkpoint. Under RQ the run checkpoints and stops on its own at
+    ``CHECKPOINT_AT`` of the job timeout (``started`` is ``time.monotonic()`` at job start)
+    instead of being killed between checkpoints.
+    """
+    opts = spec_data.get("transient")
+    if not opts:
+        return None
+    material = spec_data.get("material") or {}
+    deadline = None
+    try:
+        from rq import get_current_job  # type: ignore
+
+        job = get_current_job()
+        if job is not None and job.timeout and job.timeout > 0:
+            deadline = started + CHECKPOINT_AT * float(job.timeout)
+    except Exception:
+        pass
+    return {
+        **opts,
+        "rho": float(material.get("density", 1000.0)),
+        "diffusivity": float(material.get("diffusivity", 1e-9)),
+        "transport": bool(spec_data.get("solve_transport", True)),
+        "out_dir": _artifacts_dir(),
+        "prefix": job_id,
+        "deadline": deadline,
+        "precision": spec_data.get("output_precision") or "float64",
+    }
+
+
+def _output_report(path: Path, precision: str, saved: int) -> dict:
+    """Result keys describing the field output: precision, file size and bytes saved.
+
+    ``output_bytes_saved`` counts the (uncompressed) arrays against double precision.
+    """
+    return {
+        "output_precision": precision,
+        "output_bytes": path.stat().st_size,
+        "output_bytes_saved": int(saved),
+    }
+
+
+def _mesh_definition(
+    solver: str, h: float, length: float, nx: int, ny: int, mesh_opts: Optional[dict]
+) -> Optional[dict]:
+    """What determines the triangle mesh of a FEM solve; None for the MAC grid.
+
+    Adaptive meshes depend on the refinement target but not on viscosity or inflow, since
+    the error estimate is relative.
+    """
+    if solver == "fem_adaptive":
+        opts = mesh_opts or {}
+        return {
+            "kind": "adaptive",
+            "h": h,
+            "l": length,
+            "target_error": float(opts.get("target_error", 1e-3)),
+            "max_dofs": int(opts.get("max_dofs", 200_000)),
+        }
+    if solver.startswith("fem"):
+        return {"kind": "rect", "h": h, "l": length, "nx": nx, "ny": ny}
+    return None
+
+
+def _mesh_cache_path(definition: dict) -> Path:
+    from solver.mesh import mesh_key
+
+    return _artifacts_dir() / "meshes" / f"{mesh_key(definition)}.npz"
+
+
+def _cached_mesh(path: Path):
+    """The cached triangle mesh at ``path`` as a scikit-fem mesh, or None on a miss."""
+    mesh = None
+    if path.exists():
+        try:
+            from skfem import MeshTri
+            from solver.mesh import load_mesh
+
+            data = load_mesh(path)
+            mesh = MeshTri(data["points"].T, data["cells"].T)
+        except Exception:
+            mesh = None  # unreadable entry: mesh again and overwrite it
+    telemetry.record_cache("mesh", mesh is not None)
+    return mesh
+
+
+def _solve_rect(
+    solver: str,
+    h: float,
+    length: float,
+    mu: float,
+    u_avg: float,
+    nx: int,
+    ny: int,
+    timer,
+    p0=None,
+    mesh_opts: Optional[dict] = None,
+    rheology: Optional[dict] = None,
+    transient: Optional[dict] = None,
+    mesh=None,
+):
+    """Solve the rectangular channel with the MAC or the FEM solver.
+
+    FEM on large meshes uses the domain-decomposed solver when SOLVER_WORKERS > 1, falling
+    back to the direct one. ``p0`` warm-starts the MAC pressure iteration; the direct FEM
+    solvers ignore it. ``fem_adaptive`` refines to the target error and DOF budget in
+    ``mesh_opts``; ``fem_gn`` takes the viscosity model and iteration options in
+    ``rheology`` and ``fem_transient`` the time stepping options in ``transient``. Returns
+    the solver output and the path label (``mac``, ``fem_adaptive``, ``fem_gn``,
+    ``fem_transient``, ``fem_dd`` or ``fem``). A cached triangle ``mesh`` is handed to the
+    FEM solvers instead of meshing again.
+    """
+    if solver == "fem_transient":
+        from solver.transient import solve_rect_transient
+
+        with timer.phase("solve"):
+            res = solve_rect_transient(
+                h=h,
+                l=length,
+                mu=mu,
+                u_avg=u_avg,
+                nx=nx,
+                ny=ny,
+                with_metrics=True,
+                timer=timer,
+                mesh=mesh,
+                **(transient or {}),
+            )
+        return res, "fem_transient"
+    if solver == "fem_gn":
+        from solver.stokes_gn import solve_rect_stokes_gn
+
+        with timer.phase("solve"):
+            res = solve_rect_stokes_gn(
+                h=h,
+                l=length,
+                mu=mu,
+                u_avg=u_avg,
+                nx=nx,
+                ny=ny,
+                with_metrics=True,
+                timer=timer,
+                mesh=mesh,
+                **(rheology or {}),
+            )
+        return res, "fem_gn"
+    if solver == "fem_adaptive":
+        from solver.stokes_adaptive import solve_rect_stokes_adaptive
+
+        opts = mesh_opts or {}
+        res = solve_rect_stokes_adaptive(
+            h=h,
+            l=length,
+            mu=mu,
+            u_avg=u_avg,
+            target_error=float(opts.get("target_error", 1e-3)),
+            max_dofs=int(opts.get("max_dofs", 200_000)),
+            with_metrics=True,
+            timer=timer,
+            mesh=mesh,
+        )
+        return res, "fem_adaptive"
+    if solver == "mac":
+        from solver.stokes_mac import solve_rect_stokes_mac
+
+        with timer.phase("solve"):
+            res = solve_rect_stokes_mac(
+                h=h,
+                l=length,
+                mu=mu,
+                u_avg=u_avg,
+                nx=nx,
+                ny=ny,
+                with_metrics=True,
+                timer=timer,
+                p0=p0,
+            )
+        return res, "mac"
+    workers = int(os.getenv("SOLVER_WORKERS", "1"))
+    if workers > 1 and fem_dofs(nx, ny) >= int(os.getenv("DD_MIN_DOFS", "50000")):
+        from solver.stokes_dd import NotConverged, solve_rect_stokes_dd
+
+        try:
+            with timer.phase("solve"):
+                res = solve_rect_stokes_dd(
+                    h=h,
+                    l=length,
+                    mu=mu,
+                    u_avg=u_avg,
+                    nx=nx,
+                    ny=ny,
+                    workers=workers,
+                    with_metrics=True,
+                    timer=timer,
+                    mesh=mesh,
+                )
+            return res, "fem_dd"
+        except NotConverged as e:
+            # Retried with the direct solver; other errors fail or retry the job as usual
+            logger.warning("Domain decomposition fell back to the direct solver: %s", e)
+            telemetry.record_fallback("fem")
+    from solver.stokes_fem import solve_rect_stokes_fem
+
+    with timer.phase("solve"):
+        res = solve_rect_stokes_fem(
+            h=h,
+            l=length,
+            mu=mu,
+            u_avg=u_avg,
+            nx=nx,
+            ny=ny,
+            with_metrics=True,
+            timer=timer,
+            mesh=mesh,
+        )
+    return res, "fem"
+
+
+def _flux_from_analytic(sol, side: str) -> float:
+    # For rectangle, flux at inlet/outlet: integrate u_x over y
+    from numpy import trapz
+
+    u_mid = sol.u[:, sol.u.shape[1] // 2]
+    return float(trapz(u_mid, sol.y))
+
+
+def _flux_from_meshio(
+    m,
+    pdata,
+    side: str,
+    length: float,
+    ny_hint: int = 20,
+) -> float:
+    import numpy as _np
+
+    pts = m.points
+    x = pts[:, 0]
+    y = pts[:, 1]
+    u = pdata.get("u")
+    if u is None:
+        return 0.0
+    ux = u[:, 0]
+    target_x = 0.0 if side == "inlet" else length
+    k = max(10, ny_hint)
+    idx = _np.argsort(_np.abs(x - target_x))[:k]
+    y_sel = y[idx]
+    ux_sel = ux[idx]
+    order = _np.argsort(y_sel)
+    y_sorted = y_sel[order]
+    ux_sorted = ux_sel[order]
+    from numpy import trapz
+
+    return float(trapz(ux_sorted, y_sorted))
+
+
+def _midline_l2_error_from_mesh(
+    m,
+    pdata,
+    h: float,
+    length: float,
+    u_avg: float,
+    ny_hint: int = 20,
+) -> float:
+    import numpy as _np
+
+    pts = m.points
+    x = pts[:, 0]
+    y = pts[:, 1]
+    u = pdata.get("u")
+    if u is None:
+        return float("nan")
+    ux = u[:, 0]
+    # Select nodes nearest to midline x=l/2
+    k = max(10, ny_hint)
+    idx = _np.argsort(_np.abs(x - length / 2.0))[:k]
+    y_mid = y[idx]
+    u_mid = ux[idx]
+    order = _np.argsort(y_mid)
+    y_mid = y_mid[order]
+    u_mid = u_mid[order]
+    # Reference profile
+    u_ref = 6.0 * u_avg * (y_mid / h) * (1.0 - y_mid / h)
+    from numpy import trapz
+
+    denom = trapz(u_ref**2, y_mid)
+    if denom == 0:
+        return 0.0
+    err = _np.sqrt(trapz((u_mid - u_ref) ** 2, y_mid) / denom)
+    return float(err)
+
+
+def _dummy_solver(spec_data: dict, job_id: str) -> dict:
+    # Store errors to RQ job.meta and artifact so they can be surfaced via API
+    def _record_error(msg: str) -> None:
+        try:
+            from rq import get_current_job  # type: ignore
+
+            j = get_current_job()
+            if j is not None:
+                j.meta = j.meta or {}
+                j.meta["error_message"] = msg
+                j.save_meta()
+        except Exception:
+            pass
+        try:
+            _write_error_artifact(job_id, msg)
+        except Exception:
+            pass
+
+    from solver.instrument import Cancelled
+
+    timer = _job_timer(_cancel_check(job_id))
+    t0 = time.perf_counter()
+    started = time.monotonic()
+    solver_path = "dummy"
+    # If geometry_json describes a single rectangular channel, use analytical Poiseuille solution
+    try:
+        gjson = spec_data.get("geometry_json")
+        # If geometry_json is missing, synthesize a simple rectangle from scalar geometry (meters)
+        if not gjson:
+            geom = spec_data.get("geometry") or {}
+            try:
+                gw = float(geom.get("width", 0.0))
+                gh = float(geom.get("height", 0.0))
+                if gw > 0.0 and gh > 0.0:
+                    gjson = {
+                        "unit": "m",
+                        "shapes": [
+                            {
+                                "id": "rect1",
+                                "type": "rect",
+                                "x": 0.0,
+                                "y": 0.0,
+                                "width": gw,
+                                "height": gh,
+                            }
+                        ],
+                    }
+            except Exception:
+                gjson = None
+        material = spec_data.get("material", {})
+        mu = float(material.get("viscosity", 1e-3))
+        if gjson and isinstance(gjson, dict):
+            # Determine geometry unit scale (default meters)
+            unit = str(gjson.get("unit", "m")).lower()
+            scale = 1.0
+            try:
+                if "unit_scale" in gjson:
+                    scale = float(gjson.get("unit_scale") or 1.0)
+                else:
+                    scale = {"m": 1.0, "mm": 1e-3, "um": 1e-6, "µm": 1e-6}.get(unit, 1.0)
+            except Exception:
+                scale = 1.0
+            shapes = gjson.get("shapes", [])
+            if isinstance(shapes, list) and len(shapes) >= 1:
+                rects = [s for s in shapes if s.get("type") == "rect"]
+                if len(rects) >= 1:
+                    r = rects[0]
+                    # Scale geometry to meters
+                    h = float(r.get("height", 1.0)) * scale
+                    length = float(r.get("width", 1.0)) * scale
+                    # inlet mean velocity heuristic
+                    u_avg = 1e-3
+                    for b in spec_data.get("boundaries", []):
+                        if b.get("type") == "inlet" and b.get("value") is not None:
+                            u_avg = float(b.get("value"))
+                            break
+                    nx_used, ny_used = job_mesh(spec_data)
+                    # Numerical solve (MAC or FEM) first; on failure, fallback to analytic
+                    try:
+                        solver_path = job_solver(spec_data)
+                        p0 = None
+                        if solver_path == "mac" and spec_data.get("warm_start"):
+                            p0 = _warm_start_pressure(spec_data, nx_used, ny_used)
+                        mesh_def = _mesh_definition(
+                            solver_path, h, length, nx_used, ny_used, spec_data.get("mesh")
+                        )
+                        mesh_path = cached = None
+                        if mesh_def is not None:
+                            mesh_path = _mesh_cache_path(mesh_def)
+                            with timer.phase("mesh_cache"):
+                                cached = _cached_mesh(mesh_path)
+                        res, solver_path = _solve_rect(
+                            solver_path,
+                            h,
+                            length,
+                            mu,
+                            u_avg,
+                            nx_used,
+                            ny_used,
+                            timer,
+                            p0,
+                            spec_data.get("mesh"),
+                            _rheology(spec_data),
+                            _transient(spec_data, job_id, started),
+                            cached,
+                        )
+                        # Support both (m, pdata) and (m, pdata, metrics)
+                        if isinstance(res, tuple) and len(res) == 3:
+                            m, pdata, metrics = res
+                        else:
+                            m, pdata = res  # type: ignore
+                            metrics = {}
+                        # export VTU
+                        base = _artifacts_dir()
+                        vtu_path = base / f"{job_id}-stokes.vtu"
+                        from solver.mesh import write_output
+
+                        precision = spec_data.get("output_precision") or "float64"
+                        with timer.phase("export"):
+                            saved = write_output(vtu_path, m, precision)
+                            # Snapshots of transient runs
+                            saved += int((metrics or {}).get("output_bytes_saved") or 0)
+                        # estimate L2 error and mass balance
+                        with timer.phase("metrics"):
+                            try:
+                                err = _midline_l2_error_from_mesh(
+                                    m, pdata, h=h, length=length, u_avg=u_avg, ny_hint=ny_used
+                                )
+                            except Exception:
+                                err = None
+                            # Prefer FEM-integrated fluxes if provided; else sample the
+                            # nodes nearest to the boundaries
+                            try:
+                                q_in = (
+                                    float(metrics.get("flux_in"))
+                                    if metrics and metrics.get("flux_in") is not None
+                                    else _flux_from_meshio(
+                                        m, pdata, "inlet", length, ny_hint=ny_used
+                                    )
+                                )
+                                q_out = (
+                                    float(metrics.get("flux_out"))
+                                    if metrics and metrics.get("flux_out") is not None
+                                    else _flux_from_meshio(
+                                        m, pdata, "outlet", length, ny_hint=ny_used
+                                    )
+                                )
+                                mb = abs(q_in - q_out) / max(abs(q_in), 1e-12)
+                            except Exception:
+                                q_in = q_out = mb = float("nan")
+                            from solver.mesh import quality_summary
+
+                            cells = m.cells[0]
+                            mesh_quality = quality_summary(m.points, cells.data, cells.type)
+                        if mesh_path is not None and cached is None and cells.type == "triangle":
+                            with timer.phase("mesh_cache"):
+                                try:
+                                    from solver.mesh import save_mesh
+
+                                    save_mesh(mesh_path, m.points, cells.data, cells.type)
+                                except Exception:
+                                    pass  # caching is best effort
+                        result = {
+                            "name": spec_data.get("name", "job"),
+                            "mesh_cells": int(len(m.points)),
+                            "fields": ["u", "v", "p"],
+                            "l2_error": err,
+                            "flux_in": q_in,
+                            "flux_out": q_out,
+                            "mass_balance_rel_error": mb,
+                            "geometry": {"h_m": h, "l_m": length, "unit": unit, "scale": scale},
+                        }
+                        result["solver"] = solver_path
+                        result.update(_output_report(vtu_path, precision, saved))
+                        result["mesh_quality"] = mesh_quality
+                        if mesh_path is not None:
+                            result["mesh_key"] = mesh_path.stem
+                            result["mesh_cache_hit"] = cached is not None
+                        if metrics and metrics.get("iterations") is not None:
+                            result["solver_iterations"] = int(metrics["iterations"])
+                        if metrics and metrics.get("seconds_per_iteration") is not None:
+                            # Non-Newtonian runs: cost of one viscosity iteration
+                            result["seconds_per_iteration"] = float(
+                                metrics["seconds_per_iteration"]
+                            )
+                        if metrics and metrics.get("steps") is not None:
+                            # Transient runs
+                            for key in (
+                                "steps",
+                                "resumed_from",
+                                "factorizations",
+                                "flow_steady_at",
+                                "mixing_index",
+                                "seconds_per_step",
+                            ):
+                                result[key] = metrics.get(key)
+                        if metrics and metrics.get("peak_rss_mb") is not None:
+                            result["peak_rss_mb"] = float(metrics["peak_rss_mb"])
+                        if metrics and metrics.get("levels"):
+                            # Adaptive runs: DOFs vs. error estimate per refinement level
+                            result["error_estimate"] = float(metrics["error_estimate"])
+                            result["mesh_levels"] = metrics["levels"]
+                        result["timings"] = timer.report()
+                        with timer.phase("artifacts"):
+                            artifacts = _write_artifacts(job_id, result)
+                            artifacts.append(vtu_path.name)
+                            artifacts.extend((metrics or {}).get("files") or [])
+                            # save geometry JSON as artifact if present
+                            try:
+                                import json as _json
+
+                                (base / f"{job_id}-geometry.json").write_text(
+                                    _json.dumps(gjson, indent=2)
+                                )
+                                artifacts.append(f"{job_id}-geometry.json")
+                            except Exception:
+                                pass
+                        return _finish_job(job_id, result, artifacts, timer, solver_path, t0)
+                    except Exception as e:
+                        # Transient failures (out of memory, I/O, a transient run stopped at
+                        # its checkpoint) fail the job so that it is retried
+                        if solver_path in NO_ANALYTIC_FALLBACK or _is_transient(e):
+                            raise
+                        _record_error(str(e))
+                        solver_path = "analytic"
+                        telemetry.record_fallback()
+                        from solver.stokes_rect import (
+                            poiseuille_l2_error,
+                            solve_stokes_poiseuille_rect,
+                        )
+
+                        with timer.phase("solve"):
+                            sol = solve_stokes_poiseuille_rect(
+                                h=h, l=length, mu=mu, u_avg=u_avg, nx=nx_used, ny=ny_used
+                            )
+                        base = _artifacts_dir()
+                        csv_path = base / f"{job_id}-u_mid.csv"
+                        with timer.phase("export"):
+                            mid = sol.u[:, sol.u.shape[1] // 2]
+                            with open(csv_path, "w") as f:
+                                f.write("y,u\n")
+                                for yi, ui in zip(sol.y, mid):
+                                    f.write(f"{yi},{ui}\n")
+                        import json as _json
+
+                        with timer.phase("metrics"):
+                            err = poiseuille_l2_error(sol)
+                            q_in = _flux_from_analytic(sol, "inlet")
+                            q_out = _flux_from_analytic(sol, "outlet")
+                            mb = abs(q_in - q_out) / max(abs(q_in), 1e-12)
+                        summary = {
+                            "h": sol.h,
+                            "l": sol.l,
+                            "u_avg": sol.u_avg,
+                            "l2_error": err,
+                            "flux_in": q_in,
+                            "flux_out": q_out,
+                            "mass_balance_rel_error": mb,
+                        }
+                        result = {
+                            "name": spec_data.get("name", "job"),
+                            "mesh_cells": int(sol.u.size),
+                            "fields": ["u", "v", "p"],
+                            "l2_error": err,
+                            "flux_in": q_in,
+                            "flux_out": q_out,
+                            "mass_balance_rel_error": mb,
+                            "geometry": {"h_m": h, "l_m": length, "unit": unit, "scale": scale},
+                        }
+                        result["solver"] = solver_path
+                        result["timings"] = timer.report()
+                        with timer.phase("artifacts"):
+                            (base / f"{job_id}-summary.json").write_text(
+                                _json.dumps(summary, indent=2)
+                            )
+                            artifacts = _write_artifacts(job_id, result)
+                            # save geometry
+                            try:
+                                (base / f"{job_id}-geometry.json").write_text(
+                                    _json.dumps(gjson, indent=2)
+                                )
+                                artifacts.append(f"{job_id}-geometry.json")
+                            except Exception:
+                                pass
+                        artifacts.extend([csv_path.name, f"{job_id}-summary.json"])
+                        return _finish_job(job_id, result, artifacts, timer, solver_path, t0)
+    except Cancelled as e:
+        # Not a failure of the solver: the worker is free for the next job
+        _record_error(str(e))
+        raise
+    except Exception as e:
+        _record_error(str(e))
+        telemetry.record_job_failure(solver_path)
+        # Re-raise so the job is marked failed in queue mode; inline mode caller will catch
+        raise
+    # Fallback dummy work
+    steps = 5
+    name = spec_data.get("name", "job")
+    result = {"name": name, "mesh_cells": 10000, "fields": ["u", "v", "p"], "solver": solver_path}
+    with timer.phase("solve"):
+        for _ in range(steps):
+            time.sleep(0.2)
+    result["timings"] = timer.report()
+    with timer.phase("artifacts"):
+        artifacts = _write_artifacts(job_id, result)
+    return _finish_job(job_id, result, artifacts, timer, solver_path, t0)
+
+
+def _run_job(spec_data: dict, job_id: str) -> dict:
+    """Run a job, under the profiler when the spec asks for it."""
+    if not spec_data.get("profile"):
+        return _dummy_solver(spec_data, job_id)
+    from .profiling import profile_call
+
+    ret, names = profile_call(
+        _dummy_solver, spec_data, job_id, out_dir=_artifacts_dir(), prefix=job_id
+    )
+    ret["artifacts"] = list(ret.get("artifacts") or []) + names
+    return ret
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -12,8 +12,16 @@ class GeometrySpec(BaseModel):
 
 class MaterialSpec(BaseModel):
     density: float = Field(gt=0)
+    # Newtonian viscosity, power-law consistency K (Pa s^n) or Carreau zero-shear viscosity
     viscosity: float = Field(gt=0)
     diffusivity: float = Field(gt=0)
+    # Generalized-Newtonian fluids (FEM): apparent viscosity from the local shear rate
+    rheology: Literal["newtonian", "power_law", "carreau"] = "newtonian"
+    # Power-law / Carreau exponent n; n < 1 is shear-thinning
+    flow_index: float = Field(1.0, gt=0)
+    # Carreau infinite-shear viscosity and relaxation time (s)
+    viscosity_inf: float = Field(0.0, ge=0)
+    relaxation_time: float = Field(0.0, ge=0)
 
 
 class BoundarySpec(BaseModel):
@@ -21,6 +29,28 @@ class BoundarySpec(BaseModel):
     value: Optional[float] = None
 
 
+class MeshSpec(BaseModel):
+    # Resolution along the channel length (x) and height (y): grid points for FEM, cells for MAC
+    nx: int = Field(64, ge=2)
+    ny: int = Field(32, ge=2)
+    # Adaptive FEM instead of a fixed grid: refine from a coarse mesh until the estimated
+    # relative error reaches target_error or the next level would exceed max_dofs
+    adaptive: bool = False
+    target_error: float = Field(1e-3, gt=0)
+    max_dofs: int = Field(200_000, ge=1000)
+
+
+class TransientSpec(BaseModel):
+    # Simulated time and constant time step (s) from fluid at rest; BDF order 1 or 2
+    t_end: float = Field(gt=0)
+    dt: float = Field(gt=0)
+    order: Literal[1, 2] = 2
+    # Field snapshot every this many steps (0: final state only)
+    snapshot_every: int = Field(10, ge=0)
+    # Restart checkpoint every this many steps
+    checkpoint_every: int = Field(50, ge=1)
+
+
 class JobSpec(BaseModel):
     name: str
     geometry: GeometrySpec
@@ -28,6 +58,26 @@ class JobSpec(BaseModel):
     boundaries: list[BoundarySpec]
     solve_transport: bool = True
     geometry_json: Optional[dict] = None
+    mesh: MeshSpec = Field(default_factory=MeshSpec)
+    # Rectangular channels: "mac" staggered-grid solver, "fem" P2-P1 finite elements;
+    # "auto" picks the fastest solver for the geometry
+    solver: Literal["auto", "fem", "mac"] = "auto"
+    # Links the job to a stored project so its artifacts travel with project archives
+    project_id: Optional[str] = None
+    # Run the job under the profiler and store pstats + collapsed stacks as artifacts
+    profile: bool = False
+    # Sweep whose reduced-order model may answer the job instead of a full solve, when its
+    # error indicator is at most rom_tolerance (relative L2 error of the fields)
+    rom: Optional[str] = None
+    rom_tolerance: float = Field(1e-2, gt=0)
+    # Finished job on the same grid whose pressure seeds the iterative (MAC) solve
+    warm_start: Optional[str] = None
+    # Time-dependent flow (and transport, with solve_transport) instead of steady flow (FEM)
+    transient: Optional[TransientSpec] = None
+    # Anderson acceleration depth of the non-Newtonian viscosity iteration; 0 is plain Picard
+    anderson_depth: int = Field(3, ge=0, le=20)
+    # Precision of the exported fields: "float32" halves VTU artifacts for viewing
+    output_precision: Literal["float64", "float32"] = "float64"
 
 
 class JobStatus(BaseModel):
@@ -35,3 +85,5 @@ class JobStatus(BaseModel):
     status: str
     progress: Optional[float] = None
     error: Optional[str] = None
+    # Reruns left after transient failures, for jobs not yet finished or failed
+    retries_left: Optional[int] = None
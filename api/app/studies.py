@@ -0,0 +1,389 @@
+"""Server-side studies: designs of experiments and optimization over the job queue.
+
+A study is one submission: a base job spec, the parameters to vary (dotted paths into the
+spec with a range) and a design. Grid and Latin-hypercube designs are expanded lazily, one
+point per dispatched job, and at most ``concurrency`` study jobs are in flight at a time.
+The Nelder-Mead optimizer evaluates its initial simplex in parallel and then, each
+iteration, submits the reflection, expansion and both contraction points together as
+one batch, so a step takes one round of parallel solves instead of up to three sequential
+ones. Every job is warm-started from the nearest finished evaluation.
+
+The study state is one JSON document in Redis. ``advance`` moves it forward under a
+Redis lock; it runs when the study is created or polled and from the success and
+failure callbacks of its jobs, so workers stay busy without a client in the loop. Each
+callback rewrites the document with all evaluations, so studies are limited to
+``STUDY_MAX_POINTS`` design points (evaluations of the optimizer).
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import math
+import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import uuid4
+
+_PREFIX = "studies:"
+# Nelder-Mead initial simplex edge and the simplex size below which the search stops, both
+# in normalized parameter space (reflection 1, expansion 2, contractions and shrink 1/2)
+_NM_STEP = 0.25
+_NM_XTOL = 1e-4
+
+
+def _ttl_seconds() -> int:
+    return int(os.getenv("STUDY_TTL_SECONDS", str(7 * 24 * 3600)))
+
+
+def max_points() -> int:
+    return int(os.getenv("STUDY_MAX_POINTS", "1000"))
+
+
+def set_path(spec: dict, path: str, value: Any) -> None:
+    """Set a dotted path such as ``material.viscosity`` or ``boundaries.0.value``."""
+    keys = path.split(".")
+    node: Any = spec
+    for key in keys[:-1]:
+        node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+    last = keys[-1]
+    if isinstance(node, list):
+        node[int(last)] = value
+    else:
+        node[last] = value
+
+
+def parameter_value(param: dict, u: float) -> float:
+    """Map ``u`` in [0, 1] onto the parameter range (geometrically when ``log``)."""
+    lo, hi = float(param["low"]), float(param["high"])
+    if param.get("log"):
+        return math.exp(math.log(lo) + u * (math.log(hi) - math.log(lo)))
+    return lo + u * (hi - lo)
+
+
+def design_size(state: dict) -> int:
+    if state["design"] == "grid":
+        return math.prod(int(p.get("levels", 1)) for p in state["parameters"])
+    if state["design"] == "lhs":
+        return int(state["samples"])
+    return int(state["max_evaluations"])
+
+
+def grid_point(params: list[dict], index: int) -> list[float]:
+    """The ``index``-th grid point (last parameter fastest) without building the grid."""
+    x = [0.0] * len(params)
+    for i in range(len(params) - 1, -1, -1):
+        levels = int(params[i].get("levels", 1))
+        index, k = divmod(index, levels)
+        x[i] = k / (levels - 1) if levels > 1 else 0.5
+    return x
+
+
+@lru_cache(maxsize=16)
+def _lhs_design(d: int, n: int, seed: int):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    perms = np.stack([rng.permutation(n) for _ in range(d)], axis=1)
+    return (perms + rng.random((n, d))) / n
+
+
+def lhs_point(d: int, n: int, seed: int, index: int) -> list[float]:
+    """The ``index``-th of ``n`` Latin-hypercube samples, regenerated from the seed.
+
+    The design is cached, so expanding several points does not rebuild it for each one.
+    """
+    return [float(v) for v in _lhs_design(d, n, seed)[index]]
+
+
+def point_spec(state: dict, x: list[float]) -> tuple[dict, dict[str, float]]:
+    """Job spec and parameter values of a normalized point; mesh sizes are rounded."""
+    spec = copy.deepcopy(state["base"])
+    values = {}
+    for param, u in zip(state["parameters"], x):
+        value = parameter_value(param, u)
+        if param["path"].startswith("mesh."):
+            value = int(round(value))
+        set_path(spec, param["path"], value)
+        values[param["path"]] = value
+    return spec, values
+
+
+def new_study(payload: dict) -> dict:
+    """Initial state of a study from a validated creation payload."""
+    state = {
+        "id": str(uuid4()),
+        "status": "running",
+        "evaluations": [],
+        "next_index": 0,
+        **payload,
+    }
+    if state["design"] == "nelder_mead":
+        state["nm"] = {"phase": "init", "batch": [], "iterations": 0}
+    return state
+
+
+def load(conn, sid: str) -> Optional[dict]:
+    raw = conn.get(_PREFIX + sid)
+    return json.loads(raw) if raw else None
+
+
+def save(conn, state: dict) -> None:
+    conn.set(_PREFIX + state["id"], json.dumps(state), ex=_ttl_seconds())
+
+
+def _objective(state: dict, ret: Any) -> Optional[float]:
+    """Value to minimize from a job's return value; None when it has none."""
+    obj = state.get("objective")
+    if not obj or not isinstance(ret, dict):
+        return None
+    summary = ret.get("summary") or ret.get("result") or {}
+    raw = summary.get(obj["key"])
+    if not isinstance(raw, (int, float)) or not math.isfinite(raw):
+        return None
+    target = obj.get("target")
+    if target is not None:
+        # Calibration: squared relative (or absolute, for a zero target) mismatch
+        scale = abs(target) or 1.0
+        return ((float(raw) - target) / scale) ** 2
+    return float(raw) if obj.get("goal", "minimize") == "minimize" else -float(raw)
+
+
+def _collect(state: dict, queue, outcomes: dict[str, Any]) -> None:
+    """Record finished and failed jobs; ``outcomes`` maps job ids to return values
+    (None for failures) reported by callbacks before RQ updates the job status."""
+    for ev in state["evaluations"]:
+        if ev["status"] != "queued":
+            continue
+        jid = ev["job_id"]
+        if jid in outcomes:
+            ret, ok = outcomes[jid], outcomes[jid] is not None
+        else:
+            job = queue.fetch_job(jid)
+            status = job.get_status() if job is not None else "failed"
+            if status == "finished":
+                ret, ok = job.return_value(), True
+            elif status in {"failed", "stopped", "canceled"}:
+                ret, ok = None, False
+            else:
+                continue
+        ev["status"] = "finished" if ok else "failed"
+        ev["value"] = _objective(state, ret) if ok else None
+
+
+def _inflight(state: dict) -> int:
+    return sum(1 for ev in state["evaluations"] if ev["status"] == "queued")
+
+
+def _add(state: dict, x: list[float], tag: str) -> int:
+    x = [min(1.0, max(0.0, float(v))) for v in x]
+    state["evaluations"].append({"x": x, "tag": tag, "status": "pending", "value": None})
+    return len(state["evaluations"]) - 1
+
+
+def _fill_design(state: dict) -> None:
+    """Expand just enough design points to keep ``concurrency`` jobs in flight."""
+    total = design_size(state)
+    pending = sum(1 for ev in state["evaluations"] if ev["status"] == "pending")
+    while state["next_index"] < total and _inflight(state) + pending < state["concurrency"]:
+        i = state["next_index"]
+        if state["design"] == "grid":
+            x = grid_point(state["parameters"], i)
+        else:
+            x = lhs_point(len(state["parameters"]), total, int(state.get("seed", 0)), i)
+        _add(state, x, f"point {i}")
+        state["next_index"] += 1
+        pending += 1
+
+
+def _value(ev: dict) -> float:
+    return ev["value"] if ev["value"] is not None else math.inf
+
+
+def _nm_propose(state: dict) -> None:
+    """Submit the next reflection batch, or finish when the search has converged."""
+    nm = state["nm"]
+    simplex, values = nm["simplex"], nm["values"]
+    order = sorted(range(len(simplex)), key=lambda i: values[i])
+    nm["simplex"] = simplex = [simplex[i] for i in order]
+    nm["values"] = values = [values[i] for i in order]
+    best, worst = simplex[0], simplex[-1]
+    diameter = max(max(abs(a - b) for a, b in zip(v, best)) for v in simplex[1:])
+    room = state["max_evaluations"] - len(state["evaluations"])
+    if diameter < _NM_XTOL or room < 4:
+        nm["phase"] = "done"
+        return
+    d = len(best)
+    c = [sum(v[k] for v in simplex[:-1]) / d for k in range(d)]
+    nm["phase"] = "reflect"
+    nm["iterations"] += 1
+    nm["batch"] = [
+        _add(state, [c[k] + t * (c[k] - worst[k]) for k in range(d)], tag)
+        for t, tag in ((1.0, "reflect"), (2.0, "expand"), (0.5, "outside"), (-0.5, "inside"))
+    ]
+
+
+def _nelder_mead_step(state: dict) -> None:
+    nm = state["nm"]
+    evs = state["evaluations"]
+    if nm["phase"] == "init" and not nm["batch"]:
+        d = len(state["parameters"])
+        x0 = [0.5] * d
+        nm["batch"] = [_add(state, x0, "simplex")]
+        for k in range(d):
+            x = list(x0)
+            x[k] += _NM_STEP
+            nm["batch"].append(_add(state, x, "simplex"))
+        return
+    if nm["phase"] == "done":
+        return
+    if any(evs[i]["status"] in {"pending", "queued"} for i in nm["batch"]):
+        return
+    batch = [evs[i] for i in nm["batch"]]
+    if nm["phase"] == "init":
+        nm["simplex"] = [ev["x"] for ev in batch]
+        nm["values"] = [_value(ev) for ev in batch]
+    elif nm["phase"] == "shrink":
+        nm["simplex"][1:] = [ev["x"] for ev in batch]
+        nm["values"][1:] = [_value(ev) for ev in batch]
+    else:
+        fr, fe, fo, fi = (_value(ev) for ev in batch)
+        values = nm["values"]
+        accept = None
+        if fr < values[0]:
+            accept = 1 if fe < fr else 0
+        elif fr < values[-2]:
+            accept = 0
+        elif fr < values[-1]:
+            accept = 2 if fo <= fr else None
+        else:
+            accept = 3 if fi < values[-1] else None
+        if accept is not None:
+            nm["simplex"][-1] = batch[accept]["x"]
+            nm["values"][-1] = _value(batch[accept])
+        else:
+            best = nm["simplex"][0]
+            nm["phase"] = "shrink"
+            nm["batch"] = [
+                _add(state, [b + 0.5 * (a - b) for a, b in zip(v, best)], "shrink")
+                for v in nm["simplex"][1:]
+            ]
+            return
+    _nm_propose(state)
+
+
+def _warm_start(state: dict, x: list[float]) -> Optional[str]:
+    """Job id of the finished evaluation nearest to ``x``."""
+    best, best_d = None, math.inf
+    for ev in state["evaluations"]:
+        if ev["status"] != "finished":
+            continue
+        dist = sum((a - b) ** 2 for a, b in zip(ev["x"], x))
+        if dist < best_d:
+            best, best_d = ev["job_id"], dist
+    return best
+
+
+def _dispatch(state: dict, queue) -> None:
+    from rq import Callback
+
+    for ev in state["evaluations"]:
+        if _inflight(state) >= state["concurrency"]:
+            break
+        if ev["status"] != "pending":
+            continue
+        spec, values = point_spec(state, ev["x"])
+        warm = _warm_start(state, ev["x"])
+        if warm:
+            spec["warm_start"] = warm
+        jid = str(uuid4())
+        queue.enqueue(
+            "workers.tasks.runjob",
+            spec,
+            jid,
+            job_id=jid,
+            job_timeout=600,
+            meta={"study_id": state["id"]},
+            on_success=Callback("workers.tasks.study_job_succeeded"),
+            on_failure=Callback("workers.tasks.study_job_failed"),
+        )
+        ev.update(job_id=jid, params=values, status="queued")
+
+
+def _is_done(state: dict) -> bool:
+    if any(ev["status"] in {"pending", "queued"} for ev in state["evaluations"]):
+        return False
+    if state["design"] == "nelder_mead":
+        return state["nm"]["phase"] == "done"
+    return state["next_index"] >= design_size(state)
+
+
+@contextmanager
+def _locked(conn, name: str, timeout: int = 60, wait: float = 30.0):
+    """Plain SET NX lock; unlike ``Redis.lock`` it needs no Lua scripting on the server."""
+    token = uuid4().hex
+    deadline = time.monotonic() + wait
+    while not conn.set(name, token, nx=True, ex=timeout):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Could not acquire {name}")
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        # Only release our own lock; an expired one may have been taken over
+        if conn.get(name) == token.encode():
+            conn.delete(name)
+
+
+def advance(conn, sid: str, outcomes: Optional[dict[str, Any]] = None) -> Optional[dict]:
+    """Collect finished jobs, grow the design or optimizer, and enqueue what fits."""
+    from rq import Queue
+
+    with _locked(conn, f"{_PREFIX}{sid}:lock"):
+        state = load(conn, sid)
+        if state is None or state["status"] != "running":
+            return state
+        queue = Queue("jobs", connection=conn)
+        _collect(state, queue, outcomes or {})
+        if state["design"] == "nelder_mead":
+            _nelder_mead_step(state)
+        else:
+            _fill_design(state)
+        _dispatch(state, queue)
+        if _is_done(state):
+            state["status"] = "finished"
+        save(conn, state)
+    return state
+
+
+def summary(state: dict) -> dict[str, Any]:
+    evs = state["evaluations"]
+    counts = {
+        s: sum(1 for ev in evs if ev["status"] == s) for s in ("queued", "finished", "failed")
+    }
+    scored = [ev for ev in evs if ev["status"] == "finished" and ev["value"] is not None]
+    best = min(scored, key=lambda ev: ev["value"]) if scored else None
+    out: dict[str, Any] = {
+        "id": state["id"],
+        "name": state["name"],
+        "design": state["design"],
+        "status": state["status"],
+        "size": design_size(state),
+        "submitted": sum(1 for ev in evs if ev.get("job_id")),
+        **counts,
+        "best": (
+            {"job_id": best["job_id"], "params": best["params"], "objective": best["value"]}
+            if best
+            else None
+        ),
+        "evaluations": [
+            {k: ev.get(k) for k in ("job_id", "tag", "params", "status", "value")}
+            for ev in evs
+            if ev.get("job_id")
+        ],
+    }
+    if state["design"] == "nelder_mead":
+        out["iterations"] = state["nm"]["iterations"]
+    return out
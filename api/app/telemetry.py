@@ -0,0 +1,243 @@
+"""Prometheus metrics shared by the API process and the RQ workers.
+
+``prometheus_client`` is optional: without it every recording helper is a no-op and
+``render`` raises ``RuntimeError``. Worker horses are forked per job, so the worker sets
+``PROMETHEUS_MULTIPROC_DIR`` before this module is imported and the exporter aggregates
+the per-process files; set the same variable for the API when it runs several processes.
+A worker's horses run one at a time, so they share one set of files named after the
+worker (``horse_process_name``) instead of leaving a set per job behind, and the worker
+marks them dead when each horse exits. Queue depth is read from Redis at scrape time
+rather than pushed.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+try:
+    import prometheus_client as _prom
+except Exception:  # pragma: no cover - optional dependency
+    _prom = None  # type: ignore
+
+# Name of this process's metric files in multiprocess mode; None uses the pid
+_PROCESS_NAME: Optional[str] = None
+
+
+def _process_identifier() -> str:
+    return _PROCESS_NAME or str(os.getpid())
+
+
+if _prom is not None and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    from prometheus_client import values as _values
+
+    # Must be in place before the metrics below are created
+    _values.ValueClass = _values.MultiProcessValue(_process_identifier)
+
+# Job durations range from sub-second analytic solves to multi-minute FEM runs
+_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+_WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+if _prom is not None:
+    JOB_DURATION = _prom.Histogram(
+        "microfluidic_job_duration_seconds",
+        "Wall time of a job run by solver path",
+        ["path"],
+        buckets=_DURATION_BUCKETS,
+    )
+    JOB_FAILURES = _prom.Counter(
+        "microfluidic_job_failures_total", "Jobs that raised, by solver path", ["path"]
+    )
+    SOLVER_FALLBACKS = _prom.Counter(
+        "microfluidic_solver_fallbacks_total",
+        "Numerical solves that fell back to a simpler solver, by the solver taking over",
+        ["to"],
+    )
+    QUEUE_WAIT = _prom.Histogram(
+        "microfluidic_job_queue_wait_seconds",
+        "Time between enqueue and start of a job",
+        ["queue"],
+        buckets=_WAIT_BUCKETS,
+    )
+    CACHE_REQUESTS = _prom.Counter(
+        "microfluidic_cache_requests_total",
+        "Cache lookups by cache and outcome",
+        ["cache", "result"],
+    )
+    ARTIFACT_BYTES = _prom.Counter(
+        "microfluidic_artifact_bytes_written_total", "Bytes of job artifacts written", ["kind"]
+    )
+
+_QUEUE_COLLECTOR: Optional["_QueueCollector"] = None
+# Redis clients of the queue collectors by URL, reused across scrapes
+_REDIS_CONNS: dict[str, Any] = {}
+
+
+def enabled() -> bool:
+    return _prom is not None
+
+
+def horse_process_name(worker_pid: int) -> str:
+    """Metric file name shared by the successive job processes of one worker."""
+    return f"horse-{worker_pid}"
+
+
+def set_process_name(name: str) -> None:
+    """Name this process's metric files (called in a freshly forked job process)."""
+    global _PROCESS_NAME
+    _PROCESS_NAME = name
+
+
+def mark_process_dead(name: str) -> None:
+    """Drop the live gauges of an exited process; a no-op outside multiprocess mode."""
+    if _prom is None or not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(name)
+
+
+def observe_job(path: str, seconds: float) -> None:
+    if _prom is not None:
+        JOB_DURATION.labels(path=path).observe(seconds)
+
+
+def record_job_failure(path: str) -> None:
+    if _prom is not None:
+        JOB_FAILURES.labels(path=path).inc()
+
+
+def record_fallback(to: str = "analytic") -> None:
+    if _prom is not None:
+        SOLVER_FALLBACKS.labels(to=to).inc()
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    if _prom is not None:
+        CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def record_artifacts(base: Path, names: Iterable[str]) -> None:
+    """Count the on-disk size of the named artifacts, labelled by file extension."""
+    if _prom is None:
+        return
+    for name in names:
+        try:
+            size = (base / name).stat().st_size
+        except OSError:
+            continue
+        kind = Path(name).suffix.lstrip(".") or "other"
+        ARTIFACT_BYTES.labels(kind=kind).inc(size)
+
+
+def observe_queue_wait(job: Any) -> None:
+    """Record how long an RQ job waited between enqueue and start."""
+    if _prom is None or job is None or getattr(job, "enqueued_at", None) is None:
+        return
+    enqueued = job.enqueued_at
+    started = getattr(job, "started_at", None)
+    if started is None:
+        started = datetime.now(timezone.utc if enqueued.tzinfo else None)
+    if (started.tzinfo is None) != (enqueued.tzinfo is None):
+        # rq has stored both naive and aware UTC timestamps across versions
+        started = started.replace(tzinfo=None)
+        enqueued = enqueued.replace(tzinfo=None)
+    wait = max((started - enqueued).total_seconds(), 0.0)
+    QUEUE_WAIT.labels(queue=str(getattr(job, "origin", "") or "jobs")).observe(wait)
+
+
+class _QueueCollector:
+    """Reports queued and running job counts per RQ queue, read from Redis at scrape time."""
+
+    def __init__(
+        self, redis_url: Optional[str] = None, queue_names: Optional[list[str]] = None
+    ) -> None:
+        # Unset values are read from the environment on every scrape
+        self.redis_url = redis_url
+        self.queue_names = queue_names
+
+    def _families(self):
+        from prometheus_client.core import GaugeMetricFamily
+
+        depth = GaugeMetricFamily(
+            "microfluidic_queue_depth", "Jobs waiting in the queue", labels=["queue"]
+        )
+        running = GaugeMetricFamily(
+            "microfluidic_queue_started_jobs", "Jobs currently running", labels=["queue"]
+        )
+        return depth, running
+
+    def describe(self):
+        return list(self._families())
+
+    def collect(self):
+        depth, running = self._families()
+        try:
+            from rq import Queue
+
+            conn = _redis_conn(self.redis_url or _redis_url())
+            for name in self.queue_names or _queue_names():
+                q = Queue(name, connection=conn)
+                depth.add_metric([name], q.count)
+                running.add_metric([name], q.started_job_registry.count)
+        except Exception:
+            # Redis unreachable (e.g. inline mode): export the families without samples
+            pass
+        yield depth
+        yield running
+
+
+def _queue_names() -> list[str]:
+    raw = os.getenv("METRICS_QUEUES") or os.getenv("QUEUE", "jobs")
+    return [q.strip() for q in raw.split(",") if q.strip()]
+
+
+def _redis_url() -> str:
+    return os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def _redis_conn(url: str):
+    conn = _REDIS_CONNS.get(url)
+    if conn is None:
+        from redis import Redis
+
+        conn = Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=1.0)
+        _REDIS_CONNS[url] = conn
+    return conn
+
+
+def _registry():
+    """Registry to expose: per-process metrics, or the multiprocess aggregate."""
+    global _QUEUE_COLLECTOR
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_QueueCollector())
+        return registry
+    if _QUEUE_COLLECTOR is None:
+        _QUEUE_COLLECTOR = _QueueCollector()
+        _prom.REGISTRY.register(_QUEUE_COLLECTOR)
+    return _prom.REGISTRY
+
+
+def render() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    if _prom is None:
+        raise RuntimeError("prometheus_client not installed")
+    return _prom.generate_latest(_registry()), _prom.CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter(port: int, redis_url: str, queue_names: list[str]) -> None:
+    """Serve the multiprocess aggregate of all worker horses on ``port``."""
+    if _prom is None:
+        return
+    from prometheus_client import CollectorRegistry, multiprocess
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    registry.register(_QueueCollector(redis_url, queue_names))
+    _prom.start_http_server(port, registry=registry)
@@ -0,0 +1,38 @@
+import pytest
+from api.app import limits
+from api.app.main import app
+from api.app.routers import jobs
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(autouse=True)
+def _fresh_rate_limits():
+    # All test clients share one address, so start each test with full buckets
+    limits.reset()
+    yield
+    limits.reset()
+
+
+@pytest.fixture
+def queue_client(monkeypatch, tmp_path):
+    """API client on a fake Redis queue, and ``drain(*mixins)`` to run a burst worker.
+
+    Artifacts go to ``tmp_path``; ``mixins`` are placed in front of the worker class.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    from rq import Queue, SimpleWorker
+
+    class Worker(SimpleWorker):
+        def _install_signal_handlers(self):
+            pass
+
+    conn = fakeredis.FakeRedis()
+    monkeypatch.delenv("INLINE_JOB_EXEC", raising=False)
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "_REDIS_OVERRIDE", conn)
+
+    def drain(*mixins: type) -> None:
+        worker = type("Worker", (*mixins, Worker), {}) if mixins else Worker
+        worker([Queue("jobs", connection=conn)], connection=conn).work(burst=True)
+
+    return TestClient(app), drain
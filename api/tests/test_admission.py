@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import pytest
+from api.app import admission
+from api.app.main import app
+from api.app.routers import jobs
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'workers'
+
+PAYLOAD = {
+    "name": "sized",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+}
+
+
+def test_fem_dof_estimate_matches_solver():
+    from solver.stokes_fem import solve_rect_stokes_fem
+
+    _m, _pdata, metrics = solve_rect_stokes_fem(1e-4, 1e-3, 1e-3, 1e-3, 16, 8, with_metrics=True)
+    assert metrics["dofs"] == admission.fem_dofs(16, 8)
+    small = admission.estimate_memory_mb("fem", 64, 32)
+    assert small < admission.estimate_memory_mb("fem", 128, 64) < 10 * small
+
+
+def test_api_rejects_oversized_jobs(monkeypatch):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("JOB_MAX_MEMORY_MB", "4096")
+    client = TestClient(app)
+    huge = {**PAYLOAD, "solver": "fem", "mesh": {"nx": 2000, "ny": 1000}}
+    resp = client.post("/api/v1/jobs", json=huge)
+    assert resp.status_code == 413
+    assert "2000x1000 mesh" in resp.json()["detail"]
+
+    variants = [{}, {"solver": "fem", "mesh": {"nx": 2000, "ny": 1000}}]
+    sweep = {"name": "s", "base": PAYLOAD, "variants": variants}
+    resp = client.post("/api/v1/sweeps", json=sweep)
+    assert resp.status_code == 413
+    assert resp.json()["detail"].startswith("Variant 1:")
+
+
+def test_worker_refuses_job_over_budget(monkeypatch, tmp_path):
+    from workers import tasks
+
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("WORKER_MEMORY_BUDGET_MB", "50")
+    with pytest.raises(admission.MemoryBudgetExceeded):
+        tasks.runjob(dict(PAYLOAD), "big")
+    assert "memory budget of 50 MB" in (tmp_path / "big-error.txt").read_text()
+    assert not list(tmp_path.glob("big-result.json"))
+
+
+def test_worker_defers_job_when_memory_is_short(queue_client, monkeypatch):
+    from workers.worker import AdmissionMixin
+
+    _client, drain = queue_client
+    monkeypatch.delenv("WORKER_MEMORY_BUDGET_MB", raising=False)
+    monkeypatch.setattr(admission, "worker_budget_mb", lambda: 4096.0)
+    monkeypatch.setattr(admission, "available_memory_mb", lambda: 10.0)
+    queue = jobs._get_queue()
+    job = queue.enqueue("workers.tasks.runjob", dict(PAYLOAD), "deferred")
+    drain(AdmissionMixin)
+    job.refresh()
+    assert job.get_status() == "scheduled"
+    assert job.meta["admission_deferrals"] == 1
+    assert job.id in queue.scheduled_job_registry.get_job_ids()
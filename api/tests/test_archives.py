@@ -0,0 +1,83 @@
+import io
+import zipfile
+
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+JOB = {
+    "name": "archived",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+}
+
+
+def test_project_archive_roundtrip(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path / "projects"))
+    client = TestClient(app)
+    pid = client.post("/api/v1/projects", json={"name": "chip", "data": {"a": 1}}).json()["id"]
+    job_id = client.post("/api/v1/jobs", json={**JOB, "project_id": pid}).json()["id"]
+
+    first = client.get(f"/api/v1/projects/{pid}/export")
+    assert first.status_code == 200
+    assert first.content == client.get(f"/api/v1/projects/{pid}/export").content
+
+    zf = zipfile.ZipFile(io.BytesIO(first.content))
+    names = zf.namelist()
+    assert names[0] == "project.json" and names[-1] == "manifest.json"
+    assert f"jobs/{job_id}/{job_id}-result.json" in names
+
+    # Re-importing on the same server finds every artifact already present
+    files = {"file": ("chip.mfproj.zip", first.content, "application/zip")}
+    res = client.post("/api/v1/projects/import", files=files).json()
+    assert res["imported"] == 0 and res["skipped"] == len(names) - 2
+    assert res["project"]["id"] != pid
+    assert res["project"]["data"] == {"a": 1}
+
+    (tmp_path / "artifacts" / f"{job_id}-result.json").unlink()
+    res = client.post("/api/v1/projects/import", files=files).json()
+    assert res["imported"] == 1
+    assert (tmp_path / "artifacts" / f"{job_id}-result.json").exists()
+
+
+def test_import_never_overwrites_other_content(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path / "projects"))
+    client = TestClient(app)
+    pid = client.post("/api/v1/projects", json={"name": "chip", "data": {}}).json()["id"]
+    job_id = client.post("/api/v1/jobs", json={**JOB, "project_id": pid}).json()["id"]
+    archive = client.get(f"/api/v1/projects/{pid}/export").content
+    manifest = zipfile.ZipFile(io.BytesIO(archive)).read("manifest.json")
+    assert b'"python"' not in manifest and b'"machine"' not in manifest
+
+    # Another result under the same name: the archived job is imported under a new id
+    ours = tmp_path / "artifacts" / f"{job_id}-result.json"
+    ours.write_text('{"other": true}')
+    files = {"file": ("chip.mfproj.zip", archive, "application/zip")}
+    res = client.post("/api/v1/projects/import", files=files).json()
+    new_id = res["remapped"][job_id]
+    assert ours.read_text() == '{"other": true}'
+    assert res["skipped"] == 0 and res["imported"] == len(list(ours.parent.glob(f"{new_id}-*")))
+    exported = client.get(f"/api/v1/projects/{res['project']['id']}/export").content
+    names = zipfile.ZipFile(io.BytesIO(exported)).namelist()
+    assert f"jobs/{new_id}/{new_id}-result.json" in names
+    assert not any(job_id in n for n in names)
+
+
+def test_import_ignores_unsafe_project_ids(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path / "store" / "projects"))
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path / "store" / "artifacts"))
+    client = TestClient(app)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("project.json", '{"id": "../../escaped", "name": "x", "data": {}}')
+        zf.writestr("manifest.json", '{"format": "mfproj", "schema_version": 1, "entries": []}')
+    files = {"file": ("x.mfproj.zip", buf.getvalue(), "application/zip")}
+    res = client.post("/api/v1/projects/import", files=files)
+    assert res.status_code == 200
+    pid = res.json()["project"]["id"]
+    assert "/" not in pid and (tmp_path / "store" / "projects" / f"{pid}.json").exists()
+    assert not list(tmp_path.rglob("escaped*"))
@@ -0,0 +1,39 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'benchmarks'
+
+from benchmarks.solver_scaling import compare_runs, run_case  # noqa: E402
+
+
+def _run(assembly: float, factorize: float, peak: float) -> dict:
+    return {
+        "cases": [
+            {
+                "solver": "fem",
+                "nx": 64,
+                "ny": 16,
+                "phases": {"assembly": assembly, "factorize": factorize, "mesh": 0.0001},
+                "peak_rss_mb": peak,
+            }
+        ]
+    }
+
+
+def test_compare_flags_phase_and_memory_regressions():
+    base = _run(assembly=1.0, factorize=2.0, peak=100.0)
+    assert compare_runs(base, _run(1.1, 2.2, 110.0), threshold=0.25, min_seconds=0.01) == []
+    problems = compare_runs(base, _run(1.0, 3.0, 200.0), threshold=0.25, min_seconds=0.01)
+    assert len(problems) == 2
+    assert problems[0].startswith("fem 64x16 factorize")
+    # Noise in sub-threshold phases is ignored
+    noisy = _run(1.0, 2.0, 100.0)
+    noisy["cases"][0]["phases"]["mesh"] = 0.005
+    assert compare_runs(base, noisy, threshold=0.25, min_seconds=0.01) == []
+
+
+def test_run_case_reports_phases():
+    rec = run_case("analytic", 16, 8)
+    assert rec["dofs"] == 3 * 16 * 8
+    assert "solve" in rec["phases"]
+    assert rec["peak_rss_mb"] > 0
@@ -0,0 +1,70 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from api.app.routers import jobs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'workers'
+
+from solver.instrument import Cancelled, PhaseTimer  # noqa: E402
+from solver.stokes_mac import solve_mac  # noqa: E402
+
+BASE = {
+    "name": "cancel",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+    "mesh": {"nx": 32, "ny": 16},
+}
+
+
+def test_solver_stops_at_first_checkpoint_after_cancel():
+    polls = []
+
+    def cancelled() -> bool:
+        polls.append(time.monotonic())
+        return len(polls) > 2
+
+    timer = PhaseTimer(cancelled, poll_seconds=0.0)
+    with pytest.raises(Cancelled):
+        solve_mac(h=1e-4, l=1e-3, mu=1e-3, u_avg=1e-3, nx=64, ny=32, timer=timer)
+    # Polled entering factorize and solve, then stopped in the first pressure iteration;
+    # later checkpoints raise without polling again
+    assert len(polls) == 3
+    with pytest.raises(Cancelled):
+        timer.checkpoint()
+    assert len(polls) == 3
+
+
+def test_cancel_sweep_drops_waiting_jobs(queue_client):
+    client, drain = queue_client
+    variants = [{"material": {**BASE["material"], "viscosity": 1e-3 * (i + 1)}} for i in range(5)]
+    sweep = client.post("/api/v1/sweeps", json={"name": "s", "base": BASE, "variants": variants})
+    sid = sweep.json()["id"]
+    cancel = client.post(f"/api/v1/sweeps/{sid}/cancel").json()
+    assert cancel["canceled"] == 5 and cancel["canceling"] == 0
+    drain()  # nothing left to run
+    status = client.get(f"/api/v1/sweeps/{sid}").json()
+    assert status["done"] and {j["status"] for j in status["jobs"]} == {"canceled"}
+    job_id = status["jobs"][0]["id"]
+    assert client.post(f"/api/v1/jobs/{job_id}/cancel").status_code == 409
+    assert client.post("/api/v1/jobs/missing/cancel").status_code == 404
+
+
+def test_cancel_running_job_stops_it(queue_client):
+    client, drain = queue_client
+    job_id = client.post("/api/v1/jobs", json=BASE).json()["id"]
+    # As if a worker had picked it up: cancelling now signals instead of dequeuing
+    job = jobs._get_queue().fetch_job(job_id)
+    job.set_status("started")
+    resp = client.post(f"/api/v1/jobs/{job_id}/cancel").json()
+    assert resp["status"] == "canceling"
+    job.set_status("queued")
+    drain()
+    status = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert status["status"] == "canceled" and status["error"] == "Job was cancelled"
+    # Resuming clears the request, so the rerun completes
+    assert client.post(f"/api/v1/jobs/{job_id}/resume").status_code == 200
+    drain()
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "finished"
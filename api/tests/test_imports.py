@@ -0,0 +1,116 @@
+import io
+
+import pytest
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+
+def _dxf_bytes(build) -> bytes:
+    ezdxf = pytest.importorskip("ezdxf")
+    doc = ezdxf.new()
+    build(doc.modelspace())
+    buf = io.StringIO()
+    doc.write(buf)
+    return buf.getvalue().encode()
+
+
+def test_import_dxf_single_pass():
+    def build(msp):
+        msp.add_line((0, 0), (100, 0), dxfattribs={"layer": "CH"})
+        msp.add_lwpolyline([(0, 0), (20, 0), (20, 5)], dxfattribs={"layer": "IN"})
+        msp.add_circle((0, 0), 3)
+
+    data = _dxf_bytes(build)
+    for _ in range(2):
+        client = TestClient(app)
+        resp = client.post(
+            "/api/v1/import/dxf",
+            files={"file": ("chip.dxf", data, "application/dxf")},
+            data={"layer_types": '{"IN": "inlet"}', "normalize": "false"},
+        )
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert [s["type"] for s in body["shapes"]] == ["rect", "inlet"]
+        assert body["layers"] == ["CH", "IN"]
+        assert any("CIRCLE" in w for w in body["warnings"])
+
+
+def test_import_dxf_size_limit(monkeypatch):
+    data = _dxf_bytes(lambda msp: msp.add_line((0, 0), (1, 0)))
+    monkeypatch.setenv("DXF_MAX_BYTES", "100")
+    client = TestClient(app)
+    resp = client.post("/api/v1/import/dxf", files={"file": ("big.dxf", data)})
+    assert resp.status_code == 413
+
+
+def test_import_dxf_entity_limit_applies_before_parsing(monkeypatch):
+    from api.app.routers import imports
+
+    def lines(n):
+        return _dxf_bytes(lambda msp: [msp.add_line((i, 0), (i, 1)) for i in range(n)])
+
+    small, big = io.BytesIO(lines(3)), io.BytesIO(lines(8))
+    assert imports._count_dxf_entities(big, 10**6) - imports._count_dxf_entities(small, 10**6) == 5
+    assert imports._count_dxf_entities(big, 2) == 3  # stops once past the limit
+
+    parsed = []
+    monkeypatch.setattr(imports, "_read_dxf", lambda stream: parsed.append(stream))
+    monkeypatch.setenv("DXF_MAX_ENTITIES", "5")
+    client = TestClient(app)
+    resp = client.post("/api/v1/import/dxf", files={"file": ("big.dxf", lines(8))})
+    assert resp.status_code == 413 and "more than 5 entities" in resp.json()["detail"]
+    assert not parsed
+
+
+def test_import_dxf_builds_channel_graph():
+    def build(msp):
+        # A straight channel drawn as 4 pieces with a T branch ending on its interior
+        for x in range(4):
+            msp.add_line((x * 10, 0), (x * 10 + 10 + 1e-7, 0), dxfattribs={"layer": "CH"})
+        msp.add_lwpolyline([(15, 0), (15, 20), (30, 35)], dxfattribs={"layer": "CH"})
+        msp.add_lwpolyline([(0, -5), (5, -5), (5, 5), (0, 5)], close=True)
+
+    client = TestClient(app)
+    resp = client.post(
+        "/api/v1/import/dxf",
+        files={"file": ("chip.dxf", _dxf_bytes(build))},
+        data={"snap_tolerance": "1e-3"},
+    )
+    assert resp.status_code == 200, resp.text
+    graph = resp.json()["graph"]
+    assert graph["stats"]["segments_in"] == 6
+    # Trunk split at the T into two edges, branch keeps its bend: 4 edges, 1 junction
+    assert graph["stats"]["edges"] == 4
+    kinds = sorted(n["kind"] for n in graph["nodes"])
+    assert kinds == ["bend", "end", "end", "end", "junction"]
+    shapes = resp.json()["shapes"]
+    assert len(shapes) == 5  # 4 channel edges + the closed outline
+    diagonal = [s for s in shapes if abs(s.get("rotation", 0) - 45.0) < 1e-6]
+    assert len(diagonal) == 1
+
+
+def test_t_junctions_on_long_diagonal_edge(monkeypatch):
+    from api.app import geometry
+    from api.app.geometry import Segment, _segment_cells, build_channel_graph
+
+    cells = list(_segment_cells((0.5, 0.5), (7.5, 3.2), 1.0))
+    assert cells[0] == (0, 0) and cells[-1] == (7, 3) and len(cells) == 7 + 3 + 1
+    assert all(abs(i1 - i0) + abs(j1 - j0) == 1 for (i0, j0), (i1, j1) in zip(cells, cells[1:]))
+
+    visited = []
+
+    def counted(a, b, size):
+        for key in _segment_cells(a, b, size):
+            visited.append(key)
+            yield key
+
+    monkeypatch.setattr(geometry, "_segment_cells", counted)
+    # One edge spanning the drawing among many short ones: hashed along its path, not
+    # into every cell of its bounding box (about 4 million cells for the diagonal)
+    segments = [Segment(float(i), 0.0, i + 1.0, 0.0, 0.1) for i in range(2000)]
+    segments.append(Segment(0.0, 0.0, 2000.0, 2000.0, 0.1))
+    segments.append(Segment(1000.0, 1000.0, 1500.0, 1000.0, 0.1))
+    graph = build_channel_graph(segments)
+    assert 0 < len(visited) < 4 * (2000 + 2 * 2000 + 500)
+    # Bottom line, the diagonal split at the branch into two, and the branch
+    assert graph.stats["edges"] == 4 and graph.stats["junctions"] == 1
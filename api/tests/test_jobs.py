@@ -19,3 +19,88 @@ def test_create_job_inline():
     assert resp.status_code == 200
     data = resp.json()
     assert "id" in data and data["status"] in {"queued", "finished"}
+
+
+def test_job_result_streamed_from_artifact_store(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    from api.app.routers import jobs
+
+    client = TestClient(app)
+    payload = {
+        "name": "stored",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+    }
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    # Only a summary and a pointer are kept in the job payload
+    kept = jobs._MEM_RESULTS[job_id]
+    assert kept["result_artifact"] == f"{job_id}-result.json"
+    assert "geometry" not in kept["summary"]
+
+    full = client.get(f"/api/v1/jobs/{job_id}/result").json()
+    assert full["result"]["name"] == "stored"
+    assert "geometry" in full["result"]
+    assert f"{job_id}-result.json" in full["artifacts"]
+
+    part = client.get(f"/api/v1/jobs/{job_id}/result", params={"fields": "name,missing"}).json()
+    assert part["result"] == {"name": "stored"}
+
+
+def test_job_result_reports_phase_timings(monkeypatch, tmp_path):
+    import json
+
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    client = TestClient(app)
+    payload = {
+        "name": "timed",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+    }
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    full = client.get(f"/api/v1/jobs/{job_id}/result").json()
+    phases = full["result"]["timings"]["phases"]
+    assert "solve" in phases and "metrics" in phases
+    assert all(p["seconds"] >= 0.0 and p["calls"] >= 1 for p in phases.values())
+    assert f"{job_id}-timings.json" in full["artifacts"]
+    # The artifact is written last, so it also covers artifact writing
+    report = json.loads((tmp_path / f"{job_id}-timings.json").read_text())
+    assert "artifacts" in report["phases"]
+
+    monkeypatch.setenv("JOB_TIMINGS", "0")
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    full = client.get(f"/api/v1/jobs/{job_id}/result").json()
+    assert full["result"]["timings"] == {}
+    assert f"{job_id}-timings.json" not in full["artifacts"]
+
+
+def test_job_profile_artifacts(monkeypatch, tmp_path):
+    import pstats
+
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("JOB_PROFILE_INTERVAL_MS", "1")
+    client = TestClient(app)
+    payload = {
+        "name": "profiled",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+    }
+    job_id = client.post("/api/v1/jobs", json=payload, headers={"X-Profile-Job": "1"}).json()["id"]
+    names = {a["name"] for a in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["artifacts"]}
+    assert {f"{job_id}-profile.pstats", f"{job_id}-profile.collapsed.txt"} <= names
+
+    stats = pstats.Stats(str(tmp_path / f"{job_id}-profile.pstats"))
+    assert any(func[2] == "solve_mac" for func in stats.stats)
+    resp = client.get(f"/api/v1/jobs/{job_id}/download/{job_id}-profile.collapsed.txt")
+    lines = resp.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert lines[0].startswith("_dummy_solver (runner.py:")
+
+    # Without the flag no profile is captured
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    assert not list(tmp_path.glob(f"{job_id}-profile.*"))
@@ -0,0 +1,100 @@
+import math
+
+import pytest
+from api.app import limits
+from api.app.main import app
+from api.app.routers import jobs
+from fastapi.testclient import TestClient
+
+BASE = {
+    "name": "limited",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+}
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = limits.TokenBucket(rate=2.0, burst=3.0, now=0.0)
+    assert [bucket.take(1.0, now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take(1.0, now=0.0) == pytest.approx(0.5)
+    assert bucket.take(1.0, now=0.5) == 0.0
+    # A batch above the burst can never be granted and takes nothing
+    assert bucket.take(4.0, now=2.0) == math.inf
+    assert bucket.take(3.0, now=2.0) == 0.0
+    assert limits.retry_after(0.2) == "1" and limits.retry_after(2.5) == "3"
+
+
+def test_status_polls_are_limited_per_client(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("STATUS_RATE_PER_S", "0.1")
+    monkeypatch.setenv("STATUS_BURST", "2")
+    client = TestClient(app)
+    job_id = client.post("/api/v1/jobs", json=BASE).json()["id"]
+    url = f"/api/v1/jobs/{job_id}"
+    assert [client.get(url).status_code for _ in range(2)] == [200, 200]
+    limited = client.get(url)
+    assert limited.status_code == 429 and limited.headers["Retry-After"] == "10"
+    # Other clients have their own buckets
+    assert client.get(url, headers={"X-Client-Id": "ui"}).status_code == 200
+    monkeypatch.setenv("STATUS_RATE_PER_S", "0")
+    assert client.get(url).status_code == 200
+
+
+def test_full_queue_and_busy_project_push_back(queue_client, monkeypatch):
+    client, drain = queue_client
+    monkeypatch.setenv("QUEUE_MAX_DEPTH", "3")
+    monkeypatch.setenv("PROJECT_MAX_INFLIGHT", "2")
+    monkeypatch.setenv("BACKPRESSURE_RETRY_AFTER", "15")
+    project = {**BASE, "project_id": "p1"}
+    assert client.post("/api/v1/jobs", json=project).status_code == 200
+    sweep = {"name": "s", "base": project, "variants": [{}, {}]}
+    busy = client.post("/api/v1/sweeps", json=sweep)
+    assert busy.status_code == 429 and busy.headers["Retry-After"] == "15"
+    assert "project" in busy.json()["detail"]
+    # Other clients still get the queue's remaining room
+    assert client.post("/api/v1/sweeps", json={**sweep, "base": BASE}).status_code == 200
+    full = client.post("/api/v1/jobs", json=BASE)
+    assert full.status_code == 429 and "queue" in full.json()["detail"]
+    too_big = client.post("/api/v1/sweeps", json={**sweep, "variants": [{}] * 4})
+    assert too_big.status_code == 413
+    drain()
+    # Finished jobs no longer count against the project
+    assert client.post("/api/v1/sweeps", json=sweep).status_code == 200
+
+
+def test_submissions_are_charged_per_job(queue_client, monkeypatch):
+    client, _drain = queue_client
+    monkeypatch.setenv("SUBMIT_RATE_PER_S", "0.01")
+    monkeypatch.setenv("SUBMIT_BURST", "3")
+    monkeypatch.setenv("QUEUE_MAX_DEPTH", "2")
+    sweep = {"name": "s", "base": BASE, "variants": [{}, {}]}
+    # Turned away by the queue before any token is taken
+    assert client.post("/api/v1/sweeps", json={**sweep, "variants": [{}] * 3}).status_code == 413
+    assert client.post("/api/v1/sweeps", json=sweep).status_code == 200
+    assert client.post("/api/v1/jobs", json=BASE).status_code == 429
+    monkeypatch.setenv("QUEUE_MAX_DEPTH", "0")
+    assert client.post("/api/v1/jobs", json=BASE).status_code == 200
+    limited = client.post("/api/v1/jobs", json=BASE)
+    assert limited.status_code == 429 and int(limited.headers["Retry-After"]) == 100
+    # More jobs than the burst never pass: a sweep cannot buy a discount
+    big = client.post("/api/v1/sweeps", json={**sweep, "variants": [{}] * 4})
+    assert big.status_code == 413 and "burst" in big.json()["detail"]
+
+
+def test_queue_reuses_one_redis_client(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+
+    created = []
+
+    def from_url(url, **kwargs):
+        created.append(url)
+        return fakeredis.FakeRedis()
+
+    monkeypatch.delenv("INLINE_JOB_EXEC", raising=False)
+    monkeypatch.setattr(jobs, "_REDIS_CONN", None)
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+    connections = {id(jobs._get_queue().connection) for _ in range(3)}
+    assert len(created) == 1 and len(connections) == 1
@@ -0,0 +1,32 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fakeredis")
+
+_PATH = Path(__file__).resolve().parents[2] / "scripts" / "loadtest.py"
+_spec = importlib.util.spec_from_file_location("loadtest", _PATH)
+loadtest = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(loadtest)
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert loadtest._percentile(values, 50) == 50.0
+    assert loadtest._percentile(values, 99) == 99.0
+    assert loadtest._percentile([3.0], 90) == 3.0
+
+
+def test_in_process_load_run(monkeypatch, tmp_path):
+    monkeypatch.delenv("INLINE_JOB_EXEC", raising=False)
+    out = tmp_path / "report.json"
+    args = [
+        "--jobs", "2", "--sweeps", "1", "--variants", "2",
+        "--concurrency", "2", "--workers", "1", "--poll", "0.05", "--out", str(out),
+    ]
+    assert loadtest.main(args) == 0
+    report = loadtest.json.loads(out.read_text())
+    assert report["jobs"]["finished"] == 2
+    assert report["error_rate"] == 0.0
+    assert {"submit", "status", "download", "sweep_submit", "sweep_csv"} <= set(report["ops"])
@@ -0,0 +1,121 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from solver.mesh import (  # noqa: E402
+    BOUNDARY_TAGS,
+    cell_quality,
+    load_mesh,
+    mesh_key,
+    quality_summary,
+    save_mesh,
+)
+
+PAYLOAD = {
+    "name": "cached",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+    "mesh": {"nx": 24, "ny": 8},
+    "solver": "fem",
+}
+
+
+def test_quality_of_ideal_and_sliver_cells():
+    points = np.array([[0.0, 0.0], [1.0, 0.0], [0.5, np.sqrt(3.0) / 2.0], [2.0, 1e-3]])
+    q = cell_quality(points, np.array([[0, 1, 2], [0, 1, 3]]))
+    np.testing.assert_allclose(q["aspect_ratio"][0], 1.0)
+    np.testing.assert_allclose(q["min_angle_deg"][0], 60.0)
+    np.testing.assert_allclose(q["skewness"][0], 0.0, atol=1e-12)
+    assert q["aspect_ratio"][1] > 100 and q["skewness"][1] > 0.9
+
+    square = np.array([[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 1.0]])
+    summary = quality_summary(square, np.array([[0, 1, 2, 3]]), "quad")
+    assert summary["aspect_ratio"]["max"] == pytest.approx(1.0)
+    assert summary["min_angle_deg"]["min"] == pytest.approx(90.0)
+    assert summary["area"]["p50"] == pytest.approx(1.0) and summary["degenerate"] == 0
+
+
+def test_cache_round_trip_keeps_boundary_tags(tmp_path):
+    x, y = np.meshgrid(np.linspace(0.0, 2.0, 5), np.linspace(0.0, 1.0, 3))
+    points = np.column_stack([x.ravel(), y.ravel()])
+    cells = np.array(
+        [
+            [j * 5 + i, j * 5 + i + 1, (j + 1) * 5 + i + 1, (j + 1) * 5 + i]
+            for j in range(2)
+            for i in range(4)
+        ]
+    )
+    key = mesh_key({"kind": "rect", "nx": 5, "ny": 3})
+    assert key == mesh_key({"ny": 3, "nx": 5, "kind": "rect"})
+    save_mesh(tmp_path / f"{key}.npz", points, cells, "quad")
+    mesh = load_mesh(tmp_path / f"{key}.npz")
+    assert mesh["cell_type"] == "quad"
+    np.testing.assert_array_equal(mesh["cells"], cells)
+    sizes = {tag: len(mesh["boundary"][tag]) for tag in BOUNDARY_TAGS}
+    assert sizes == {"inlet": 2, "outlet": 2, "wall": 8}
+    inlet_x = mesh["points"][mesh["boundary"]["inlet"]][..., 0]
+    np.testing.assert_array_equal(inlet_x, 0.0)
+
+    # Jobs sharing a mesh may write it at the same time; each uses its own temp file
+    path = tmp_path / f"{key}.npz"
+    with ThreadPoolExecutor(8) as pool:
+        writes = [pool.submit(save_mesh, path, points, cells, "quad") for _ in range(8)]
+        for w in writes:
+            w.result()
+    np.testing.assert_array_equal(load_mesh(path)["cells"], cells)
+    assert [p.name for p in tmp_path.iterdir()] == [f"{key}.npz"]
+
+
+def test_second_job_reuses_cached_mesh(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    client = TestClient(app)
+    fields = "mesh_key,mesh_cache_hit,mesh_quality,flux_out,timings"
+    results = []
+    for viscosity in (1e-3, 2e-3):
+        payload = {**PAYLOAD, "material": {**PAYLOAD["material"], "viscosity": viscosity}}
+        job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+        url = f"/api/v1/jobs/{job_id}/result?fields={fields}"
+        results.append(client.get(url).json()["result"])
+    first, second = results
+    assert first["mesh_key"] == second["mesh_key"]
+    assert (tmp_path / "meshes" / f"{first['mesh_key']}.npz").exists()
+    assert not first["mesh_cache_hit"] and second["mesh_cache_hit"]
+    assert second["flux_out"] == pytest.approx(first["flux_out"], rel=1e-10)
+    quality = second["mesh_quality"]
+    assert quality["cell_type"] == "triangle" and quality["cells"] == 2 * 23 * 7
+    # Right triangles of the tensor mesh
+    assert quality["min_angle_deg"]["max"] <= 45.0 + 1e-9 and quality["degenerate"] == 0
+
+
+def test_single_precision_output_halves_fields(monkeypatch, tmp_path):
+    meshio = pytest.importorskip("meshio")
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    client = TestClient(app)
+    fields = "output_precision,output_bytes,output_bytes_saved,flux_out"
+    results, ids = [], []
+    for precision in ("float64", "float32"):
+        payload = {**PAYLOAD, "output_precision": precision}
+        ids.append(client.post("/api/v1/jobs", json=payload).json()["id"])
+        url = f"/api/v1/jobs/{ids[-1]}/result?fields={fields}"
+        results.append(client.get(url).json()["result"])
+    full, single = results
+    assert full["output_bytes_saved"] == 0 and single["output_precision"] == "float32"
+    assert single["output_bytes"] < 0.75 * full["output_bytes"]
+    # Metrics are computed in double precision either way
+    assert single["flux_out"] == full["flux_out"]
+    m = meshio.read(tmp_path / f"{ids[1]}-stokes.vtu")
+    assert m.points.dtype == np.float32 and m.cells[0].data.dtype == np.int32
+    assert m.point_data["u"].dtype == np.float32
+    # Points and fields shrink by half (scikit-fem cells already are int32)
+    halved = m.points.nbytes + sum(v.nbytes for v in m.point_data.values())
+    assert single["output_bytes_saved"] == halved
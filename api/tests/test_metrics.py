@@ -0,0 +1,92 @@
+import pytest
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+pytest.importorskip("prometheus_client")
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_exposes_job_telemetry(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/0")
+    client = TestClient(app)
+    count = 'microfluidic_job_duration_seconds_count{path="mac"}'
+    before = client.get("/metrics").text
+
+    payload = {
+        "name": "metered",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+    }
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "finished"
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    after = resp.text
+    assert _sample(after, count) == _sample(before, count) + 1
+    vtu = 'microfluidic_artifact_bytes_written_total{kind="vtu"}'
+    assert _sample(after, vtu) > _sample(before, vtu)
+    # Queue families are exported even when Redis is unreachable
+    assert "# TYPE microfluidic_queue_depth gauge" in after
+
+
+def test_scrapes_reuse_one_redis_client(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis
+    from api.app import telemetry
+
+    created = []
+
+    def from_url(url, **kwargs):
+        created.append(url)
+        return fakeredis.FakeRedis()
+
+    monkeypatch.setenv("REDIS_URL", "redis://127.0.0.1:1/9")
+    monkeypatch.setattr(telemetry, "_REDIS_CONNS", {})
+    monkeypatch.setattr(redis.Redis, "from_url", from_url)
+    client = TestClient(app)
+    assert [client.get("/metrics").status_code for _ in range(3)] == [200] * 3
+    assert created == ["redis://127.0.0.1:1/9"]
+
+
+_HORSE = """
+import sys
+import prometheus_client
+from api.app import telemetry
+
+telemetry.set_process_name(telemetry.horse_process_name(42))
+telemetry.record_cache("mesh", True)
+prometheus_client.Gauge("busy", "Busy", multiprocess_mode="livesum").set(1)
+if sys.argv[1] == "exit":
+    telemetry.mark_process_dead(telemetry.horse_process_name(42))
+"""
+
+
+def test_job_processes_share_metric_files(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    from prometheus_client import CollectorRegistry, generate_latest, multiprocess
+
+    root = Path(__file__).resolve().parents[2]
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(root)}
+    # Successive horses of one worker, as forked per job: one set of files, and the
+    # live gauge of the last one is gone once it is marked dead
+    for arg in ("run", "exit"):
+        subprocess.run([sys.executable, "-c", _HORSE, arg], env=env, check=True, cwd=root)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["counter_horse-42.db"]
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    text = generate_latest(registry).decode()
+    assert 'microfluidic_cache_requests_total{cache="mesh",result="hit"} 2.0' in text
@@ -86,3 +86,34 @@ def test_poiseuille_fem_mass_balance_ok():
     q = np.trapz(u_out, y_out)
     rel_err = abs(q - u_avg * h) / (u_avg * h)
     assert rel_err < 0.3, f"Mass balance too poor: rel_err={rel_err}"
+
+
+def test_fem_elimination_matches_full_condense():
+    pytest.importorskip("skfem")
+    from scipy.sparse import bmat
+    from skfem import BilinearForm, asm, condense
+    from skfem.helpers import div
+    from solver.stokes_fem import _assemble_condensed, _rect_mesh, solve_rect_stokes_fem
+
+    h, length, mu, u_avg = 1e-4, 1e-3, 1e-3, 1e-3
+    system = _assemble_condensed(_rect_mesh(h, length, 12, 6), h, length, mu, u_avg)
+    bu, bp, free = system["bu"], system["bp"], system["free"]
+
+    # Reference: the full saddle-point matrix with both off-diagonal blocks assembled
+    @BilinearForm
+    def a(u, v, _):
+        return mu * np.einsum("ij...,ij...", u.grad, v.grad)
+
+    @BilinearForm
+    def bt(u, q, _):
+        return -q * div(u)
+
+    B = asm(bt, bu, bp)
+    K = bmat([[asm(a, bu), B.T], [B, None]], format="csr")
+    Kc, rhsc, _x, _ = condense(K, np.zeros(K.shape[0]), D=np.where(~free)[0], x=system["x"])
+    assert abs(system["Kc"] - Kc).max() < 1e-12 * abs(Kc).max()
+    assert np.allclose(system["rhsc"], rhsc, rtol=1e-12, atol=0.0)
+
+    _m, _pdata, metrics = solve_rect_stokes_fem(h, length, mu, u_avg, 12, 6, with_metrics=True)
+    assert metrics["flux_out"] == pytest.approx(u_avg * h, rel=1e-6)
+    assert metrics["peak_rss_mb"] > 0.0
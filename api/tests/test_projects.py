@@ -0,0 +1,55 @@
+import json
+
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+
+def test_project_listing_is_paginated_and_omits_data(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path))
+    client = TestClient(app)
+    for i in range(5):
+        resp = client.post("/api/v1/projects", json={"name": f"chip-{i}", "data": {"n": i}})
+        assert resp.status_code == 200
+    client.post("/api/v1/projects", json={"name": "mixer", "data": {}})
+
+    resp = client.get("/api/v1/projects", params={"q": "chip", "limit": 2, "sort": "name"})
+    assert resp.status_code == 200
+    assert resp.headers["X-Total-Count"] == "5"
+    items = resp.json()
+    assert [p["name"] for p in items] == ["chip-4", "chip-3"]
+    assert all("data" not in p for p in items)
+    # Readable by the UI when it is served from another origin
+    cross = client.get("/api/v1/projects", headers={"Origin": "http://ui.example"})
+    assert "x-total-count" in cross.headers["Access-Control-Expose-Headers"].lower()
+
+    page = client.get("/api/v1/projects", params={"q": "chip", "offset": 4, "order": "asc"})
+    assert len(page.json()) == 1
+
+
+def test_project_update_optimistic_concurrency(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path))
+    client = TestClient(app)
+    created = client.post("/api/v1/projects", json={"name": "a", "data": {"x": 1}}).json()
+    pid = created["id"]
+    assert created["version"] == 1
+
+    ok = client.put(f"/api/v1/projects/{pid}", json={"name": "b", "data": {}, "version": 1})
+    assert ok.status_code == 200
+    assert ok.json()["version"] == 2
+
+    stale = client.put(f"/api/v1/projects/{pid}", json={"name": "c", "data": {}, "version": 1})
+    assert stale.status_code == 409
+    stale_header = client.put(
+        f"/api/v1/projects/{pid}", json={"name": "c", "data": {}}, headers={"If-Match": '"1"'}
+    )
+    assert stale_header.status_code == 409
+    assert client.get(f"/api/v1/projects/{pid}").json()["name"] == "b"
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_existing_project_files_are_indexed(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROJECTS_DIR", str(tmp_path))
+    (tmp_path / "legacy.json").write_text(json.dumps({"name": "old", "data": {"a": 1}}))
+    client = TestClient(app)
+    items = client.get("/api/v1/projects").json()
+    assert [(p["id"], p["name"]) for p in items] == [("legacy", "old")]
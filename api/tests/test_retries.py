@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+
+import pytest
+from api.app import runner
+from api.app.routers import jobs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'workers'
+
+BASE = {
+    "name": "retry",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+    "mesh": {"nx": 21, "ny": 7},
+}
+
+
+def test_backoff_doubles_up_to_the_cap_with_jitter(monkeypatch):
+    pytest.importorskip("rq")
+    monkeypatch.setenv("JOB_RETRIES", "4")
+    monkeypatch.setenv("JOB_RETRY_BASE_SECONDS", "10")
+    monkeypatch.setenv("JOB_RETRY_MAX_SECONDS", "50")
+    monkeypatch.setenv("JOB_RETRY_JITTER", "0.25")
+    for _ in range(20):
+        retry = jobs._retry_policy()
+        assert retry.max == 4
+        for interval, nominal in zip(retry.intervals, (10, 20, 40, 50)):
+            assert 0.75 * nominal - 0.5 <= interval <= 1.25 * nominal + 0.5
+    monkeypatch.setenv("JOB_RETRIES", "0")
+    assert jobs._retry_policy() is None
+
+
+def test_transient_run_resumes_from_its_latest_checkpoint(queue_client, monkeypatch):
+    client, drain = queue_client
+    monkeypatch.setenv("JOB_RETRY_BASE_SECONDS", "0")  # retry at once
+    # Out of time after every step: each attempt advances one step from the last checkpoint
+    monkeypatch.setattr(runner, "CHECKPOINT_AT", 0.0)
+    payload = {**BASE, "transient": {"t_end": 1.5e-2, "dt": 5e-3}}
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    status = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert status["status"] == "queued" and status["retries_left"] == 3
+    drain()
+    assert client.get(f"/api/v1/jobs/{job_id}").json()["status"] == "finished"
+    fields = "solver,steps,resumed_from"
+    result = client.get(f"/api/v1/jobs/{job_id}/result?fields={fields}").json()["result"]
+    assert result["solver"] == "fem_transient" and result["steps"] == 3
+    assert result["resumed_from"] == pytest.approx(1e-2)
+
+
+def test_only_transient_failures_are_retried(queue_client, monkeypatch):
+    import scipy.sparse.linalg
+    import solver.stokes_gn
+
+    client, drain = queue_client
+    monkeypatch.setenv("JOB_RETRY_BASE_SECONDS", "0")  # retry at once
+    calls = []
+    splu = scipy.sparse.linalg.splu
+
+    # The FEM factorization itself runs out of memory, twice
+    def out_of_memory(*args, **kwargs):
+        calls.append("oom")
+        if calls.count("oom") < 3:
+            raise MemoryError()
+        return splu(*args, **kwargs)
+
+    def singular(**kwargs):
+        calls.append("singular")
+        raise RuntimeError("Factor is exactly singular")
+
+    monkeypatch.setattr(scipy.sparse.linalg, "splu", out_of_memory)
+    monkeypatch.setattr(solver.stokes_gn, "solve_rect_stokes_gn", singular)
+    oom = client.post("/api/v1/jobs", json={**BASE, "solver": "fem"}).json()["id"]
+    power_law = {**BASE["material"], "rheology": "power_law", "flow_index": 0.5}
+    failing = client.post("/api/v1/jobs", json={**BASE, "material": power_law}).json()["id"]
+    drain()
+    assert calls.count("oom") == 3 and calls.count("singular") == 1
+    status = client.get(f"/api/v1/jobs/{failing}").json()
+    assert status["status"] == "failed" and status["retries_left"] is None
+    assert "singular" in status["error"]
+    # Retried past the out-of-memory errors instead of answering with the analytic fallback
+    assert client.get(f"/api/v1/jobs/{oom}").json()["status"] == "finished"
+    result = client.get(f"/api/v1/jobs/{oom}/result?fields=solver").json()["result"]
+    assert result["solver"] == "fem"
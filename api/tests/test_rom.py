@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from api.app.rom import load_rom
+from api.app.routers import jobs
+from api.app.runner import _rom_path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'workers'
+
+BASE = {
+    "name": "rom",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+    "mesh": {"nx": 32, "ny": 16},
+}
+
+
+def _geometry(height: float) -> dict:
+    return {"geometry": {"width": 0.001, "height": height}}
+
+
+def test_sweep_rom_answers_jobs_inside_its_training_box(queue_client, caplog):
+    from solver.stokes_mac import solve_rect_stokes_mac
+
+    client, drain = queue_client
+    heights = [8e-5, 9e-5, 1e-4, 1.1e-4, 1.2e-4]
+    sweep = {"name": "h", "base": BASE, "variants": [_geometry(h) for h in heights]}
+    sid = client.post("/api/v1/sweeps", json=sweep).json()["id"]
+    drain()
+
+    rom = client.post(f"/api/v1/sweeps/{sid}/rom").json()
+    assert rom["snapshots"] == 5
+    assert list(rom["parameters"]) == ["geometry.height"]
+    assert client.get(f"/api/v1/sweeps/{sid}/rom").json()["ranks"] == rom["ranks"]
+
+    job = {**BASE, **_geometry(9.5e-5), "rom": sid, "rom_tolerance": 0.05}
+    status = client.post("/api/v1/jobs", json=job).json()
+    assert status["status"] == "finished"
+    # Recorded in Redis, so any API process serves it
+    assert status["id"] not in jobs._MEM_RESULTS
+    assert client.get(f"/api/v1/jobs/{status['id']}").json()["status"] == "finished"
+    result = client.get(f"/api/v1/jobs/{status['id']}/result").json()["result"]
+    assert result["solver"] == "rom"
+    assert 0.0 < result["rom_error_indicator"] <= 0.05
+
+    _m, pdata = load_rom(_rom_path(sid)).predict(job)
+    _m, ref = solve_rect_stokes_mac(9.5e-5, 1e-3, 1e-3, 1e-3, nx=32, ny=16)
+    for f in ("u", "p"):
+        err = np.linalg.norm(pdata[f] - ref[f]) / np.linalg.norm(ref[f])
+        assert err < 0.05
+
+    # Extrapolation goes to the queue for a full solve
+    outside = {**job, **_geometry(2e-4)}
+    assert client.post("/api/v1/jobs", json=outside).json()["status"] == "queued"
+
+    # A model that cannot be read is logged and the job is solved in full
+    _rom_path(sid).write_bytes(b"not a model")
+    assert client.post("/api/v1/jobs", json=job).json()["status"] == "queued"
+    assert "Reduced-order answer for job" in caplog.text
@@ -0,0 +1,20 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'benchmarks'
+
+from benchmarks.startup import TARGETS, check, measure  # noqa: E402
+
+
+def test_api_and_worker_start_lean():
+    results = [measure(target, repeat=2) for target in TARGETS]
+    assert check(results) == []
+
+
+def test_check_flags_eager_imports():
+    slow = {"target": "worker", "ms": 900.0, "budget_ms": 400.0, "forbidden_loaded": ["fastapi"]}
+    problems = check([slow])
+    assert problems == [
+        "worker: import took 900 ms (budget 400 ms)",
+        "worker: imports fastapi at start-up",
+    ]
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from api.app import admission
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from solver.stokes_adaptive import solve_rect_stokes_adaptive  # noqa: E402
+from solver.stokes_fem import MeshTri  # noqa: E402
+
+CASE = {"h": 1e-4, "l": 1e-3, "mu": 1e-3, "u_avg": 1e-3}
+
+
+def test_poiseuille_needs_no_refinement():
+    # P2-P1 represents fully developed flow exactly, so the coarse mesh is final
+    _m, pdata, metrics = solve_rect_stokes_adaptive(with_metrics=True, **CASE)
+    assert len(metrics["levels"]) == 1 and metrics["error_estimate"] < 1e-6
+    np.testing.assert_allclose(metrics["flux_out"], CASE["u_avg"] * CASE["h"], rtol=1e-8)
+
+
+def test_developing_flow_refines_near_inlet_with_warm_starts():
+    m, _pdata, metrics = solve_rect_stokes_adaptive(
+        target_error=2e-2, inlet="blunt", with_metrics=True, **CASE
+    )
+    levels = metrics["levels"]
+    assert len(levels) > 2 and metrics["error_estimate"] <= 2e-2
+    errors = [lv["error_estimate"] for lv in levels]
+    assert errors[-1] < errors[0] / 5
+    # Prolongated pressures cut the iteration count on every refined level
+    assert max(lv["iterations"] for lv in levels[1:]) < levels[0]["iterations"]
+    assert abs(metrics["flux_out"] - metrics["flux_in"]) < 1e-3 * metrics["flux_in"]
+
+    # Restarting from the final (e.g. cached) mesh skips the refinement loop
+    final = MeshTri(m.points[:, :2].T, m.cells[0].data.T)
+    again = solve_rect_stokes_adaptive(
+        target_error=2e-2, inlet="blunt", with_metrics=True, mesh=final, **CASE
+    )[2]
+    assert len(again["levels"]) == 1 and again["dofs"] == levels[-1]["dofs"]
+
+    capped = solve_rect_stokes_adaptive(
+        target_error=1e-6, max_dofs=1500, inlet="blunt", with_metrics=True, **CASE
+    )[2]
+    assert capped["dofs"] <= 1500 < levels[-1]["dofs"]
+
+
+def test_adaptive_job(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    payload = {
+        "name": "adaptive",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+        "mesh": {"adaptive": True, "max_dofs": 50_000},
+    }
+    assert admission.estimate_job(payload)["dofs"] == 50_000
+    client = TestClient(app)
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    fields = "solver,error_estimate,mesh_levels"
+    result = client.get(f"/api/v1/jobs/{job_id}/result?fields={fields}").json()["result"]
+    assert result["solver"] == "fem_adaptive"
+    assert result["mesh_levels"][0]["dofs"] < admission.fem_dofs(64, 32)
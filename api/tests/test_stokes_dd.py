@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from solver.stokes_dd import solve_rect_stokes_dd, strip_partition  # noqa: E402
+from solver.stokes_fem import solve_rect_stokes_fem  # noqa: E402
+
+CASE = {"h": 1e-4, "l": 1e-3, "mu": 1e-3, "u_avg": 1e-3}
+
+
+def test_strip_partition_owns_every_unknown_once():
+    x = np.random.default_rng(0).uniform(0.0, 1.0, 1000)
+    indices, owned = strip_partition(x, 4, overlap=0.05)
+    counts = np.zeros(x.size, dtype=int)
+    for idx, own in zip(indices, owned):
+        counts[idx[own]] += 1
+        assert own.sum() < idx.size  # strips overlap their neighbours
+    assert (counts == 1).all()
+
+
+def test_domain_decomposed_solve_matches_direct_solve():
+    _m, ref, ref_metrics = solve_rect_stokes_fem(nx=32, ny=12, with_metrics=True, **CASE)
+    _m, dd, metrics = solve_rect_stokes_dd(
+        nx=32, ny=12, workers=2, subdomains=3, with_metrics=True, **CASE
+    )
+    assert metrics["subdomains"] == 3 and metrics["iterations"] > 0
+    assert metrics["dofs"] == ref_metrics["dofs"]
+    np.testing.assert_allclose(dd["u"], ref["u"], rtol=0, atol=1e-8 * np.abs(ref["u"]).max())
+    np.testing.assert_allclose(dd["p"], ref["p"], rtol=0, atol=1e-8 * np.abs(ref["p"]).max())
+
+
+def test_only_non_convergence_falls_back_to_the_direct_solver(monkeypatch, tmp_path, caplog):
+    import scipy.sparse.linalg
+    import solver.stokes_dd
+    from api.app.runner import _run_job
+
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setenv("SOLVER_WORKERS", "2")
+    monkeypatch.setenv("DD_MIN_DOFS", "0")
+    spec = {
+        "name": "dd",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+        "mesh": {"nx": 16, "ny": 6},
+        "solver": "fem",
+    }
+    monkeypatch.setattr(scipy.sparse.linalg, "gmres", lambda A, b, **kw: (np.zeros_like(b), 20))
+    assert _run_job(spec, "stalled")["summary"]["solver"] == "fem"
+    assert "fell back to the direct solver" in caplog.text
+
+    def out_of_memory(*args, **kwargs):
+        raise MemoryError()
+
+    # Not answered with analytic fields labelled as a domain-decomposed solve, and not
+    # hidden by the direct-solver retry: the job fails so that it is retried
+    monkeypatch.setattr(solver.stokes_dd, "_assemble_condensed", out_of_memory)
+    with pytest.raises(MemoryError):
+        solve_rect_stokes_dd(nx=8, ny=4, **CASE)
+    with pytest.raises(MemoryError):
+        _run_job(spec, "oom")
@@ -0,0 +1,94 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from api.app import admission
+from api.app.main import app
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from solver.stokes_fem import solve_rect_stokes_fem  # noqa: E402
+from solver.stokes_gn import power_law_profile, solve_rect_stokes_gn  # noqa: E402
+
+CASE = {"h": 1e-4, "l": 1e-3, "u_avg": 1e-3, "nx": 41, "ny": 11}
+
+
+def test_power_law_matches_developed_profile_and_anderson_saves_iterations():
+    runs = {
+        depth: solve_rect_stokes_gn(
+            mu=0.01, flow_index=0.5, anderson_depth=depth, with_metrics=True, **CASE
+        )
+        for depth in (0, 3)
+    }
+    m, pdata, metrics = runs[3]
+    mid = np.isclose(m.points[:, 0], CASE["l"] / 2)
+    ref = CASE["u_avg"] * power_law_profile(0.5)(m.points[mid, 1] / CASE["h"])
+    assert np.linalg.norm(pdata["u"][mid, 0] - ref) < 1e-3 * np.linalg.norm(ref)
+    np.testing.assert_allclose(metrics["flux_out"], CASE["u_avg"] * CASE["h"], rtol=1e-8)
+    assert metrics["increments"][-1] <= 1e-6 and metrics["seconds_per_iteration"] > 0
+    assert metrics["iterations"] < runs[0][2]["iterations"]
+
+
+def test_carreau_without_relaxation_is_newtonian():
+    _m, pdata, metrics = solve_rect_stokes_gn(
+        mu=1e-3, model="carreau", flow_index=0.5, with_metrics=True, **CASE
+    )
+    _m, ref = solve_rect_stokes_fem(mu=1e-3, **CASE)
+    assert metrics["iterations"] == 2
+    for f in ("u", "p"):
+        assert np.abs(pdata[f] - ref[f]).max() < 1e-9 * np.abs(ref[f]).max()
+
+
+def test_carreau_job(monkeypatch, tmp_path):
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    payload = {
+        "name": "blood",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {
+            "density": 1060,
+            "viscosity": 0.056,
+            "diffusivity": 1e-9,
+            "rheology": "carreau",
+            "flow_index": 0.3568,
+            "viscosity_inf": 0.00345,
+            "relaxation_time": 3.313,
+        },
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+        "mesh": {"nx": 41, "ny": 11},
+    }
+    assert admission.estimate_job(payload)["solver"] == "fem_gn"
+    client = TestClient(app)
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    fields = "solver,solver_iterations,seconds_per_iteration,mass_balance_rel_error"
+    result = client.get(f"/api/v1/jobs/{job_id}/result?fields={fields}").json()["result"]
+    assert result["solver"] == "fem_gn"
+    assert result["solver_iterations"] > 2 and result["seconds_per_iteration"] > 0
+    assert result["mass_balance_rel_error"] < 1e-6
+
+
+def test_failed_non_newtonian_solve_fails_the_job(monkeypatch, tmp_path):
+    import solver.stokes_gn
+
+    def diverge(**kwargs):
+        raise RuntimeError("Picard iteration did not converge")
+
+    monkeypatch.setenv("INLINE_JOB_EXEC", "1")
+    monkeypatch.setenv("ARTIFACTS_DIR", str(tmp_path))
+    monkeypatch.setattr(solver.stokes_gn, "solve_rect_stokes_gn", diverge)
+    payload = {
+        "name": "shear-thinning",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {
+            "density": 1000,
+            "viscosity": 0.01,
+            "diffusivity": 1e-9,
+            "rheology": "power_law",
+        },
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+        "mesh": {"nx": 41, "ny": 11},
+    }
+    status = TestClient(app).post("/api/v1/jobs", json=payload).json()
+    # No Newtonian analytic answer in place of the requested rheology
+    assert status["status"] == "failed" and "did not converge" in status["error"]
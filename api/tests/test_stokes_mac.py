@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from api.app import admission  # noqa: E402
+from solver.stokes_mac import mac_to_result, solve_mac, solve_rect_stokes_mac  # noqa: E402
+
+CASE = {"h": 1e-4, "l": 1e-3, "mu": 1e-3, "u_avg": 1e-3}
+
+
+def _errors(nx: int, ny: int) -> tuple[float, float]:
+    h, length, mu, u_avg = CASE["h"], CASE["l"], CASE["mu"], CASE["u_avg"]
+    res = mac_to_result(solve_mac(nx=nx, ny=ny, **CASE), h, length, u_avg)
+    u_exact = 6.0 * u_avg * (res.y / h) * (1.0 - res.y / h)
+    p_exact = 12.0 * mu * u_avg / h**2 * (length - res.x)
+    u_err = np.abs(res.u - u_exact[:, None]).max() / u_exact.max()
+    p_err = np.abs(res.p - p_exact[None, :]).max() / p_exact.max()
+    return u_err, p_err
+
+
+def test_mac_matches_poiseuille_and_converges():
+    coarse = _errors(32, 16)
+    fine = _errors(64, 32)
+    assert fine[0] < 1e-2 and fine[1] < 1e-2
+    assert fine[0] < coarse[0] and fine[1] < coarse[1]
+
+
+def test_mac_conserves_mass():
+    _m, pdata, metrics = solve_rect_stokes_mac(nx=48, ny=16, with_metrics=True, **CASE)
+    assert abs(metrics["flux_out"] - metrics["flux_in"]) < 1e-9 * abs(metrics["flux_in"])
+    assert metrics["dofs"] == admission.mac_dofs(48, 16)
+    assert pdata["u"].shape == (48 * 16, 2)
+
+
+def test_warm_start_from_neighbouring_flow_rate():
+    cold = solve_mac(nx=32, ny=16, **CASE)
+    warm = solve_mac(nx=32, ny=16, p0=cold.p, **{**CASE, "u_avg": 2e-3})
+    ref = solve_mac(nx=32, ny=16, **{**CASE, "u_avg": 2e-3})
+    assert warm.iterations < ref.iterations
+    np.testing.assert_allclose(warm.p, ref.p, rtol=0, atol=1e-8 * np.abs(ref.p).max())
+
+
+def test_iterations_do_not_grow_with_aspect_ratio():
+    square = solve_mac(nx=64, ny=16, **CASE)
+    # 100x longer channel with 10x more elongated cells
+    long = solve_mac(nx=4096, ny=16, **{**CASE, "l": 1e-2})
+    assert square.iterations <= 25 and long.iterations <= square.iterations + 3
+    p_exact = 12.0 * CASE["mu"] * CASE["u_avg"] / CASE["h"] ** 2 * 1e-2
+    assert abs(long.p[:, 0].mean() - p_exact) < 1e-2 * p_exact
@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import pytest
+from api.app import studies
+from api.app.routers import jobs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'workers'
+
+BASE = {
+    "name": "study",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+    "mesh": {"nx": 32, "ny": 16},
+}
+
+
+def test_designs_expand_lazily():
+    params = [{"levels": 3}, {"levels": 2}]
+    points = {tuple(studies.grid_point(params, i)) for i in range(6)}
+    assert points == {(a, b) for a in (0.0, 0.5, 1.0) for b in (0.0, 1.0)}
+    samples = [studies.lhs_point(2, 8, 7, i) for i in range(8)]
+    for k in range(2):
+        assert sorted(int(s[k] * 8) for s in samples) == list(range(8))
+
+
+def test_oversized_studies_are_rejected(queue_client, monkeypatch):
+    client, _drain = queue_client
+    monkeypatch.setenv("STUDY_MAX_POINTS", "10")
+    params = [{"path": "material.viscosity", "low": 1e-3, "high": 4e-3, "levels": 4}] * 2
+    lhs = {"parameters": params[:1], "design": "lhs", "samples": 11}
+    for design in ({"parameters": params}, lhs):
+        resp = client.post("/api/v1/studies", json={"name": "big", "base": BASE, **design})
+        assert resp.status_code == 413 and "at most 10" in resp.json()["detail"]
+
+
+def test_grid_study_keeps_concurrency_and_warm_starts(queue_client):
+    client, drain = queue_client
+    study = {
+        "name": "grid",
+        "base": BASE,
+        "parameters": [
+            {"path": "material.viscosity", "low": 1e-3, "high": 4e-3, "levels": 2, "log": True},
+            {"path": "boundaries.0.value", "low": 1e-3, "high": 2e-3, "levels": 3},
+        ],
+        "concurrency": 2,
+    }
+    created = client.post("/api/v1/studies", json=study).json()
+    assert created["size"] == 6 and created["queued"] == 2
+    drain()  # job callbacks enqueue the rest of the design
+    done = client.get(f"/api/v1/studies/{created['id']}").json()
+    assert done["status"] == "finished" and done["finished"] == 6
+    viscosities = sorted({ev["params"]["material.viscosity"] for ev in done["evaluations"]})
+    assert viscosities == pytest.approx([1e-3, 4e-3])
+    # Later points start from the pressure of an earlier, finished neighbour
+    last = done["evaluations"][-1]["job_id"]
+    spec = jobs._get_queue().fetch_job(last).args[0]
+    assert spec["warm_start"] in {ev["job_id"] for ev in done["evaluations"][:-1]}
+
+
+def test_nelder_mead_calibrates_inlet_velocity(queue_client):
+    client, drain = queue_client
+    study = {
+        "name": "calibrate",
+        "base": BASE,
+        "parameters": [{"path": "boundaries.0.value", "low": 5e-4, "high": 4e-3}],
+        "design": "nelder_mead",
+        # Inlet flux of a 100 um channel at 2 mm/s
+        "objective": {"key": "flux_in", "target": 2e-7},
+        "max_evaluations": 40,
+    }
+    created = client.post("/api/v1/studies", json=study).json()
+    drain()
+    done = client.get(f"/api/v1/studies/{created['id']}").json()
+    assert done["status"] == "finished" and done["iterations"] > 1
+    assert done["submitted"] <= 40
+    assert done["best"]["params"]["boundaries.0.value"] == pytest.approx(2e-3, rel=1e-2)
+
+    bad = {**study, "objective": None}
+    assert client.post("/api/v1/studies", json=bad).status_code == 422
@@ -0,0 +1,74 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from api.app import runner
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root for 'solver'
+
+from solver.transient import Checkpointed, solve_rect_transient  # noqa: E402
+
+CASE = {"h": 1e-4, "l": 1e-3, "mu": 1e-3, "u_avg": 1e-3, "nx": 21, "ny": 7}
+
+
+def test_resumed_run_matches_uninterrupted_run(tmp_path):
+    opts = {"t_end": 0.2, "dt": 5e-3, "snapshot_every": 4, "checkpoint_every": 6}
+    _m, ref, metrics = solve_rect_transient(
+        out_dir=tmp_path, prefix="ref", with_metrics=True, **opts, **CASE
+    )
+    # Constant time step: one Stokes factorization per BDF order, and transport is only
+    # re-factorized until the flow has settled
+    assert metrics["factorizations"]["stokes"] == 2
+    assert metrics["flow_steady_at"] < 0.1
+    assert metrics["factorizations"]["transport"] < metrics["steps"] / 2
+    assert 0.0 < metrics["mixing_index"] < 1.0
+    assert np.isclose(metrics["flux_out"], CASE["u_avg"] * CASE["h"], rtol=1e-8)
+
+    with pytest.raises(Checkpointed):
+        solve_rect_transient(out_dir=tmp_path, prefix="run", deadline=0.0, **opts, **CASE)
+    assert (tmp_path / "run-checkpoint.npz").exists()
+    _m, pdata, resumed = solve_rect_transient(
+        out_dir=tmp_path, prefix="run", with_metrics=True, **opts, **CASE
+    )
+    assert resumed["resumed_from"] == pytest.approx(5e-3)
+    for f in ("u", "p", "c"):
+        np.testing.assert_allclose(pdata[f], ref[f], rtol=0, atol=1e-12 * np.abs(ref[f]).max())
+    assert (tmp_path / "run-series.csv").read_text() == (tmp_path / "ref-series.csv").read_text()
+    assert not (tmp_path / "run-checkpoint.npz").exists()
+    assert len(resumed["files"]) == len(metrics["files"]) == 1 + 11 + 1
+
+
+def test_timed_out_job_resumes_from_checkpoint(queue_client, monkeypatch):
+    client, drain = queue_client
+    # Resumed by hand here; automatic retries are covered in test_retries
+    monkeypatch.setenv("JOB_RETRIES", "0")
+
+    payload = {
+        "name": "mixing",
+        "geometry": {"width": 0.001, "height": 0.0001},
+        "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+        "boundaries": [{"type": "inlet", "value": 0.001}],
+        "mesh": {"nx": 21, "ny": 7},
+        "transient": {"t_end": 0.1, "dt": 5e-3, "snapshot_every": 5},
+    }
+    # Out of time right away: the run checkpoints after its first step and fails
+    monkeypatch.setattr(runner, "CHECKPOINT_AT", 0.0)
+    job_id = client.post("/api/v1/jobs", json=payload).json()["id"]
+    drain()
+    status = client.get(f"/api/v1/jobs/{job_id}").json()
+    assert status["status"] == "failed" and "checkpoint" in status["error"]
+
+    monkeypatch.setattr(runner, "CHECKPOINT_AT", 0.9)
+    assert client.post(f"/api/v1/jobs/{job_id}/resume").json()["status"] == "queued"
+    drain()
+    fields = "solver,steps,resumed_from,mixing_index"
+    result = client.get(f"/api/v1/jobs/{job_id}/result?fields={fields}").json()["result"]
+    assert result["solver"] == "fem_transient" and result["steps"] == 20
+    assert result["resumed_from"] == pytest.approx(5e-3)
+    names = {a["name"] for a in client.get(f"/api/v1/jobs/{job_id}/artifacts").json()["artifacts"]}
+    assert {f"{job_id}-transient.pvd", f"{job_id}-t00004.vtu"} <= names
+    assert client.post(f"/api/v1/jobs/{job_id}/resume").status_code == 409
+
+    steady_only = {**payload, "material": {**payload["material"], "rheology": "power_law"}}
+    assert client.post("/api/v1/jobs", json=steady_only).status_code == 422
@@ -0,0 +1,238 @@
+"""Solver scaling benchmarks.
+
+Sweeps mesh resolution for the rectangular-channel solvers and appends one JSON line per
+run to a history file. Every case runs in a fresh process so its peak RSS is its own.
+
+    python benchmarks/solver_scaling.py run --sizes 32x8,64x16,128x32,256x64
+    python benchmarks/solver_scaling.py compare --threshold 0.25
+
+``compare`` exits non-zero when any phase of the candidate run (default: latest) is slower
+than the baseline run (default: the one before) by more than the threshold, or when its
+peak memory grew by more than the threshold.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY = ROOT / "benchmarks" / "history.jsonl"
+DEFAULT_SIZES = "32x8,64x16,128x32,256x64"
+# Channel used for every case: 100 um high, 1 mm long, water at 1 mm/s
+CASE = {"h": 1e-4, "l": 1e-3, "mu": 1e-3, "u_avg": 1e-3}
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def run_case(solver: str, nx: int, ny: int) -> dict:
+    """Run one solve and return its phase timings, DOF count and peak RSS."""
+    sys.path.insert(0, str(ROOT))
+    from solver.instrument import PhaseTimer
+
+    timer = PhaseTimer()
+    t0 = time.perf_counter()
+    if solver in ("fem", "fem_dd"):
+        import meshio
+
+        if solver == "fem":
+            from solver.stokes_fem import solve_rect_stokes_fem
+
+            m, _pdata, metrics = solve_rect_stokes_fem(
+                nx=nx, ny=ny, with_metrics=True, timer=timer, **CASE
+            )
+        else:
+            from solver.stokes_dd import solve_rect_stokes_dd
+
+            m, _pdata, metrics = solve_rect_stokes_dd(
+                nx=nx, ny=ny, with_metrics=True, timer=timer, **CASE
+            )
+        with timer.phase("export"), tempfile.TemporaryDirectory() as tmp:
+            meshio.write(os.path.join(tmp, "out.vtu"), m)
+        dofs = int(metrics.get("dofs", 0))
+    elif solver == "mac":
+        import meshio
+
+        from solver.stokes_mac import solve_rect_stokes_mac
+
+        m, _pdata, metrics = solve_rect_stokes_mac(
+            nx=nx, ny=ny, with_metrics=True, timer=timer, **CASE
+        )
+        with timer.phase("export"), tempfile.TemporaryDirectory() as tmp:
+            meshio.write(os.path.join(tmp, "out.vtu"), m)
+        dofs = int(metrics["dofs"])
+    elif solver == "analytic":
+        from solver.stokes_rect import solve_stokes_poiseuille_rect
+
+        with timer.phase("solve"):
+            sol = solve_stokes_poiseuille_rect(nx=nx, ny=ny, **CASE)
+        dofs = int(sol.u.size + sol.v.size + sol.p.size)
+    else:
+        raise ValueError(f"Unknown solver {solver!r}")
+    return {
+        "solver": solver,
+        "nx": nx,
+        "ny": ny,
+        "dofs": dofs,
+        "wall_s": time.perf_counter() - t0,
+        "phases": timer.as_dict(),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _parse_sizes(text: str) -> list[tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        nx, ny = item.lower().split("x")
+        sizes.append((int(nx), int(ny)))
+    return sizes
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    cases = []
+    ctx = get_context("spawn")
+    for solver in args.solvers.split(","):
+        for nx, ny in _parse_sizes(args.sizes):
+            best = None
+            for _ in range(args.repeat):
+                # Fresh interpreter per case: ru_maxrss only ever grows within a process
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    rec = pool.submit(run_case, solver, nx, ny).result()
+                if best is None or rec["wall_s"] < best["wall_s"]:
+                    best = rec
+            assert best is not None
+            cases.append(best)
+            print(
+                f"{solver:8s} {nx:5d}x{ny:<5d} dofs={best['dofs']:>9d} "
+                f"wall={best['wall_s']:.3f}s peak={best['peak_rss_mb']:.1f}MB "
+                + " ".join(f"{k}={v:.3f}" for k, v in best["phases"].items())
+            )
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "label": args.label,
+        "git_rev": _git_rev(),
+        "host": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "cases": cases,
+    }
+    history = Path(args.history)
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with history.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Appended run to {history}")
+    return 0
+
+
+def load_history(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def _select(runs: list[dict], ref: str | None, default: int) -> dict:
+    if ref is None:
+        return runs[default]
+    for run in reversed(runs):
+        if run.get("label") == ref or run.get("git_rev") == ref:
+            return run
+    return runs[int(ref)]
+
+
+def compare_runs(
+    baseline: dict, candidate: dict, threshold: float, min_seconds: float
+) -> list[str]:
+    """Regressions of ``candidate`` vs ``baseline`` beyond ``threshold`` (relative)."""
+    base = {(c["solver"], c["nx"], c["ny"]): c for c in baseline["cases"]}
+    problems = []
+    for case in candidate["cases"]:
+        key = (case["solver"], case["nx"], case["ny"])
+        ref = base.get(key)
+        if ref is None:
+            continue
+        name = f"{key[0]} {key[1]}x{key[2]}"
+        for phase_name, seconds in case["phases"].items():
+            before = ref["phases"].get(phase_name)
+            # Phases faster than min_seconds are dominated by timer noise
+            if before is None or max(before, seconds) < min_seconds:
+                continue
+            if seconds > before * (1.0 + threshold):
+                problems.append(
+                    f"{name} {phase_name}: {before:.4f}s -> {seconds:.4f}s "
+                    f"(+{(seconds / before - 1.0) * 100:.0f}%)"
+                )
+        before_mb, after_mb = ref.get("peak_rss_mb"), case.get("peak_rss_mb")
+        if before_mb and after_mb and after_mb > before_mb * (1.0 + threshold):
+            problems.append(f"{name} peak_rss_mb: {before_mb:.1f} -> {after_mb:.1f}")
+    return problems
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    runs = load_history(Path(args.history))
+    if len(runs) < 2 and args.baseline is None:
+        print("Need at least two runs in the history to compare")
+        return 2
+    baseline = _select(runs, args.baseline, -2)
+    candidate = _select(runs, args.candidate, -1)
+    problems = compare_runs(baseline, candidate, args.threshold, args.min_seconds)
+    print(
+        f"Baseline {baseline.get('label') or baseline.get('git_rev')} "
+        f"vs candidate {candidate.get('label') or candidate.get('git_rev')}"
+    )
+    for p in problems:
+        print(f"REGRESSION {p}")
+    if not problems:
+        print("No regressions")
+    return 1 if problems else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY))
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    run = sub.add_parser("run", help="run the sweep and append it to the history")
+    run.add_argument("--sizes", default=DEFAULT_SIZES, help="comma list of NXxNY")
+    run.add_argument("--solvers", default="mac,fem,analytic", help="any of mac, fem, fem_dd, analytic")
+    run.add_argument("--repeat", type=int, default=1, help="keep the fastest of N runs")
+    run.add_argument("--label", default=None)
+    run.set_defaults(func=cmd_run)
+    cmp = sub.add_parser("compare", help="fail on regressions between two runs")
+    cmp.add_argument("--baseline", default=None, help="label, git rev or index")
+    cmp.add_argument("--candidate", default=None, help="label, git rev or index")
+    cmp.add_argument("--threshold", type=float, default=0.25)
+    cmp.add_argument("--min-seconds", type=float, default=0.01)
+    cmp.set_defaults(func=cmd_compare)
+    args = parser.parse_args(argv)
+    return int(args.func(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Start-up benchmark: import time of the API app and of the worker task.
+
+Each target is imported in a fresh interpreter (the fastest of ``--repeat`` runs is kept)
+and checked against its time budget and the modules it must leave for later: the queue
+client and the numerical stack in the API, the web framework and the numerical stack in
+workers. Those are loaded on first use, by the request or job that needs them.
+
+    python benchmarks/startup.py --repeat 5
+    python benchmarks/startup.py --budget-scale 0.5   # tighter budgets
+
+Exits non-zero on any violation. Cold start is queue latency for autoscaled workers, so
+this runs in the test suite as well.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+_NUMERIC = ["numpy", "scipy", "skfem", "meshio"]
+TARGETS = {
+    "api": {
+        "modules": ["api.app.main"],
+        "budget_ms": 1500.0,
+        "forbidden": ["redis", "rq", *_NUMERIC],
+    },
+    # What a work horse imports before it runs a job (RQ itself is already loaded)
+    "worker": {
+        "modules": ["workers.tasks", "api.app.runner"],
+        "budget_ms": 400.0,
+        "forbidden": ["fastapi", "starlette", "pydantic", *_NUMERIC],
+    },
+}
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+ms = 1e3 * (time.perf_counter() - t0)
+print(json.dumps({"ms": ms, "modules": sorted({m.split(".")[0] for m in sys.modules})}))
+"""
+
+
+def measure(target: str, repeat: int = 3) -> dict:
+    """Import time (ms, fastest run) and the top-level packages a target loads."""
+    spec = TARGETS[target]
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    runs = []
+    for _ in range(max(1, repeat)):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, *spec["modules"]],
+            cwd=ROOT,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    loaded = set(runs[0]["modules"])
+    return {
+        "target": target,
+        "ms": min(r["ms"] for r in runs),
+        "budget_ms": spec["budget_ms"],
+        "forbidden_loaded": [m for m in spec["forbidden"] if m in loaded],
+    }
+
+
+def check(results: list[dict], budget_scale: float = 1.0) -> list[str]:
+    """Human-readable violations: over-budget targets and eagerly imported modules."""
+    problems = []
+    for r in results:
+        budget = r["budget_ms"] * budget_scale
+        if r["ms"] > budget:
+            problems.append(f"{r['target']}: import took {r['ms']:.0f} ms (budget {budget:.0f} ms)")
+        if r["forbidden_loaded"]:
+            names = ", ".join(r["forbidden_loaded"])
+            problems.append(f"{r['target']}: imports {names} at start-up")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", default=",".join(TARGETS), help="comma list of targets")
+    parser.add_argument("--repeat", type=int, default=5, help="keep the fastest of N runs")
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply the budgets")
+    args = parser.parse_args(argv)
+
+    results = [measure(t.strip(), args.repeat) for t in args.targets.split(",") if t.strip()]
+    for r in results:
+        print(f"{r['target']:8s} {r['ms']:8.1f} ms  (budget {r['budget_ms'] * args.budget_scale:.0f} ms)")
+    problems = check(results, args.budget_scale)
+    for p in problems:
+        print(f"REGRESSION {p}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
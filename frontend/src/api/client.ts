@@ -6,10 +6,19 @@ export type JobStatus = OpenAPI.components.schemas.JobStatus;
 // Prefer relative '/api' for local dev proxy; fall back to explicit base URL
 export const BASE_URL = import.meta.env.VITE_API_BASE_URL ?? "/api";
 
+export class HttpError extends Error {
+  status: number;
+
+  constructor(status: number, message: string) {
+    super(message);
+    this.status = status;
+  }
+}
+
 async function json<T>(res: Response): Promise<T> {
   if (!res.ok) {
     const text = await res.text();
-    throw new Error(`HTTP ${res.status}: ${text}`);
+    throw new HttpError(res.status, `HTTP ${res.status}: ${text}`);
   }
   return (await res.json()) as T;
 }
@@ -45,11 +54,36 @@ export function artifactDownloadUrl(id: string, name: string): string {
 }
 
 // Projects API
-export type Project = { id: string; name: string; data: any };
+export type Project = {
+  id: string;
+  name: string;
+  data: any;
+  version?: number;
+  updated_at?: number;
+};
+export type ProjectMeta = {
+  id: string;
+  name: string;
+  created_at: number;
+  updated_at: number;
+  version: number;
+};
 
-export async function listProjects(): Promise<Project[]> {
-  const res = await fetch(`${BASE_URL}/api/v1/projects`);
-  return json(res);
+// One page of the project list and the number of projects matching in total
+export type ProjectPage = { items: ProjectMeta[]; total: number };
+
+export async function listProjects(
+  params: { limit?: number; offset?: number; q?: string } = {},
+): Promise<ProjectPage> {
+  const search = new URLSearchParams();
+  Object.entries(params).forEach(([k, v]) => {
+    if (v !== undefined && v !== "") search.set(k, String(v));
+  });
+  const qs = search.toString();
+  const res = await fetch(`${BASE_URL}/api/v1/projects${qs ? `?${qs}` : ""}`);
+  const items = await json<ProjectMeta[]>(res);
+  const total = Number(res.headers.get("X-Total-Count") ?? items.length);
+  return { items, total };
 }
 
 export async function createProject(name: string, data: any): Promise<Project> {
@@ -66,15 +100,20 @@ export async function getProject(id: string): Promise<Project> {
   return json(res);
 }
 
+// Pass the version the project was loaded at: the server answers 409 (HttpError) when
+// it was saved elsewhere since
 export async function updateProject(
   id: string,
   name: string,
   data: any,
+  version?: number,
 ): Promise<Project> {
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  if (version !== undefined) headers["If-Match"] = `"${version}"`;
   const res = await fetch(`${BASE_URL}/api/v1/projects/${id}`, {
     method: "PUT",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ name, data }),
+    headers,
+    body: JSON.stringify({ name, data, version }),
   });
   return json(res);
 }
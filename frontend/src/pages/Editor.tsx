@@ -26,7 +26,9 @@ import {
   BASE_URL,
   createProject,
   getProject as apiGetProject,
+  HttpError,
   listProjects,
+  updateProject,
 } from "../api/client";
 import { useSnackbar } from "../ui/SnackbarProvider";
 
@@ -75,6 +77,12 @@ export default function Editor() {
   const unitScale = unit === "um" ? 1 : unit === "mm" ? 1000 : 1_000_000;
   const [projectDialogOpen, setProjectDialogOpen] = useState(false);
   const [projects, setProjects] = useState<{ id: string; name: string }[]>([]);
+  const [projectsTotal, setProjectsTotal] = useState(0);
+  // Server project being edited and the version it was loaded or last saved at
+  const [serverProject, setServerProject] = useState<{
+    id: string;
+    version?: number;
+  } | null>(null);
   const [newProjectName, setNewProjectName] = useState("My Project");
   const location = useLocation();
   const [history, setHistory] = useState<
@@ -101,6 +109,10 @@ export default function Editor() {
         if (Array.isArray(data.shapes))
           setShapes(data.shapes.map((d: any) => ({ ...d, id: uid() })));
         if (data.unit) setUnit(data.unit);
+        if (proj.id) {
+          setServerProject({ id: proj.id, version: proj.version });
+          if (proj.name) setNewProjectName(proj.name);
+        }
       } catch {}
       sessionStorage.removeItem("openProjectData");
     }
@@ -669,6 +681,8 @@ export default function Editor() {
                             data.shapes.map((d: any) => ({ ...d, id: uid() })),
                           );
                         if (data.unit) setUnit(data.unit);
+                        // A local file is saved to the server as a new project
+                        setServerProject(null);
                         notify("Project loaded", "success");
                       } catch (e: any) {
                         notify(e?.message ?? "Failed to load project", "error");
@@ -681,14 +695,27 @@ export default function Editor() {
                 </Button>
                 <Button
                   onClick={async () => {
+                    const name = newProjectName || "Untitled";
                     try {
-                      const p = await createProject(
-                        newProjectName || "Untitled",
-                        { unit, shapes },
-                      );
+                      const p = serverProject
+                        ? await updateProject(
+                            serverProject.id,
+                            name,
+                            { unit, shapes },
+                            serverProject.version,
+                          )
+                        : await createProject(name, { unit, shapes });
+                      setServerProject({ id: p.id, version: p.version });
                       notify(`Saved to server: ${p.name}`, "success");
                     } catch (e: any) {
-                      notify(e?.message ?? "Save failed", "error");
+                      if (e instanceof HttpError && e.status === 409) {
+                        notify(
+                          "Project was saved elsewhere since it was opened; reopen it first",
+                          "warning",
+                        );
+                      } else {
+                        notify(e?.message ?? "Save failed", "error");
+                      }
                     }
                   }}
                 >
@@ -697,8 +724,9 @@ export default function Editor() {
                 <Button
                   onClick={async () => {
                     try {
-                      const items = await listProjects();
-                      setProjects(items);
+                      const page = await listProjects({ limit: 100 });
+                      setProjects(page.items);
+                      setProjectsTotal(page.total);
                       setProjectDialogOpen(true);
                     } catch (e: any) {
                       notify(e?.message ?? "Load failed", "error");
@@ -787,6 +815,8 @@ export default function Editor() {
                         data.shapes.map((d: any) => ({ ...d, id: uid() })),
                       );
                     if (data.unit) setUnit(data.unit);
+                    setServerProject({ id: loaded.id, version: loaded.version });
+                    setNewProjectName(loaded.name);
                     setProjectDialogOpen(false);
                     notify(`Loaded ${loaded.name}`, "success");
                   } catch (e: any) {
@@ -798,6 +828,24 @@ export default function Editor() {
               </ListItem>
             ))}
           </List>
+          {projects.length < projectsTotal && (
+            <Button
+              onClick={async () => {
+                try {
+                  const page = await listProjects({
+                    limit: 100,
+                    offset: projects.length,
+                  });
+                  setProjects([...projects, ...page.items]);
+                  setProjectsTotal(page.total);
+                } catch (e: any) {
+                  notify(e?.message ?? "Load failed", "error");
+                }
+              }}
+            >
+              Load more ({projectsTotal - projects.length} remaining)
+            </Button>
+          )}
         </DialogContent>
         <DialogActions>
           <Button onClick={() => setProjectDialogOpen(false)}>Close</Button>
@@ -24,6 +24,9 @@ import {
 } from "../api/client";
 import { useSnackbar } from "../ui/SnackbarProvider";
 
+// Statuses after which the job no longer changes
+const TERMINAL = new Set(["finished", "failed", "canceled"]);
+
 export default function JobStatus() {
   const { id } = useParams();
   const [status, setStatus] = useState<JobStatusType | null>(null);
@@ -44,7 +47,7 @@ export default function JobStatus() {
       try {
         const s = await getJob(id);
         if (!cancelled) setStatus(s);
-        if (s.status === "finished" || s.status === "failed") {
+        if (TERMINAL.has(s.status)) {
           try {
             const a = await listArtifacts(s.id);
             if (!cancelled) setArtifacts(a.artifacts);
@@ -115,7 +118,7 @@ export default function JobStatus() {
               value={(status.progress ?? 0) * 100}
             />
           </Stack>
-          {(status.status === "finished" || status.status === "failed") && (
+          {TERMINAL.has(status.status) && (
             <Stack spacing={1}>
               <Typography variant="subtitle1">Artifacts</Typography>
               {artifacts ? (
@@ -19,22 +19,30 @@ import { useNavigate } from "react-router-dom";
 import {
   deleteProject,
   getProject as apiGetProject,
+  HttpError,
   listProjects,
   updateProject,
 } from "../api/client";
 import { useSnackbar } from "../ui/SnackbarProvider";
 
+const PAGE_SIZE = 100;
+
 export default function Projects() {
   const [items, setItems] = useState<{ id: string; name: string }[]>([]);
+  const [total, setTotal] = useState(0);
   const [renameId, setRenameId] = useState<string | null>(null);
   const [renameName, setRenameName] = useState("");
   const nav = useNavigate();
   const { notify } = useSnackbar();
 
-  async function refresh() {
+  // Reload the first page, or append the next one
+  async function refresh(more = false) {
     try {
-      const data = await listProjects();
-      setItems(data.map((p) => ({ id: p.id, name: p.name })));
+      const offset = more ? items.length : 0;
+      const page = await listProjects({ limit: PAGE_SIZE, offset });
+      const loaded = page.items.map((p) => ({ id: p.id, name: p.name }));
+      setItems(more ? [...items, ...loaded] : loaded);
+      setTotal(page.total);
     } catch (e: any) {
       notify(e?.message ?? "Failed to load projects", "error");
     }
@@ -99,6 +107,11 @@ export default function Projects() {
             </ListItem>
           ))}
         </List>
+        {items.length < total && (
+          <Button onClick={() => refresh(true)}>
+            Load more ({total - items.length} remaining)
+          </Button>
+        )}
       </Stack>
       <Dialog open={!!renameId} onClose={() => setRenameId(null)}>
         <DialogTitle>Rename Project</DialogTitle>
@@ -115,9 +128,17 @@ export default function Projects() {
           <Button
             onClick={async () => {
               if (!renameId) return;
-              const proj = await apiGetProject(renameId);
-              await updateProject(renameId, renameName, proj.data);
-              notify("Renamed", "success");
+              try {
+                const proj = await apiGetProject(renameId);
+                await updateProject(renameId, renameName, proj.data, proj.version);
+                notify("Renamed", "success");
+              } catch (e: any) {
+                if (e instanceof HttpError && e.status === 409) {
+                  notify("Project was changed elsewhere; try again", "warning");
+                } else {
+                  notify(e?.message ?? "Rename failed", "error");
+                }
+              }
               setRenameId(null);
               refresh();
             }}
@@ -61,6 +61,8 @@ export default function Sweeps() {
       if (res.ok) {
         const st = await res.json();
         setStatus(st);
+        // Every job finished, failed or was canceled
+        if (st.done) return;
       }
       timer = setTimeout(poll, 1000);
     }
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Load test for the job API.
+
+Drives job submission, status polling, result and artifact downloads and sweeps at a fixed
+concurrency, then reports throughput, latency percentiles and error rates per operation.
+
+By default everything runs in this process: the real FastAPI app behind ``TestClient``,
+an in-memory Redis (fakeredis) and RQ ``SimpleWorker`` threads executing the real job
+task. With ``--base-url`` the same scenario runs over HTTP against a deployed stack.
+
+    python scripts/loadtest.py --jobs 200 --concurrency 16 --workers 4 --sweeps 5
+    python scripts/loadtest.py --base-url http://localhost:8000 --jobs 50
+
+Exits non-zero when the overall error rate exceeds ``--max-error-rate``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+API = "/api/v1"
+DEFAULT_PAYLOAD = {
+    "name": "loadtest",
+    "geometry": {"width": 0.001, "height": 0.0001},
+    "material": {"density": 1000, "viscosity": 0.001, "diffusivity": 1e-9},
+    "boundaries": [{"type": "inlet", "value": 0.001}],
+}
+
+
+class Recorder:
+    """Thread-safe log of (operation, seconds, ok) samples."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.samples: list[tuple[str, float, bool]] = []
+        self.jobs: list[tuple[float, str]] = []
+
+    def add(self, op: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.samples.append((op, seconds, ok))
+
+    def job(self, seconds: float, status: str) -> None:
+        with self._lock:
+            self.jobs.append((seconds, status))
+
+
+def _request(client, rec: Recorder, op: str, method: str, url: str, **kwargs):
+    t0 = time.perf_counter()
+    try:
+        resp = client.request(method, url, **kwargs)
+        _ = resp.content  # include body transfer in the latency
+    except Exception:
+        rec.add(op, time.perf_counter() - t0, False)
+        return None
+    rec.add(op, time.perf_counter() - t0, resp.status_code < 400)
+    return resp if resp.status_code < 400 else None
+
+
+def run_job(client, rec: Recorder, payload: dict, poll: float, timeout: float) -> None:
+    """Submit one job, poll it to completion and download its result and an artifact."""
+    t0 = time.perf_counter()
+    resp = _request(client, rec, "submit", "POST", f"{API}/jobs", json=payload)
+    if resp is None:
+        rec.job(time.perf_counter() - t0, "error")
+        return
+    job_id = resp.json()["id"]
+    status = resp.json().get("status", "queued")
+    while status not in {"finished", "failed"}:
+        if time.perf_counter() - t0 > timeout:
+            rec.job(time.perf_counter() - t0, "timeout")
+            return
+        time.sleep(poll)
+        resp = _request(client, rec, "status", "GET", f"{API}/jobs/{job_id}")
+        if resp is not None:
+            status = resp.json()["status"]
+    rec.job(time.perf_counter() - t0, status)
+    if status != "finished":
+        return
+    _request(client, rec, "result", "GET", f"{API}/jobs/{job_id}/result")
+    resp = _request(client, rec, "artifacts", "GET", f"{API}/jobs/{job_id}/artifacts")
+    if resp is not None:
+        items = resp.json()["artifacts"]
+        # The largest artifact (the VTU in FEM mode) dominates download cost
+        biggest = max(items, key=lambda a: a["size"])
+        _request(client, rec, "download", "GET", biggest["url"])
+
+
+def run_sweep(
+    client, rec: Recorder, payload: dict, variants: int, poll: float, timeout: float
+) -> None:
+    """Submit a sweep of ``variants`` inlet velocities, poll it and fetch its CSV."""
+    body = {
+        "name": "loadtest-sweep",
+        "base": payload,
+        "variants": [
+            {"boundaries": [{"type": "inlet", "value": 1e-3 * (i + 1)}]} for i in range(variants)
+        ],
+    }
+    t0 = time.perf_counter()
+    resp = _request(client, rec, "sweep_submit", "POST", f"{API}/sweeps", json=body)
+    if resp is None:
+        return
+    sid = resp.json()["id"]
+    while time.perf_counter() - t0 < timeout:
+        time.sleep(poll)
+        resp = _request(client, rec, "sweep_status", "GET", f"{API}/sweeps/{sid}")
+        if resp is not None and resp.json()["done"]:
+            _request(client, rec, "sweep_csv", "GET", f"{API}/sweeps/{sid}/csv")
+            return
+    rec.add("sweep_timeout", time.perf_counter() - t0, False)
+
+
+def _percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in [0, 100])."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _latency_stats(values: list[float]) -> dict[str, float]:
+    return {
+        "p50_ms": _percentile(values, 50) * 1e3,
+        "p90_ms": _percentile(values, 90) * 1e3,
+        "p99_ms": _percentile(values, 99) * 1e3,
+        "max_ms": max(values) * 1e3 if values else float("nan"),
+    }
+
+
+def summarize(rec: Recorder, wall_s: float) -> dict[str, Any]:
+    ops: dict[str, dict[str, Any]] = {}
+    for op in sorted({s[0] for s in rec.samples}):
+        rows = [s for s in rec.samples if s[0] == op]
+        errors = sum(1 for s in rows if not s[2])
+        ops[op] = {
+            "count": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            **_latency_stats([s[1] for s in rows]),
+        }
+    total = len(rec.samples)
+    errors = sum(1 for s in rec.samples if not s[2])
+    finished = [s for s, status in rec.jobs if status == "finished"]
+    return {
+        "wall_s": wall_s,
+        "requests": total,
+        "throughput_rps": total / wall_s if wall_s > 0 else 0.0,
+        "error_rate": errors / total if total else 0.0,
+        "jobs": {
+            "submitted": len(rec.jobs),
+            "finished": len(finished),
+            "failed": sum(1 for _s, status in rec.jobs if status != "finished"),
+            "per_s": len(finished) / wall_s if wall_s > 0 else 0.0,
+            "end_to_end": _latency_stats(finished),
+        },
+        "ops": ops,
+    }
+
+
+def _worker_loop(server, stop: threading.Event) -> None:
+    import fakeredis
+    from rq import Queue, SimpleWorker
+    from rq.timeouts import TimerDeathPenalty
+
+    class ThreadWorker(SimpleWorker):
+        # Signal-based timeouts and handlers only work on the main thread
+        death_penalty_class = TimerDeathPenalty
+
+        def _install_signal_handlers(self) -> None:
+            pass
+
+    conn = fakeredis.FakeRedis(server=server)
+    worker = ThreadWorker([Queue("jobs", connection=conn)], connection=conn)
+    while not stop.is_set():
+        if not worker.work(burst=True, logging_level="WARNING"):
+            stop.wait(0.02)
+
+
+@contextmanager
+def in_process_stack(workers: int) -> Iterator[Callable[[], Any]]:
+    """Real app on an in-memory Redis with ``workers`` worker threads."""
+    import fakeredis
+    from fastapi.testclient import TestClient
+
+    from api.app.main import app
+    from api.app.routers import jobs
+
+    server = fakeredis.FakeServer()
+    stop = threading.Event()
+    # Every load-generating thread is the same client: measure the stack, not its limits
+    unlimited = ("SUBMIT_RATE_PER_S", "STATUS_RATE_PER_S", "QUEUE_MAX_DEPTH", "PROJECT_MAX_INFLIGHT")
+    saved = {k: os.environ.get(k) for k in ("ARTIFACTS_DIR", "INLINE_JOB_EXEC", *unlimited)}
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp:
+        os.environ["ARTIFACTS_DIR"] = tmp
+        os.environ.pop("INLINE_JOB_EXEC", None)
+        os.environ.update(dict.fromkeys(unlimited, "0"))
+        jobs._REDIS_OVERRIDE = fakeredis.FakeRedis(server=server)
+        threads = [
+            threading.Thread(target=_worker_loop, args=(server, stop), daemon=True)
+            for _ in range(workers)
+        ]
+        for t in threads:
+            t.start()
+        try:
+            yield lambda: TestClient(app)
+        finally:
+            stop.set()
+            for t in threads:
+                t.join(timeout=30)
+            jobs._REDIS_OVERRIDE = None
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+
+@contextmanager
+def remote_stack(base_url: str) -> Iterator[Callable[[], Any]]:
+    import httpx
+
+    clients: list[Any] = []
+
+    def factory():
+        c = httpx.Client(base_url=base_url, timeout=60.0)
+        clients.append(c)
+        return c
+
+    try:
+        yield factory
+    finally:
+        for c in clients:
+            c.close()
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    payload = json.loads(Path(args.payload).read_text()) if args.payload else DEFAULT_PAYLOAD
+    rec = Recorder()
+    local = threading.local()
+    stack = remote_stack(args.base_url) if args.base_url else in_process_stack(args.workers)
+    with stack as make_client:
+
+        def client():
+            # One client per load-generating thread
+            if not hasattr(local, "client"):
+                local.client = make_client()
+            return local.client
+
+        tasks: list[Callable[[], None]] = []
+        for i in range(args.jobs):
+            tasks.append(lambda: run_job(client(), rec, payload, args.poll, args.timeout))
+            if args.sweeps and i % max(1, args.jobs // args.sweeps) == 0:
+                tasks.append(
+                    lambda: run_sweep(
+                        client(), rec, payload, args.variants, args.poll, args.timeout
+                    )
+                )
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for fut in [pool.submit(t) for t in tasks]:
+                fut.result()
+        wall = time.perf_counter() - t0
+    report = summarize(rec, wall)
+    report["config"] = {
+        "jobs": args.jobs,
+        "sweeps": args.sweeps,
+        "variants": args.variants,
+        "concurrency": args.concurrency,
+        "workers": None if args.base_url else args.workers,
+        "target": args.base_url or "in-process",
+    }
+    return report
+
+
+def print_report(report: dict[str, Any]) -> None:
+    jobs = report["jobs"]
+    print(
+        f"{report['requests']} requests in {report['wall_s']:.2f}s "
+        f"({report['throughput_rps']:.1f} req/s), error rate {report['error_rate']:.2%}"
+    )
+    e2e = jobs["end_to_end"]
+    print(
+        f"jobs: {jobs['finished']}/{jobs['submitted']} finished ({jobs['per_s']:.2f}/s), "
+        f"end-to-end p50={e2e['p50_ms']:.0f}ms p90={e2e['p90_ms']:.0f}ms "
+        f"p99={e2e['p99_ms']:.0f}ms"
+    )
+    print(f"{'op':14s} {'count':>6s} {'err%':>6s} {'p50ms':>8s} {'p90ms':>8s} {'p99ms':>8s}")
+    for op, s in report["ops"].items():
+        print(
+            f"{op:14s} {s['count']:6d} {s['error_rate'] * 100:6.1f} "
+            f"{s['p50_ms']:8.1f} {s['p90_ms']:8.1f} {s['p99_ms']:8.1f}"
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=50, help="jobs to submit")
+    parser.add_argument("--sweeps", type=int, default=2, help="sweeps to submit")
+    parser.add_argument("--variants", type=int, default=4, help="jobs per sweep")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--workers", type=int, default=2, help="in-process worker threads")
+    parser.add_argument("--base-url", default=None, help="target a running API instead")
+    parser.add_argument("--payload", default=None, help="JSON file with the job spec")
+    parser.add_argument("--poll", type=float, default=0.2, help="status poll interval (s)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="per-job timeout (s)")
+    parser.add_argument("--max-error-rate", type=float, default=0.0)
+    parser.add_argument("--out", default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+    report = run(args)
+    print_report(report)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+    return 1 if report["error_rate"] > args.max_error_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Lightweight per-phase timing and memory instrumentation for solver runs and jobs.
+
+Phases nest: entering ``phase("assembly")`` inside ``phase("solve")`` records under
+``"solve/assembly"``. Each phase records wall time, call count and the process peak RSS
+(``ru_maxrss``) on exit together with how much the phase raised that peak. Pass a
+``NullTimer`` (or ``None`` to ``phase``) to turn instrumentation off; its phases are a
+shared no-op context, so disabled instrumentation costs one attribute lookup per phase.
+
+Timers are also where a run can be cancelled: given a ``cancelled`` callable, entering a
+phase (or calling ``checkpoint``) raises ``Cancelled`` once it returns true. Solvers call
+``checkpoint`` inside long loops, so a cancelled run stops within an iteration or a step.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Iterator, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+class Cancelled(BaseException):
+    """The run was cancelled.
+
+    Like ``KeyboardInterrupt`` it is not an ``Exception``, so the ``except Exception``
+    fallbacks of the solvers let it through.
+    """
+
+
+class PhaseTimer:
+    """Accumulates wall-clock seconds and peak-RSS growth per (nested) phase.
+
+    ``cancelled`` is polled at most every ``poll_seconds`` at phase entries and
+    checkpoints; once it returns true every later phase and checkpoint raises ``Cancelled``.
+    """
+
+    enabled = True
+
+    def __init__(
+        self, cancelled: Callable[[], bool] | None = None, poll_seconds: float = 0.5
+    ) -> None:
+        self._cancelled = cancelled
+        self._poll_seconds = poll_seconds
+        self._next_poll = 0.0
+        self._stopped = False
+        self.phases: dict[str, float] = {}
+        self._calls: dict[str, int] = {}
+        self._rss_peak: dict[str, float] = {}
+        self._rss_growth: dict[str, float] = {}
+        self._stack: list[str] = []
+        self._t0 = time.perf_counter()
+
+    def checkpoint(self) -> None:
+        """Raise ``Cancelled`` if the run has been cancelled."""
+        if self._cancelled is None:
+            return
+        if not self._stopped:
+            now = time.monotonic()
+            if now < self._next_poll:
+                return
+            self._next_poll = now + self._poll_seconds
+            self._stopped = bool(self._cancelled())
+        if self._stopped:
+            raise Cancelled("Job was cancelled")
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.checkpoint()
+        path = "/".join([*self._stack, name])
+        self._stack.append(name)
+        rss0 = peak_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            rss1 = peak_rss_mb()
+            self._stack.pop()
+            self.phases[path] = self.phases.get(path, 0.0) + dt
+            self._calls[path] = self._calls.get(path, 0) + 1
+            self._rss_peak[path] = max(self._rss_peak.get(path, 0.0), rss1)
+            self._rss_growth[path] = self._rss_growth.get(path, 0.0) + (rss1 - rss0)
+
+    def as_dict(self) -> dict[str, float]:
+        """Seconds per phase path."""
+        return dict(self.phases)
+
+    def report(self) -> dict[str, Any]:
+        """Timings and memory per phase plus totals, JSON-serializable."""
+        return {
+            "total_s": time.perf_counter() - self._t0,
+            "peak_rss_mb": peak_rss_mb(),
+            "phases": {
+                path: {
+                    "seconds": seconds,
+                    "calls": self._calls[path],
+                    "peak_rss_mb": self._rss_peak[path],
+                    "rss_growth_mb": self._rss_growth[path],
+                }
+                for path, seconds in self.phases.items()
+            },
+        }
+
+
+class NullTimer(PhaseTimer):
+    """Disabled instrumentation: records nothing, but still honours cancellation."""
+
+    enabled = False
+
+    def phase(self, name: str):  # type: ignore[override]
+        self.checkpoint()
+        return nullcontext()
+
+    def report(self) -> dict[str, Any]:
+        return {}
+
+
+def phase(timer: Optional[PhaseTimer], name: str):
+    """``timer.phase(name)`` or a no-op when no timer is given."""
+    return timer.phase(name) if timer is not None else nullcontext()
+
+
+def checkpoint(timer: PhaseTimer | None) -> None:
+    """``timer.checkpoint()``, for loops without phases; a no-op when no timer is given."""
+    if timer is not None:
+        timer.checkpoint()
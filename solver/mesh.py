@@ -0,0 +1,205 @@
+"""Mesh quality metrics and the compact mesh cache format.
+
+Quality is computed for all cells at once with NumPy (no per-cell Python loop), for
+triangle and quad meshes:
+
+- ``aspect_ratio``: triangles ``l_max (l_0 + l_1 + l_2) / (4 sqrt(3) A)``, quads
+  ``l_max / l_min``; 1 for the equilateral triangle and the square.
+- ``min_angle_deg``: smallest interior angle.
+- ``skewness``: equiangle skew ``max((t_max - t_e) / (180 - t_e), (t_e - t_min) / t_e)``
+  with ``t_e`` 60 degrees for triangles and 90 for quads; 0 is ideal, 1 degenerate.
+- ``area`` and ``edge_length`` for the size distribution.
+
+Meshes are cached as ``.npz`` files holding float64 points, int32 cells and the tagged
+boundary facets (inlet at the smallest x, outlet at the largest, walls elsewhere), named
+by ``mesh_key`` of the definition that generated them.
+
+Field output is written by ``write_output`` in ``float64`` or, for viewing, ``float32``
+precision (points and point data in single precision, cells as int32), about half the size.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+BOUNDARY_TAGS = ("inlet", "outlet", "wall")
+OUTPUT_PRECISIONS = ("float64", "float32")
+
+
+def cell_quality(points: np.ndarray, cells: np.ndarray) -> dict[str, np.ndarray]:
+    """Per-cell quality arrays of a triangle (k=3) or quad (k=4) mesh.
+
+    ``points`` is (N, 2) or (N, 3) (z ignored), ``cells`` (M, k) vertex indices in order.
+    """
+    xy = np.asarray(points, dtype=float)[:, :2]
+    cells = np.asarray(cells)
+    k = cells.shape[1]
+    P = xy[cells]  # (M, k, 2)
+    nxt = np.roll(P, -1, axis=1)
+    prv = np.roll(P, 1, axis=1)
+    edges = np.linalg.norm(nxt - P, axis=2)  # edge i from vertex i to i+1
+    a, b = prv - P, nxt - P
+    cos = np.einsum("mkd,mkd->mk", a, b) / np.maximum(
+        np.linalg.norm(a, axis=2) * np.linalg.norm(b, axis=2), 1e-300
+    )
+    angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))
+    # Shoelace formula
+    cross = P[:, :, 0] * nxt[:, :, 1] - nxt[:, :, 0] * P[:, :, 1]
+    area = 0.5 * np.abs(cross.sum(axis=1))
+    l_max, l_min = edges.max(axis=1), edges.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if k == 3:
+            aspect = l_max * edges.sum(axis=1) / (4.0 * np.sqrt(3.0) * area)
+        else:
+            aspect = l_max / l_min
+    aspect = np.where(np.isfinite(aspect), aspect, np.inf)
+    ideal = 180.0 * (k - 2) / k
+    skew = np.maximum(
+        (angles.max(axis=1) - ideal) / (180.0 - ideal), (ideal - angles.min(axis=1)) / ideal
+    )
+    return {
+        "aspect_ratio": aspect,
+        "min_angle_deg": angles.min(axis=1),
+        "skewness": skew,
+        "area": area,
+        "edge_length": edges.ravel(),
+    }
+
+
+def _stats(values: np.ndarray, percentiles: bool = False) -> dict[str, float]:
+    out = {"min": float(values.min()), "mean": float(values.mean()), "max": float(values.max())}
+    if percentiles:
+        p05, p50, p95 = np.percentile(values, [5, 50, 95])
+        out.update({"p05": float(p05), "p50": float(p50), "p95": float(p95)})
+    return out
+
+
+def quality_summary(points: np.ndarray, cells: np.ndarray, cell_type: str) -> dict[str, Any]:
+    """JSON-serializable min/mean/max of each metric, with percentiles for the sizes."""
+    q = cell_quality(points, cells)
+    finite = np.isfinite(q["aspect_ratio"])
+    return {
+        "cell_type": cell_type,
+        "cells": len(cells),
+        "degenerate": int((~finite | (q["area"] <= 0)).sum()),
+        "aspect_ratio": _stats(q["aspect_ratio"][finite]) if finite.any() else None,
+        "min_angle_deg": _stats(q["min_angle_deg"]),
+        "skewness": _stats(q["skewness"]),
+        "area": _stats(q["area"], percentiles=True),
+        "edge_length": _stats(q["edge_length"], percentiles=True),
+    }
+
+
+def boundary_facets(points: np.ndarray, cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Boundary edges (B, 2) and their indices into ``BOUNDARY_TAGS``.
+
+    Boundary edges are the ones used by a single cell; they are tagged inlet/outlet when
+    both ends lie on the smallest/largest x of the mesh and wall otherwise.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    ends = np.roll(cells, -1, axis=1)
+    # One int64 key per undirected edge: 1-D unique is far faster than rows
+    n = int(cells.max()) + 1
+    keys = (np.minimum(cells, ends) * n + np.maximum(cells, ends)).ravel()
+    unique, counts = np.unique(keys, return_counts=True)
+    facets = np.column_stack(np.divmod(unique[counts == 1], n))
+    x = np.asarray(points, dtype=float)[:, 0]
+    tol = 1e-12 * max(float(np.ptp(x)), 1e-300)
+    fx = x[facets]
+    tags = np.full(len(facets), BOUNDARY_TAGS.index("wall"), dtype=np.uint8)
+    tags[(np.abs(fx - x.min()) <= tol).all(axis=1)] = BOUNDARY_TAGS.index("inlet")
+    tags[(np.abs(fx - x.max()) <= tol).all(axis=1)] = BOUNDARY_TAGS.index("outlet")
+    return facets, tags
+
+
+def mesh_key(definition: dict[str, Any]) -> str:
+    """Content hash of a mesh definition (generator and its parameters)."""
+    canonical = json.dumps(definition, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+def save_mesh(path: Path, points: np.ndarray, cells: np.ndarray, cell_type: str) -> None:
+    """Write the mesh and its tagged boundary atomically, so readers never see partial files."""
+    points = np.ascontiguousarray(np.asarray(points, dtype=float)[:, :2])
+    cells = np.asarray(cells).astype(np.int32)
+    facets, tags = boundary_facets(points, cells)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp file: sweep jobs sharing a mesh miss the cache and write it together
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(
+                f,
+                cell_type=np.array(cell_type),
+                points=points,
+                cells=cells,
+                boundary_facets=facets.astype(np.int32),
+                boundary_tags=tags,
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def load_mesh(path: Path) -> dict[str, Any]:
+    """Read a cached mesh: ``points`` (N, 2), ``cells``, ``cell_type`` and ``boundary``.
+
+    ``boundary`` maps each tag in ``BOUNDARY_TAGS`` to its (B, 2) facets.
+    """
+    with np.load(path, allow_pickle=False) as z:
+        facets, tags = z["boundary_facets"], z["boundary_tags"]
+        return {
+            "cell_type": str(z["cell_type"]),
+            "points": z["points"],
+            "cells": z["cells"].astype(np.int64),
+            "boundary": {name: facets[tags == i] for i, name in enumerate(BOUNDARY_TAGS)},
+        }
+
+
+def output_mesh(m, precision: str = "float64"):
+    """``m`` as exported at ``precision``: itself for float64, else a single-precision copy.
+
+    Points keep their z-column: VTU and legacy VTK store three coordinates, so 2-D points
+    would be padded again by the writer (the zero column compresses to almost nothing).
+    """
+    if precision not in OUTPUT_PRECISIONS:
+        raise ValueError(f"Unknown output precision {precision!r}")
+    if precision == "float64":
+        return m
+    import meshio
+
+    def single(a: np.ndarray) -> np.ndarray:
+        a = np.asarray(a)
+        return a.astype(np.float32) if a.dtype.kind == "f" else a
+
+    return meshio.Mesh(
+        single(m.points),
+        [(c.type, np.asarray(c.data).astype(np.int32)) for c in m.cells],
+        point_data={k: single(v) for k, v in m.point_data.items()},
+        cell_data={k: [single(v) for v in vs] for k, vs in m.cell_data.items()},
+    )
+
+
+def _payload_bytes(m) -> int:
+    arrays = [m.points, *(c.data for c in m.cells), *m.point_data.values()]
+    arrays += [v for vs in m.cell_data.values() for v in vs]
+    return sum(np.asarray(a).nbytes for a in arrays)
+
+
+def write_output(path: Path | str, m, precision: str = "float64") -> int:
+    """Write ``m`` with meshio at ``precision``; returns the array bytes saved against ``m``."""
+    import meshio
+
+    out = output_mesh(m, precision)
+    meshio.write(Path(path).as_posix(), out)
+    return _payload_bytes(m) - _payload_bytes(out)
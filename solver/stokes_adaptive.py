@@ -0,0 +1,256 @@
+"""Adaptive P2-P1 Stokes solve for the rectangular channel.
+
+The driver starts from a coarse mesh of near-square cells, solves, and evaluates a
+residual a posteriori error indicator per element: the interior residual
+``h^2 |mu lap(u) - grad(p)|^2 / mu + mu div(u)^2`` plus half of the normal-traction jumps
+``h |[mu du/dn - p n]|^2 / mu`` over its edges. Elements holding the largest indicators
+(Doerfler marking) are refined, and the loop stops at the target relative error (estimate
+over the energy norm of the velocity), at the DOF budget or after ``max_levels``.
+
+Each level is solved by conjugate gradients on the pressure Schur complement, with the
+velocity block factorized once per level. The pressure of the previous level, prolongated
+onto the refined mesh, is the initial guess, and the iteration only runs until the
+algebraic error is well below the previous discretization error, so refined levels take a
+few iterations instead of a full solve.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from .instrument import PhaseTimer, checkpoint, phase
+from .stokes_fem import MeshTri, _assemble_condensed, _finish, _scatter
+
+# Algebraic tolerance relative to the previous level's error estimate
+_SOLVE_FRACTION = 1e-2
+
+
+def initial_mesh(h: float, l: float, ny_cells: int = 3):
+    """Tensor mesh with ``ny_cells`` across the channel and near-square cells."""
+    nx_cells = max(1, math.ceil(l / h * ny_cells))
+    return MeshTri().init_tensor(np.linspace(0.0, l, nx_cells + 1), np.linspace(0.0, h, ny_cells + 1))
+
+
+def mesh_dofs(mesh) -> int:
+    """P2-P1 DOFs of a triangle mesh: two velocity components on vertices and edges."""
+    return 2 * (mesh.p.shape[1] + mesh.facets.shape[1]) + mesh.p.shape[1]
+
+
+def _pressure_mass_diag(bp) -> np.ndarray:
+    from skfem import BilinearForm, asm
+
+    @BilinearForm
+    def mass(p, q, _):
+        return p * q
+
+    return np.asarray(asm(mass, bp).sum(axis=1)).ravel()
+
+
+def schur_cg(
+    system: dict,
+    mu: float,
+    p0: np.ndarray | None = None,
+    tol: float = 1e-10,
+    maxiter: int = 500,
+    timer: PhaseTimer | None = None,
+) -> tuple[np.ndarray, int]:
+    """Solve the condensed system by CG on the pressure Schur complement.
+
+    The preconditioner is the lumped pressure mass matrix over ``mu``. ``tol`` is
+    relative to the right-hand side. Returns the condensed solution and the iteration count.
+    """
+    from scipy.sparse.linalg import splu
+
+    Kc = system["Kc"].tocsr()
+    rhs = system["rhsc"]
+    nuf = int(system["free"][: system["bu"].N].sum())
+    Bt = Kc[:nuf, nuf:]
+    B = Kc[nuf:, :nuf]
+    f, g = rhs[:nuf], rhs[nuf:]
+    with phase(timer, "factorize"):
+        lu = splu(Kc[:nuf, :nuf].tocsc())
+        prec = mu / _pressure_mass_diag(system["bp"])
+
+    def schur(p: np.ndarray) -> np.ndarray:
+        return B @ lu.solve(Bt @ p)
+
+    with phase(timer, "solve"):
+        b = B @ lu.solve(f) - g
+        b_norm = float(np.linalg.norm(b)) or 1.0
+        P = np.zeros(B.shape[0]) if p0 is None else np.array(p0, dtype=float)
+        r = b - schur(P) if p0 is not None else b.copy()
+        z = prec * r
+        d = z.copy()
+        rz = float(r @ z)
+        it = 0
+        while float(np.linalg.norm(r)) > tol * b_norm and it < maxiter:
+            checkpoint(timer)
+            Sd = schur(d)
+            alpha = rz / float(d @ Sd)
+            P += alpha * d
+            r -= alpha * Sd
+            z = prec * r
+            rz_new = float(r @ z)
+            d = z + (rz_new / rz) * d
+            rz = rz_new
+            it += 1
+        if float(np.linalg.norm(r)) > tol * b_norm:
+            raise RuntimeError(f"Schur complement CG did not converge ({it} iterations)")
+        U = lu.solve(f - Bt @ P)
+    return np.concatenate([U, P]), it
+
+
+def _vertex_laplacians(mesh, comps: list[np.ndarray]) -> list[np.ndarray]:
+    """Elementwise Laplacian of scalar P2 fields.
+
+    P2 gradients are linear on each (affine) triangle, so the constant Hessian follows
+    from the gradients at the three vertices.
+    """
+    from skfem import Basis, ElementTriP2
+
+    X = np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    at_vertices = Basis(mesh, ElementTriP2(), quadrature=(X, np.full(3, 1.0 / 6.0)))
+    pts = mesh.p[:, mesh.t]
+    dX = np.stack([pts[:, 1] - pts[:, 0], pts[:, 2] - pts[:, 0]], axis=1)
+    inv = np.linalg.inv(np.moveaxis(dX, -1, 0))
+    out = []
+    for c in comps:
+        g = at_vertices.interpolate(c).grad
+        dG = np.stack([g[:, :, 1] - g[:, :, 0], g[:, :, 2] - g[:, :, 0]], axis=2)
+        H = np.einsum("iev,evd->eid", dG, inv)
+        out.append(H[:, 0, 0] + H[:, 1, 1])
+    return out
+
+
+def error_indicators(mesh, system: dict, xc: np.ndarray, mu: float) -> tuple[np.ndarray, float]:
+    """Squared indicator per element and the relative error estimate."""
+    from skfem import (
+        Basis,
+        BilinearForm,
+        ElementTriP1,
+        ElementTriP2,
+        Functional,
+        InteriorFacetBasis,
+        asm,
+    )
+    from skfem.helpers import ddot, grad
+
+    bu = system["bu"]
+    xfull = _scatter(system, xc)
+    U, P = xfull[: bu.N], xfull[bu.N :]
+    comps = [np.concatenate([U[bu.nodal_dofs[k]], U[bu.facet_dofs[k]]]) for k in (0, 1)]
+    lap = _vertex_laplacians(mesh, comps)
+
+    bs = Basis(mesh, ElementTriP2(), intorder=4)
+    bp = Basis(mesh, ElementTriP1(), intorder=4)
+    nq = bs.X.shape[1]
+
+    @Functional
+    def interior(w):
+        gp = grad(w["p"])
+        r0 = mu * w["l0"] - gp[0]
+        r1 = mu * w["l1"] - gp[1]
+        dv = grad(w["ux"])[0] + grad(w["uy"])[1]
+        return w.h**2 * (r0**2 + r1**2) / mu + mu * dv**2
+
+    eta = interior.elemental(
+        bs,
+        ux=bs.interpolate(comps[0]),
+        uy=bs.interpolate(comps[1]),
+        p=bp.interpolate(P),
+        l0=np.repeat(lap[0][:, None], nq, axis=1),
+        l1=np.repeat(lap[1][:, None], nq, axis=1),
+    )
+
+    fu = [InteriorFacetBasis(mesh, system["e_u"], side=i, intorder=4) for i in (0, 1)]
+    fp = [InteriorFacetBasis(mesh, ElementTriP1(), side=i, intorder=4) for i in (0, 1)]
+
+    @Functional
+    def jump(w):
+        n = w.n
+        t1 = mu * np.einsum("ij...,j...->i...", grad(w["u1"]), n) - w["p1"] * n
+        t2 = mu * np.einsum("ij...,j...->i...", grad(w["u2"]), n) - w["p2"] * n
+        return w.h * ((t1 - t2) ** 2).sum(axis=0) / mu
+
+    eta_facets = jump.elemental(
+        fu[0],
+        u1=fu[0].interpolate(U),
+        u2=fu[1].interpolate(U),
+        p1=fp[0].interpolate(P),
+        p2=fp[1].interpolate(P),
+    )
+    per_facet = np.zeros(mesh.facets.shape[1])
+    np.add.at(per_facet, fu[0].find, eta_facets)
+    eta = eta + 0.5 * per_facet[mesh.t2f].sum(axis=0)
+
+    @BilinearForm
+    def viscous(u, v, _):
+        return mu * ddot(grad(u), grad(v))
+
+    energy = float(U @ (asm(viscous, bu) @ U)) or 1.0
+    return eta, math.sqrt(float(eta.sum()) / energy)
+
+
+def solve_rect_stokes_adaptive(
+    h: float,
+    l: float,
+    mu: float,
+    u_avg: float,
+    target_error: float = 1e-3,
+    max_dofs: int = 200_000,
+    theta: float = 0.5,
+    max_levels: int = 20,
+    ny_cells: int = 3,
+    inlet: str = "parabolic",
+    with_metrics: bool = False,
+    timer: PhaseTimer | None = None,
+    mesh=None,
+):
+    """Adaptive counterpart of ``solve_rect_stokes_fem`` with the same return values.
+
+    Metrics also carry ``error_estimate``, ``iterations`` (all levels) and ``levels``: the
+    DOFs, error estimate and CG iterations of each level, i.e. a mesh-independence study.
+    ``mesh`` replaces the initial mesh; starting from the final mesh of an earlier run with
+    the same target skips the refinement loop.
+    """
+    if MeshTri is None:
+        raise RuntimeError("scikit-fem not available")
+    from skfem import Basis, ElementTriP1, adaptive_theta
+
+    if mesh is None:
+        with phase(timer, "mesh"):
+            mesh = initial_mesh(h, l, ny_cells)
+    levels: list[dict] = []
+    p0 = None
+    tol = 1e-8
+    while True:
+        system = _assemble_condensed(mesh, h, l, mu, u_avg, timer, inlet=inlet)
+        xc, iterations = schur_cg(system, mu, p0=p0, tol=tol, timer=timer)
+        with phase(timer, "estimate"):
+            eta, rel = error_indicators(mesh, system, xc, mu)
+        levels.append({"dofs": mesh_dofs(mesh), "error_estimate": rel, "iterations": iterations})
+        if rel <= target_error or len(levels) >= max_levels:
+            break
+        with phase(timer, "refine"):
+            refined = mesh.refined(adaptive_theta(eta, theta=theta))
+        if mesh_dofs(refined) > max_dofs:
+            break
+        with phase(timer, "prolongate"):
+            nuf = int(system["free"][: system["bu"].N].sum())
+            target = Basis(refined, ElementTriP1())
+            p0 = system["bp"].probes(target.doflocs) @ xc[nuf:]
+        mesh = refined
+        tol = max(1e-10, _SOLVE_FRACTION * rel)
+
+    m, point_data, metrics = _finish(mesh, system, xc, h, l, timer)
+    metrics.update(
+        {
+            "error_estimate": levels[-1]["error_estimate"],
+            "iterations": sum(lv["iterations"] for lv in levels),
+            "levels": levels,
+        }
+    )
+    if with_metrics:
+        return m, point_data, metrics
+    return m, point_data
@@ -0,0 +1,222 @@
+"""Domain-decomposed parallel Stokes solve for the rectangular channel.
+
+The condensed P2-P1 system is split into overlapping strips along the channel (x), one
+subdomain block per strip. Each block is factorized once, in parallel, by a persistent
+worker process that keeps its SuperLU factor. The global system is then solved with GMRES
+preconditioned by restricted additive Schwarz (RAS): every iteration sends each worker its
+local residual, the workers solve concurrently, and each strip keeps only the unknowns it
+owns. Interior strips have no outlet to pin the pressure level, so their local pressure
+block gets a small negative diagonal shift; this only changes the preconditioner, not the
+solution GMRES converges to.
+"""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import numpy as np
+
+from .instrument import PhaseTimer, checkpoint, phase
+from .stokes_fem import MeshTri, _assemble_condensed, _finish, _rect_mesh
+
+
+def _worker_main(conn) -> None:
+    """Holds the SuperLU factors of its subdomains and answers solve requests."""
+    from scipy.sparse import csc_matrix
+    from scipy.sparse.linalg import splu
+
+    factors = {}
+    while True:
+        msg = conn.recv()
+        if msg[0] == "factor":
+            for sid, data, indices, indptr, shape in msg[1]:
+                factors[sid] = splu(csc_matrix((data, indices, indptr), shape=shape))
+            conn.send("ok")
+        elif msg[0] == "solve":
+            conn.send([(sid, factors[sid].solve(r)) for sid, r in msg[1]])
+        else:
+            break
+    conn.close()
+
+
+class NotConverged(RuntimeError):
+    """GMRES stopped before reaching the tolerance; the direct solver should take over."""
+
+
+class SubdomainPool:
+    """Persistent worker processes, each owning the factors of some subdomains."""
+
+    def __init__(self, workers: int, start_method: Optional[str] = None) -> None:
+        import multiprocessing as mp
+
+        ctx = mp.get_context(start_method or os.getenv("DD_START_METHOD", "spawn"))
+        self.conns = []
+        self.procs = []
+        for _ in range(workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(target=_worker_main, args=(child,), daemon=True)
+            proc.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(proc)
+        self.owner: dict[int, int] = {}
+
+    def factor(self, blocks: list) -> None:
+        """Distribute ``blocks`` (CSC matrices, indexed by subdomain) round-robin and factor."""
+        batches: list[list] = [[] for _ in self.conns]
+        for sid, block in enumerate(blocks):
+            w = sid % len(self.conns)
+            self.owner[sid] = w
+            batches[w].append((sid, block.data, block.indices, block.indptr, block.shape))
+        for conn, batch in zip(self.conns, batches):
+            conn.send(("factor", batch))
+        for conn in self.conns:
+            if conn.recv() != "ok":
+                raise RuntimeError("Subdomain factorization failed")
+
+    def solve(self, local_rhs: list[np.ndarray]) -> list[np.ndarray]:
+        """Solve every subdomain system concurrently; returns results in subdomain order."""
+        batches: list[list] = [[] for _ in self.conns]
+        for sid, r in enumerate(local_rhs):
+            batches[self.owner[sid]].append((sid, r))
+        for conn, batch in zip(self.conns, batches):
+            conn.send(("solve", batch))
+        out: list[Optional[np.ndarray]] = [None] * len(local_rhs)
+        for conn in self.conns:
+            for sid, z in conn.recv():
+                out[sid] = z
+        return out  # type: ignore[return-value]
+
+    def close(self) -> None:
+        for conn in self.conns:
+            try:
+                conn.send(("close",))
+                conn.close()
+            except Exception:
+                pass
+        for proc in self.procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+    def __enter__(self) -> "SubdomainPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def strip_partition(
+    dof_x: np.ndarray, subdomains: int, overlap: float
+) -> tuple[list[np.ndarray], list[np.ndarray]]:
+    """Split unknowns into x-strips with equal DOF counts.
+
+    Returns, per subdomain, the indices of its unknowns (owned strip widened by
+    ``overlap`` on both sides) and a boolean mask over those marking the owned ones.
+    Owned sets partition all unknowns.
+    """
+    cuts = np.quantile(dof_x, np.linspace(0.0, 1.0, subdomains + 1))
+    cuts[0], cuts[-1] = -np.inf, np.inf
+    indices, owned = [], []
+    for i in range(subdomains):
+        lo, hi = cuts[i], cuts[i + 1]
+        idx = np.flatnonzero((dof_x >= lo - overlap) & (dof_x < hi + overlap))
+        xi = dof_x[idx]
+        indices.append(idx)
+        owned.append((xi >= lo) & (xi < hi))
+    return indices, owned
+
+
+def _regularized_blocks(Kc, indices: list[np.ndarray], is_pressure: np.ndarray, shift: float):
+    from scipy.sparse import diags
+
+    blocks = []
+    for idx in indices:
+        block = Kc[idx][:, idx]
+        blocks.append((block - diags(shift * is_pressure[idx])).tocsc())
+    return blocks
+
+
+def solve_rect_stokes_dd(
+    h: float,
+    l: float,
+    mu: float,
+    u_avg: float,
+    nx: int = 64,
+    ny: int = 16,
+    workers: Optional[int] = None,
+    subdomains: Optional[int] = None,
+    overlap_cells: int = 2,
+    tol: float = 1e-10,
+    with_metrics: bool = False,
+    timer: PhaseTimer | None = None,
+    mesh=None,
+):
+    """Parallel counterpart of ``solve_rect_stokes_fem`` with the same return values.
+
+    ``workers`` defaults to the CPU count and ``subdomains`` to ``workers``. Metrics also
+    carry ``iterations``, ``subdomains`` and ``workers``. ``mesh`` as in
+    ``solve_rect_stokes_fem``. Raises ``NotConverged`` if GMRES does not converge, so
+    callers can fall back to the direct solver; any other error is a real failure.
+    """
+    if MeshTri is None:
+        raise RuntimeError("scikit-fem not available")
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    subdomains = max(1, int(subdomains or workers))
+
+    if mesh is None:
+        with phase(timer, "mesh"):
+            mesh = _rect_mesh(h, l, nx, ny)
+    system = _assemble_condensed(mesh, h, l, mu, u_avg, timer)
+
+    from scipy.sparse.linalg import LinearOperator, gmres
+
+    Kc, rhsc, free = system["Kc"].tocsr(), system["rhsc"], system["free"]
+    n_u = system["bu"].N
+    with phase(timer, "partition"):
+        dof_x = system["dof_x"][free]
+        is_pressure = (np.arange(free.size) >= n_u)[free].astype(float)
+        indices, owned = strip_partition(dof_x, subdomains, overlap_cells * l / max(nx - 1, 1))
+        # Scale the pressure shift to the velocity block so it is tiny but nonzero
+        vel_diag = np.abs(Kc.diagonal()[is_pressure == 0.0])
+        blocks = _regularized_blocks(Kc, indices, is_pressure, 1e-8 * float(vel_diag.mean()))
+
+    with SubdomainPool(min(workers, subdomains)) as pool:
+        with phase(timer, "factorize"):
+            pool.factor(blocks)
+        del blocks
+
+        def apply_ras(r: np.ndarray) -> np.ndarray:
+            z = pool.solve([np.ascontiguousarray(r[idx]) for idx in indices])
+            y = np.zeros_like(r)
+            for idx, own, zi in zip(indices, owned, z):
+                y[idx[own]] = zi[own]
+            return y
+
+        M = LinearOperator(Kc.shape, matvec=apply_ras, dtype=float)
+        iterations = 0
+
+        def count(_res) -> None:
+            nonlocal iterations
+            iterations += 1
+            checkpoint(timer)
+
+        with phase(timer, "solve"):
+            xc, info = gmres(
+                Kc,
+                rhsc,
+                M=M,
+                rtol=tol,
+                atol=0.0,
+                restart=200,
+                maxiter=20,
+                callback=count,
+                callback_type="pr_norm",
+            )
+    if info != 0:
+        raise NotConverged(f"GMRES did not converge (info={info}, {iterations} iterations)")
+    m, point_data, metrics = _finish(mesh, system, xc, h, l, timer)
+    metrics.update({"iterations": iterations, "subdomains": subdomains, "workers": workers})
+    if with_metrics:
+        return m, point_data, metrics
+    return m, point_data
@@ -2,32 +2,122 @@ from __future__ import annotations
 
 import numpy as np
 
+from .instrument import PhaseTimer, peak_rss_mb, phase
+
 try:
     from skfem import MeshTri, ElementTriP2, ElementTriP1, Basis, ElementVector
     from skfem.helpers import dot, grad, div
-    from skfem import asm, BilinearForm, LinearForm, condense
-    import meshio
+    from skfem import asm, BilinearForm, LinearForm
 except Exception:  # pragma: no cover
     MeshTri = None  # type: ignore
 
 
-def solve_rect_stokes_fem(h: float, l: float, mu: float, u_avg: float, nx: int = 64, ny: int = 16, with_metrics: bool = False):
-    """
-    Solve Stokes flow in a rectangle using scikit-fem with P2-P1 elements.
-    Returns (meshio.Mesh, point_data, metrics) on success where metrics may include
-    keys like 'flux_in' and 'flux_out'. Raises if scikit-fem isn't available.
+# Inflow profiles u_x / u_avg over eta = y / h, all with unit mean
+_INLETS = {
+    # Fully developed Poiseuille flow
+    "parabolic": lambda eta: 6.0 * eta * (1.0 - eta),
+    # Flatter quartic profile that develops into Poiseuille flow downstream
+    "blunt": lambda eta: 1.25 * (1.0 - (2.0 * eta - 1.0) ** 4),
+}
+
+
+def _assemble_fixed(
+    mesh,
+    h: float,
+    l: float,
+    u_avg: float,
+    timer: PhaseTimer | None = None,
+    inlet="parabolic",
+) -> dict:
+    """Bases, Dirichlet data and divergence block: the viscosity-independent part.
+
+    ``inlet`` names a profile in ``_INLETS`` or is a callable of ``y / h`` with unit mean.
+    The divergence block is assembled once and kept as its transpose restricted to the free
+    velocity rows (``Bt``), with the pressure rows of the rhs (``g``) already lifted.
     """
-    if MeshTri is None:
-        raise RuntimeError("scikit-fem not available")
-
-    x = np.linspace(0.0, l, nx)
-    y = np.linspace(0.0, h, ny)
-    mesh = MeshTri().init_tensor(x, y)
-
     e_u = ElementVector(ElementTriP2())
     e_p = ElementTriP1()
-    bu = Basis(mesh, e_u, intorder=4)
-    bp = Basis(mesh, e_p, intorder=4)
+    with phase(timer, "basis"):
+        bu = Basis(mesh, e_u, intorder=4)
+        bp = Basis(mesh, e_p, intorder=4)
+
+    @BilinearForm
+    def b(p, v, _):
+        return - p * div(v)
+
+    with phase(timer, "assembly"):
+        # Gradient block (velocity rows); the divergence block is its transpose
+        Bt = asm(b, bp, bu).tocsr()
+
+    with phase(timer, "condense"):
+        # Dirichlet BCs. Vector P2 dofs are interleaved per node/facet, so components are
+        # picked through nodal_dofs/facet_dofs.
+        tol = min(l, h) * 1e-12
+        x_dofs_idx = np.concatenate([bu.nodal_dofs[0], bu.facet_dofs[0]])
+        y_dofs_idx = np.concatenate([bu.nodal_dofs[1], bu.facet_dofs[1]])
+        profile = inlet if callable(inlet) else _INLETS[inlet]
+        u_in = u_avg * profile(bu.doflocs[1, x_dofs_idx] / h)
+
+        # Inlet: u_x from the profile, zero u_y; walls: no-slip. The outlet is left natural
+        # (do-nothing), which also fixes the pressure level, so every pressure DOF is free.
+        x = np.zeros(bu.N + bp.N)
+        mask_left_x = np.isclose(bu.doflocs[0, x_dofs_idx], 0.0, atol=tol)
+        x[x_dofs_idx[mask_left_x]] = u_in[mask_left_x]
+        mask_left_y = np.isclose(bu.doflocs[0, y_dofs_idx], 0.0, atol=tol)
+        ycoords_all = bu.doflocs[1]
+        mask_walls = np.isclose(ycoords_all, h, atol=tol) | np.isclose(ycoords_all, 0.0, atol=tol)
+        x[np.where(mask_walls)[0]] = 0.0
+        free = np.ones(x.size, dtype=bool)
+        free[x_dofs_idx[mask_left_x]] = False
+        free[y_dofs_idx[mask_left_y]] = False
+        free[np.where(mask_walls)[0]] = False
+        g = -(Bt.T @ x[: bu.N])
+        Bt = Bt[free[: bu.N]]
+    # x coordinate of every unknown, used to partition the system into subdomains
+    dof_x = np.concatenate([bu.doflocs[0], bp.doflocs[0]])
+    return {
+        "e_u": e_u, "bu": bu, "bp": bp, "Bt": Bt, "g": g, "x": x,
+        "free": free, "dof_x": dof_x,
+    }
+
+
+def _condense(system: dict, A, fmt: str = "csr"):
+    """Condensed saddle-point matrix and rhs for the velocity block ``A``.
+
+    ``system["x"]`` must still hold only the Dirichlet values, i.e. not yet be scattered into.
+
+    Only the free blocks are built: the Dirichlet values enter the rhs by a matrix-vector
+    product, so neither the full saddle-point matrix nor a second copy of it exists.
+    """
+    from scipy.sparse import bmat
+
+    n_u = system["bu"].N
+    free_u = system["free"][:n_u]
+    # rhs of the free rows: -K[free, D] x_D, i.e. -[A; B] x_D restricted to free rows
+    rhsc = np.concatenate([-(A @ system["x"][:n_u])[free_u], system["g"]])
+    A = A.tocsr()[free_u][:, free_u]
+    Bt = system["Bt"]
+    return bmat([[A, Bt], [Bt.T, None]], format=fmt), rhsc
+
+
+def _assemble_condensed(
+    mesh,
+    h: float,
+    l: float,
+    mu: float,
+    u_avg: float,
+    timer: PhaseTimer | None = None,
+    inlet="parabolic",
+    fmt: str = "csr",
+) -> dict:
+    """Assemble the P2-P1 saddle-point system with the channel BCs and condense it.
+
+    Returns the bases, the condensed matrix/rhs in sparse format ``fmt``, the full solution
+    vector ``x`` (holding the boundary values until ``_scatter`` fills in the rest) and the
+    mask of free DOFs, so that serial and domain-decomposed solvers share assembly and
+    output. ``inlet`` is the inflow profile, see ``_assemble_fixed``.
+    """
+    system = _assemble_fixed(mesh, h, l, u_avg, timer, inlet)
 
     from skfem.helpers import ddot
 
@@ -36,111 +126,103 @@ def solve_rect_stokes_fem(h: float, l: float, mu: float, u_avg: float, nx: int =
         # Vector Laplacian: double contraction of gradients
         return mu * ddot(grad(u), grad(v))
 
-    @BilinearForm
-    def b(p, v, _):
-        return - p * div(v)
+    with phase(timer, "assembly"):
+        A = asm(a, system["bu"])
+    with phase(timer, "condense"):
+        system["Kc"], system["rhsc"] = _condense(system, A, fmt)
+        del A
+    # The divergence block now only lives in Kc
+    del system["Bt"]
+    return system
 
-    @BilinearForm
-    def bt(u, q, _):
-        return - q * div(u)
 
-    try:
-        A = asm(a, bu)
-        B = asm(b, bp, bu).T
-        Bt = asm(bt, bu, bp).T
+def _scatter(system: dict, xc) -> np.ndarray:
+    """Write the condensed solution into the full solution vector in place and return it."""
+    x = system["x"]
+    x[system["free"]] = xc
+    return x
 
-        # Dirichlet BCs and system assembly
-        tol = min(l, h) * 1e-12
-        nsc = bu.N // 2
-        x_dofs_idx = np.arange(nsc)
-        y_dofs_idx = np.arange(nsc, 2 * nsc)
-        y_for_xdofs = bu.doflocs[1, x_dofs_idx]
-        u_in = 6.0 * u_avg * (y_for_xdofs / h) * (1.0 - y_for_xdofs / h)
-
-        from scipy.sparse import bmat
-        K = bmat([[A, Bt], [B, None]], format='csr')
-        rhs = np.zeros(K.shape[0])
-
-        # Build Dirichlet arrays
-        Dmap = {}
-        xcoords_xdofs = bu.doflocs[0, x_dofs_idx]
-        mask_left_x = np.isclose(xcoords_xdofs, 0.0, atol=tol)
-        u_vals = u_in[mask_left_x]
-        for di, dof in enumerate(x_dofs_idx[mask_left_x]):
-            Dmap[int(dof)] = float(u_vals[di])
-        xcoords_ydofs = bu.doflocs[0, y_dofs_idx]
-        mask_left_y = np.isclose(xcoords_ydofs, 0.0, atol=tol)
-        for dof in y_dofs_idx[mask_left_y]:
-            Dmap[int(dof)] = 0.0
-        ycoords_all = bu.doflocs[1]
-        mask_top = np.isclose(ycoords_all, h, atol=tol)
-        mask_bot = np.isclose(ycoords_all, 0.0, atol=tol)
-        for dof in np.where(mask_top | mask_bot)[0]:
-            Dmap[int(dof)] = 0.0
-
-        nu = bu.N
-        ndofs_u = nu
-        rows = sorted(Dmap.keys())
-        vals = np.array([Dmap[k] for k in rows])
-        p_fix = ndofs_u
-        rows_all = np.array(rows + [p_fix], dtype=int)
-        vals_all = np.concatenate([vals, np.array([0.0])])
-        from skfem import condense
-        Kc, rhsc, x0, _ = condense(K, rhs, D=rows_all, x=vals_all)
-        from scipy.sparse.linalg import spsolve
-        xc = spsolve(Kc, rhsc)
-        xfull = x0.copy()
-        mask = np.ones_like(x0, dtype=bool)
-        mask[rows_all] = False
-        xfull[mask] = xc
-        U = xfull[:ndofs_u]
-        P = xfull[ndofs_u:]
-        uvec = U.reshape(2, -1)
-        points = mesh.p.T
-        cells = [("triangle", mesh.t.T)]
-        point_data = {"u": uvec.T, "p": P[:points.shape[0]] if P.shape[0] >= points.shape[0] else np.pad(P, (0, points.shape[0]-P.shape[0]))}
-        m = meshio.Mesh(points=np.column_stack([points, np.zeros(points.shape[0])]), cells=cells, point_data=point_data)
-        # Compute boundary flux integrals if possible
-        metrics: dict[str, float] = {}
+
+def _finish(mesh, system: dict, xc, h: float, l: float, timer: PhaseTimer | None = None):
+    """Scatter the condensed solution back and build the meshio output and flux metrics.
+
+    ``system["bu"]``/``system["bp"]`` may be the bases or just their ``Dofs``.
+    """
+    import meshio
+
+    bu, bp, e_u = system["bu"], system["bp"], system["e_u"]
+    xfull = _scatter(system, xc)
+    ndofs_u = bu.N
+    U = xfull[:ndofs_u]
+    P = xfull[ndofs_u:]
+    uvec = U[bu.nodal_dofs]
+    points = mesh.p.T
+    cells = [("triangle", mesh.t.T)]
+    point_data = {"u": uvec.T, "p": P[:points.shape[0]] if P.shape[0] >= points.shape[0] else np.pad(P, (0, points.shape[0]-P.shape[0]))}
+    m = meshio.Mesh(points=np.column_stack([points, np.zeros(points.shape[0])]), cells=cells, point_data=point_data)
+    # Compute boundary flux integrals if possible
+    metrics: dict[str, float] = {}
+    with phase(timer, "metrics"):
         try:
-            from skfem import FacetBasis
-            from skfem import LinearForm as _LF
+            from skfem import FacetBasis, Functional
             tol = min(l, h) * 1e-12
             facets_in = mesh.facets_satisfying(lambda xx: np.isclose(xx[0], 0.0, atol=tol))
             facets_out = mesh.facets_satisfying(lambda xx: np.isclose(xx[0], l, atol=tol))
             fbin = FacetBasis(mesh, e_u, facets=facets_in)
             fbout = FacetBasis(mesh, e_u, facets=facets_out)
 
-            @_LF
-            def lflux(v, w):
+            @Functional
+            def lflux(w):
                 return dot(w['u'], w['n'])
 
             # Note: outward normal points to -x at inlet, +x at outlet
-            q_in = -float(asm(lflux, fbin, u=U))
-            q_out = float(asm(lflux, fbout, u=U))
+            q_in = -float(lflux.assemble(fbin, u=fbin.interpolate(U)))
+            q_out = float(lflux.assemble(fbout, u=fbout.interpolate(U)))
             metrics = {"flux_in": q_in, "flux_out": q_out}
         except Exception:
             metrics = {}
-        if with_metrics:
-            return m, point_data, metrics
-        return m, point_data
-    except Exception:
-        # Fallback analytic
-        from .stokes_rect import solve_stokes_poiseuille_rect
-        sol = solve_stokes_poiseuille_rect(h=h, l=l, mu=mu, u_avg=u_avg, nx=nx, ny=ny)
-        points = mesh.p.T
-        y = points[:, 1]
-        x = points[:, 0]
-        u_x = 6.0 * u_avg * (y / h) * (1.0 - y / h)
-        u_y = np.zeros_like(u_x)
-        dpdx = -12.0 * mu * u_avg / (h * h)
-        p = (l - x) * dpdx
-        cells = [("triangle", mesh.t.T)]
-        point_data = {"u": np.column_stack([u_x, u_y]), "p": p}
-        m = meshio.Mesh(points=np.column_stack([points, np.zeros(points.shape[0])]), cells=cells, point_data=point_data)
-        # Provide analytic fluxes for completeness
-        q = float((u_avg * h))
-        metrics = {"flux_in": q, "flux_out": q}
-        if with_metrics:
-            return m, point_data, metrics
-        return m, point_data
+    metrics["dofs"] = int(bu.N + bp.N)
+    # Process peak so far, i.e. including assembly and factorization
+    metrics["peak_rss_mb"] = peak_rss_mb()
+    return m, point_data, metrics
+
+
+def _rect_mesh(h: float, l: float, nx: int, ny: int):
+    x = np.linspace(0.0, l, nx)
+    y = np.linspace(0.0, h, ny)
+    return MeshTri().init_tensor(x, y)
+
+
+def solve_rect_stokes_fem(h: float, l: float, mu: float, u_avg: float, nx: int = 64, ny: int = 16, with_metrics: bool = False, timer: PhaseTimer | None = None, mesh=None):
+    """
+    Solve Stokes flow in a rectangle using scikit-fem with P2-P1 elements.
+    Returns (meshio.Mesh, point_data, metrics) on success where metrics may include
+    keys like 'flux_in', 'flux_out' and 'dofs'. Raises if scikit-fem isn't available or
+    the solve fails (out of memory, a singular system), so the caller can retry or fall
+    back.
+    When a PhaseTimer is given, wall time is recorded for the mesh, basis, assembly,
+    condense, factorize, solve and metrics phases.
+    A prebuilt triangle ``mesh`` of the channel (e.g. from the mesh cache) replaces the
+    ``nx`` x ``ny`` tensor mesh.
+    """
+    if MeshTri is None:
+        raise RuntimeError("scikit-fem not available")
+
+    if mesh is None:
+        with phase(timer, "mesh"):
+            mesh = _rect_mesh(h, l, nx, ny)
+
+    # Assembled straight to CSC and handed over, so SuperLU neither converts nor
+    # shares the peak with a second copy of the matrix
+    system = _assemble_condensed(mesh, h, l, mu, u_avg, timer, fmt="csc")
+    # Output only needs the DOF numbering, not the quadrature tables of the bases
+    system["bu"], system["bp"] = system["bu"].dofs, system["bp"].dofs
+    from scipy.sparse.linalg import splu
+    with phase(timer, "factorize"):
+        lu = splu(system.pop("Kc"))
+    with phase(timer, "solve"):
+        xc = lu.solve(system["rhsc"])
+    m, point_data, metrics = _finish(mesh, system, xc, h, l, timer)
+    if with_metrics:
+        return m, point_data, metrics
+    return m, point_data
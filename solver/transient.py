@@ -0,0 +1,359 @@
+"""Transient Stokes flow and scalar transport in the rectangular channel.
+
+Both are integrated by BDF1/BDF2 with a constant time step, so every implicit operator is
+factorized once and reused across steps:
+
+- Stokes (P2-P1): ``rho a0/dt M + A`` with the divergence constraint, starting from fluid
+  at rest with the inflow switched on at t=0. Once the velocity stops changing the flow is
+  frozen and its factorization released.
+- Transport of a concentration ``c`` (P1 with streamline diffusion, as channel Peclet
+  numbers are large): ``a0/dt M + D K + C(u)``. The operator depends on the velocity, so it
+  is only re-factorized while the flow is still developing.
+
+The inflow carries two streams, c = 1 below the centreline and c = 0 above, so the outlet
+mixing index ``1 - std(c) / 0.5`` tracks how far they have mixed.
+
+With an ``out_dir``, snapshots (VTU files plus a ParaView ``.pvd`` collection) and a
+time-series CSV are written as the run goes instead of being held in memory, and a restart
+checkpoint every ``checkpoint_every`` steps lets a killed or timed-out run resume from it
+rather than from t=0.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .instrument import PhaseTimer, phase
+from .stokes_fem import MeshTri, _assemble_fixed, _condense, _finish, _rect_mesh
+
+# Leading coefficient a0 and history weights of BDF1/BDF2:
+# dt du/dt ~ a0 u^{n+1} - w0 u^n - w1 u^{n-1}
+_BDF = {1: (1.0, (1.0, 0.0)), 2: (1.5, (2.0, -0.5))}
+# Relative velocity change per step below which the flow counts as steady
+_STEADY_TOL = 1e-10
+_SERIES_HEADER = "t,flux_out,c_out_mean,mixing_index\n"
+
+
+class Checkpointed(TimeoutError):
+    """The run hit its deadline and stopped after writing a checkpoint."""
+
+
+def _savez_atomic(path: Path, **arrays) -> None:
+    # Write next to the target and rename, so a kill never leaves a torn checkpoint
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _write_pvd(path: Path, entries: list[tuple[float, str]]) -> None:
+    rows = "\n".join(
+        f'    <DataSet timestep="{t:.10g}" part="0" file="{name}"/>' for t, name in entries
+    )
+    path.write_text(
+        '<?xml version="1.0"?>\n<VTKFile type="Collection" version="0.1">\n  <Collection>\n'
+        f"{rows}\n  </Collection>\n</VTKFile>\n"
+    )
+
+
+def solve_rect_transient(
+    h: float,
+    l: float,
+    mu: float,
+    u_avg: float,
+    t_end: float,
+    dt: float,
+    rho: float = 1000.0,
+    diffusivity: float = 1e-9,
+    transport: bool = True,
+    order: int = 2,
+    nx: int = 64,
+    ny: int = 16,
+    out_dir: str | Path | None = None,
+    prefix: str = "transient",
+    snapshot_every: int = 10,
+    checkpoint_every: int = 50,
+    deadline: float | None = None,
+    precision: str = "float64",
+    with_metrics: bool = False,
+    timer: PhaseTimer | None = None,
+    mesh=None,
+):
+    """Integrate from rest to ``t_end``; same return values as ``solve_rect_stokes_fem``.
+
+    Point data also carries ``c`` when ``transport`` is on. Snapshots are written every
+    ``snapshot_every`` steps (0: final state only) to ``out_dir`` as ``{prefix}-t00000.vtu``
+    etc., with ``{prefix}-transient.pvd`` and ``{prefix}-series.csv``; a matching
+    ``{prefix}-checkpoint.npz`` there is resumed from and removed on completion. When
+    ``time.monotonic()`` passes ``deadline`` the run checkpoints and raises ``Checkpointed``.
+    Snapshots are written at ``precision``, see ``mesh.write_output``.
+    Metrics also carry ``steps``, ``resumed_from`` (s), ``factorizations`` per operator,
+    ``flow_steady_at`` (s or None), ``mixing_index``, ``seconds_per_step``, ``files`` and
+    ``output_bytes_saved``.
+    ``mesh`` as in ``solve_rect_stokes_fem``.
+    """
+    if MeshTri is None:
+        raise RuntimeError("scikit-fem not available")
+    if order not in _BDF:
+        raise ValueError(f"BDF order must be 1 or 2, not {order}")
+    from scipy.sparse.linalg import splu
+    from skfem import Basis, BilinearForm, ElementTriP1, FacetBasis, Functional, asm
+    from skfem.helpers import ddot, dot, grad
+
+    n_steps = max(1, round(t_end / dt))
+    signature = json.dumps(
+        [h, l, mu, u_avg, dt, rho, diffusivity, transport, order, nx, ny, snapshot_every]
+    )
+    out = Path(out_dir) if out_dir is not None else None
+    if out is not None:
+        out.mkdir(parents=True, exist_ok=True)
+        ckpt_path = out / f"{prefix}-checkpoint.npz"
+        series_path = out / f"{prefix}-series.csv"
+        pvd_path = out / f"{prefix}-transient.pvd"
+
+    if mesh is None:
+        with phase(timer, "mesh"):
+            mesh = _rect_mesh(h, l, nx, ny)
+    system = _assemble_fixed(mesh, h, l, u_avg, timer)
+    bu = system["bu"]
+    free_u = system["free"][: bu.N]
+    nuf = int(free_u.sum())
+
+    @BilinearForm
+    def viscous(u, v, _):
+        return mu * ddot(grad(u), grad(v))
+
+    @BilinearForm
+    def mass(u, v, _):
+        return dot(u, v)
+
+    with phase(timer, "assembly"):
+        A = asm(viscous, bu)
+        M = asm(mass, bu)
+    tol = min(l, h) * 1e-12
+    fb_out = FacetBasis(
+        mesh,
+        system["e_u"],
+        facets=mesh.facets_satisfying(lambda xx: np.isclose(xx[0], l, atol=tol)),
+    )
+
+    @Functional
+    def outflux(w):
+        return dot(w["u"], w.n)
+
+    # Transport: P1 concentration, two inflow streams, natural (no-flux) elsewhere
+    if transport:
+        with phase(timer, "basis"):
+            bc = Basis(mesh, ElementTriP1(), intorder=4)
+        vx, vy = mesh.p
+        inlet_c = np.isclose(vx, 0.0, atol=tol)
+        c_dirichlet = np.zeros(bc.N)
+        c_dirichlet[inlet_c] = np.where(
+            vy[inlet_c] < 0.5 * h - tol, 1.0, np.where(vy[inlet_c] > 0.5 * h + tol, 0.0, 0.5)
+        )
+        free_c = ~inlet_c
+        outlet_c = np.isclose(vx, l, atol=tol)
+
+        @BilinearForm
+        def c_mass(c, v, _):
+            return c * v
+
+        @BilinearForm
+        def advect_diffuse(c, v, w):
+            u = w["u"]
+            speed = np.sqrt(u[0] ** 2 + u[1] ** 2)
+            pe = speed * w.h / (2.0 * diffusivity)
+            # Optimal 1D streamline diffusion: tau |u|^2 = |u| h / 2 (coth(Pe) - 1/Pe)
+            pe_safe = np.maximum(pe, 1e-3)
+            xi = np.where(pe > 1e-3, 1.0 / np.tanh(pe_safe) - 1.0 / pe_safe, pe / 3.0)
+            tau_u2 = 0.5 * speed * w.h * xi
+            u_gc = u[0] * grad(c)[0] + u[1] * grad(c)[1]
+            u_gv = u[0] * grad(v)[0] + u[1] * grad(v)[1]
+            sd = np.where(speed > 0.0, tau_u2 / np.maximum(speed**2, 1e-300), 0.0)
+            return diffusivity * dot(grad(c), grad(v)) + u_gc * v + sd * u_gc * u_gv
+
+        with phase(timer, "assembly"):
+            Mc = asm(c_mass, bc).tocsr()
+
+    # State: velocity/concentration at steps n and n-1, pressure at n
+    U = [system["x"][: bu.N].copy(), system["x"][: bu.N].copy()]
+    P = np.zeros(system["bp"].N)
+    C = [c_dirichlet.copy(), c_dirichlet.copy()] if transport else None
+    step = 0
+    steady_at: float | None = None
+    resumed_from = 0.0
+    if out is not None and ckpt_path.exists():
+        with np.load(ckpt_path) as ck:
+            if str(ck["signature"]) == signature:
+                step = int(ck["step"])
+                U = [ck["U"][0].copy(), ck["U"][1].copy()]
+                P = ck["P"].copy()
+                if transport:
+                    C = [ck["C"][0].copy(), ck["C"][1].copy()]
+                steady_at = float(ck["steady_at"]) if float(ck["steady_at"]) >= 0 else None
+                resumed_from = step * dt
+    files: list[str] = []
+    snapshots: list[tuple[float, str]] = []
+    # Bytes saved by single-precision snapshots of this run
+    saved: list[int] = []
+    if out is not None:
+        if step and snapshot_every:
+            # Snapshots up to the checkpoint are already on disk; later ones get rewritten
+            snapshots = [
+                (k * snapshot_every * dt, f"{prefix}-t{k:05d}.vtu")
+                for k in range(step // snapshot_every + 1)
+            ]
+        if step and series_path.exists():
+            keep = [
+                row
+                for row in series_path.read_text().splitlines(keepends=True)[1:]
+                if float(row.split(",", 1)[0]) <= step * dt + 0.5 * dt
+            ]
+            series_path.write_text(_SERIES_HEADER + "".join(keep))
+        else:
+            series_path.write_text(_SERIES_HEADER)
+        files.append(series_path.name)
+
+    factorizations = {"stokes": 0, "transport": 0}
+    stokes_lu: dict[float, object] = {}
+    transport_lu: dict = {"key": None, "lu": None}
+    velocity_version = step  # bumps whenever the flow changes
+
+    def stokes_step(a0: float, w: tuple[float, float]) -> None:
+        nonlocal P
+        if a0 not in stokes_lu:
+            with phase(timer, "factorize"):
+                Kc, rhs0 = _condense(system, (rho * a0 / dt) * M + A, "csc")
+                stokes_lu.clear()  # BDF2 never goes back to BDF1
+                stokes_lu[a0] = (splu(Kc), rhs0)
+                del Kc
+            factorizations["stokes"] += 1
+        lu, rhs0 = stokes_lu[a0]
+        with phase(timer, "solve"):
+            hist = (rho / dt) * (M @ (w[0] * U[0] + w[1] * U[1]))
+            rhs = rhs0.copy()
+            rhs[:nuf] += hist[free_u]
+            xc = lu.solve(rhs)
+        new = U[0].copy()
+        new[free_u] = xc[:nuf]
+        P = xc[nuf:]
+        U[1], U[0] = U[0], new
+
+    def transport_step(a0: float, w: tuple[float, float]) -> None:
+        key = (a0, velocity_version)
+        if transport_lu["key"] != key:
+            with phase(timer, "factorize"):
+                transport_lu["lu"] = None
+                Tm = (a0 / dt) * Mc + asm(advect_diffuse, bc, u=bu.interpolate(U[0]))
+                Tm = Tm.tocsr()
+                transport_lu["rhs0"] = -(Tm @ c_dirichlet)[free_c]
+                transport_lu["lu"] = splu(Tm[free_c][:, free_c].tocsc())
+                transport_lu["key"] = key
+                del Tm
+            factorizations["transport"] += 1
+        with phase(timer, "solve"):
+            hist = (Mc @ (w[0] * C[0] + w[1] * C[1])) / dt
+            new = c_dirichlet.copy()
+            new[free_c] = transport_lu["lu"].solve(transport_lu["rhs0"] + hist[free_c])
+        C[1], C[0] = C[0], new
+
+    def record(t: float, snapshot: bool) -> None:
+        if out is None:
+            return
+        row = [t, float(outflux.assemble(fb_out, u=fb_out.interpolate(U[0]))), np.nan, np.nan]
+        if transport:
+            c_out = C[0][outlet_c]
+            row[2:] = [float(c_out.mean()), 1.0 - float(c_out.std()) / 0.5]
+        with open(series_path, "a") as f:
+            f.write(",".join(f"{v:.10g}" for v in row) + "\n")
+        if not snapshot:
+            return
+        import meshio
+
+        from .mesh import write_output
+
+        name = f"{prefix}-t{len(snapshots):05d}.vtu"
+        point_data = {"u": U[0][bu.nodal_dofs].T, "p": P}
+        if transport:
+            point_data["c"] = C[0]
+        with phase(timer, "export"):
+            snapshot_mesh = meshio.Mesh(
+                np.column_stack([mesh.p.T, np.zeros(mesh.p.shape[1])]),
+                [("triangle", mesh.t.T)],
+                point_data=point_data,
+            )
+            saved.append(write_output(out / name, snapshot_mesh, precision))
+            snapshots.append((t, name))
+            _write_pvd(pvd_path, snapshots)
+
+    def checkpoint() -> None:
+        with phase(timer, "checkpoint"):
+            _savez_atomic(
+                ckpt_path,
+                signature=np.array(signature),
+                step=np.array(step),
+                U=np.stack(U),
+                P=P,
+                C=np.stack(C) if transport else np.zeros(0),
+                steady_at=np.array(-1.0 if steady_at is None else steady_at),
+            )
+
+    if step == 0:
+        record(0.0, bool(snapshot_every))
+    t0 = time.perf_counter()
+    first = step
+    while step < n_steps:
+        a0, w = _BDF[1 if step == 0 else order]
+        if steady_at is None:
+            previous = U[0]
+            stokes_step(a0, w)
+            velocity_version += 1
+            change = np.linalg.norm(U[0] - previous) / (np.linalg.norm(U[0]) or 1.0)
+            if change < _STEADY_TOL:
+                steady_at = (step + 1) * dt
+                U[1] = U[0]
+                stokes_lu.clear()
+        if transport:
+            transport_step(a0, w)
+        step += 1
+        snap = bool(snapshot_every) and step % snapshot_every == 0
+        record(step * dt, snap or (step == n_steps and not snapshot_every))
+        if out is not None and step < n_steps:
+            expired = deadline is not None and time.monotonic() >= deadline
+            if expired or step % checkpoint_every == 0:
+                checkpoint()
+            if expired:
+                raise Checkpointed(
+                    f"Stopped at t={step * dt:g} s of {n_steps * dt:g} s after a checkpoint"
+                )
+    seconds = time.perf_counter() - t0
+    if out is not None:
+        ckpt_path.unlink(missing_ok=True)
+        files.extend(name for _t, name in snapshots)
+        if snapshots:
+            files.append(pvd_path.name)
+
+    xc = np.concatenate([U[0][free_u], P])
+    m, point_data, metrics = _finish(mesh, system, xc, h, l, timer)
+    if transport:
+        point_data["c"] = C[0]
+        m.point_data["c"] = C[0]
+        metrics["mixing_index"] = 1.0 - float(C[0][outlet_c].std()) / 0.5
+    metrics.update(
+        {
+            "steps": n_steps,
+            "resumed_from": resumed_from,
+            "factorizations": factorizations,
+            "flow_steady_at": steady_at,
+            "seconds_per_step": seconds / max(1, n_steps - first),
+            "files": files,
+            "output_bytes_saved": sum(saved),
+        }
+    )
+    if with_metrics:
+        return m, point_data, metrics
+    return m, point_data
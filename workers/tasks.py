@@ -27,12 +27,65 @@ def _record_error(job_id: str, msg: str) -> None:
         pass
 
 
+def _no_retry() -> None:
+    """Drop the retries left to the current job: a rerun would fail the same way."""
+    try:
+        from rq import get_current_job  # type: ignore
+
+        j = get_current_job()
+        if j is not None:
+            j.retries_left = 0
+    except Exception:
+        pass
+
+
 def runjob(spec_data: dict, job_id: str) -> dict:
     """Public RQ task entrypoint. Delegates to API job function; records import errors."""
     # Import lazily to avoid circular imports at worker boot
     try:
-        from api.app.routers.jobs import _dummy_solver  # type: ignore
+        from api.app.admission import MemoryBudgetExceeded, check_worker_budget  # type: ignore
+        from api.app.runner import _is_transient, _run_job  # type: ignore
     except Exception as e:  # ImportError and others
         _record_error(job_id, f"ImportError in worker: {e}")
         raise
-    return _dummy_solver(spec_data, job_id)
+    # Refuse jobs that cannot fit this worker before allocating anything for them
+    try:
+        check_worker_budget(spec_data)
+    except MemoryBudgetExceeded as e:
+        _record_error(job_id, str(e))
+        _no_retry()
+        raise
+    try:
+        from rq import get_current_job  # type: ignore
+
+        from api.app import telemetry  # type: ignore
+
+        telemetry.observe_queue_wait(get_current_job())
+    except Exception:
+        pass
+    try:
+        return _run_job(spec_data, job_id)
+    except BaseException as e:
+        # Only transient failures use the job's retry policy; RQ retries lost workers itself
+        if not _is_transient(e):
+            _no_retry()
+        raise
+
+
+def _advance_study(job, connection, outcome) -> None:
+    study_id = (job.meta or {}).get("study_id")
+    if not study_id:
+        return
+    from api.app import studies  # type: ignore
+
+    studies.advance(connection, study_id, {job.id: outcome})
+
+
+def study_job_succeeded(job, connection, result, *args, **kwargs) -> None:
+    """RQ success callback: lets the job's study enqueue its next evaluations."""
+    _advance_study(job, connection, result)
+
+
+def study_job_failed(job, connection, exc_type, exc_value, tb) -> None:
+    """RQ failure callback: records the failed evaluation and keeps the study going."""
+    _advance_study(job, connection, None)
@@ -1,15 +1,145 @@
 import os
+import shutil
 import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
 from redis import Redis
 from rq import Queue, Worker
 
 
+class AdmissionMixin:
+    """Defers jobs that fit the memory budget but not the memory free right now.
+
+    Deferred jobs go to the scheduled registry and come back after
+    ``WORKER_DEFER_SECONDS``; after ``WORKER_MAX_DEFERRALS`` they run regardless. Jobs that
+    can never fit are left to the task, which refuses them with a recorded error.
+    """
+
+    def execute_job(self, job, queue):
+        if self._defer(job, queue):
+            return
+        super().execute_job(job, queue)
+
+    def _defer(self, job, queue) -> bool:
+        try:
+            from api.app.admission import should_defer
+
+            if not job.args or not should_defer(job.args[0]):
+                return False
+        except Exception:
+            return False
+        deferrals = int((job.meta or {}).get("admission_deferrals", 0))
+        if deferrals >= int(os.getenv("WORKER_MAX_DEFERRALS", "10")):
+            return False
+        job.meta["admission_deferrals"] = deferrals + 1
+        job.save_meta()
+        delay = float(os.getenv("WORKER_DEFER_SECONDS", "30"))
+        queue.schedule_job(job, datetime.now(timezone.utc) + timedelta(seconds=delay))
+        return True
+
+
+class HorseMetricsMixin:
+    """Keeps the Prometheus files of forked job processes from piling up.
+
+    Each horse writes to the one set of files named after its worker, and its live
+    gauges are dropped when it exits.
+    """
+
+    def main_work_horse(self, job, queue):
+        try:
+            from api.app import telemetry
+
+            telemetry.set_process_name(telemetry.horse_process_name(os.getppid()))
+        except Exception:
+            pass
+        return super().main_work_horse(job, queue)
+
+    def monitor_work_horse(self, job, queue):
+        try:
+            super().monitor_work_horse(job, queue)
+        finally:
+            _mark_dead(horse=True)
+
+
+def _mark_dead(horse: bool) -> None:
+    """Drop the live metrics of this worker process, or of its horses."""
+    try:
+        from api.app import telemetry
+
+        pid = os.getpid()
+        telemetry.mark_process_dead(telemetry.horse_process_name(pid) if horse else str(pid))
+    except Exception:
+        pass
+
+
+class AdmissionWorker(HorseMetricsMixin, AdmissionMixin, Worker):
+    pass
+
+
+def _record_horse_killed(job, retpid, ret_val, rusage) -> None:
+    """Record why a job vanished when its process is killed (usually the OOM killer)."""
+    how = f"signal {os.WTERMSIG(ret_val)}" if os.WIFSIGNALED(ret_val) else f"status {ret_val}"
+    msg = (
+        f"Job process was killed ({how}) at a peak RSS of {rusage.ru_maxrss / 1024:.0f} MB; "
+        "it most likely ran out of memory"
+    )
+    try:
+        from api.app.admission import _describe, estimate_job
+
+        msg += f". The job needs {_describe(estimate_job(job.args[0]))}"
+    except Exception:
+        pass
+    try:
+        job.meta["error_message"] = msg
+        job.save_meta()
+    except Exception:
+        pass
+    try:
+        from workers.tasks import _artifacts_dir
+
+        (_artifacts_dir() / f"{job.args[1]}-error.txt").write_text(msg)
+    except Exception:
+        pass
+
+
+def _start_metrics(redis_url: str, queue_name: str) -> None:
+    """Expose Prometheus metrics aggregated over the forked job processes."""
+    port = int(os.getenv("WORKER_METRICS_PORT", "9101"))
+    if port <= 0:
+        return
+    # Must be set before prometheus_client is first imported (here and in the horses)
+    mp_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not mp_dir:
+        mp_dir = tempfile.mkdtemp(prefix="worker-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = mp_dir
+    else:
+        # Drop samples left behind by a previous worker run
+        shutil.rmtree(mp_dir, ignore_errors=True)
+        os.makedirs(mp_dir, exist_ok=True)
+    try:
+        from api.app.telemetry import start_worker_exporter
+
+        start_worker_exporter(port, redis_url, [queue_name])
+    except Exception as e:
+        print(f"Worker metrics disabled: {e}", file=sys.stderr)
+
+
 def main():
     redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     conn = Redis.from_url(redis_url)
     queue_name = os.getenv("QUEUE", "jobs")
-    w = Worker([Queue(queue_name, connection=conn)], connection=conn)
-    w.work(with_scheduler=True)
+    _start_metrics(redis_url, queue_name)
+    w = AdmissionWorker(
+        [Queue(queue_name, connection=conn)],
+        connection=conn,
+        work_horse_killed_handler=_record_horse_killed,
+    )
+    try:
+        w.work(with_scheduler=True)
+    finally:
+        _mark_dead(horse=True)
+        _mark_dead(horse=False)
 
 
 if __name__ == "__main__":
@@ -18,4 +148,3 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Worker failed: {e}", file=sys.stderr)
         raise
-